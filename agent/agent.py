@@ -3,20 +3,42 @@ Complete Agent architecture for Inflx AI
 Connects the llm to the intent_classifier, rag_retriever, tools and more
 """
 
+import os
 import re
 import json
+import time
 from typing import Optional
 from pydantic import BaseModel, Field
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.config import get_stream_writer
 from data.rag_retriever import retrieve_from_kb
-from agent.intent_classifier import classify_intent
+from agent.intent_classifier import (
+    INTENT_LABELS, classify_intent, aclassify_intent, classify_intent_locally, remember_llm_intent,
+)
 from agent.state_manager import ConversationState
 from agent.tools import mock_lead_capture
-from agent.state_manager import MultiLLM
-
-# client = genai.Client()
-llm = MultiLLM()
+from agent.state_manager import get_llm
+from agent import response_cache
+from agent import telemetry
+from agent import prompt_budget
+from agent import templates
+from agent.lead_extractor import extract_lead_fields, record_turn as record_lead_turn
+from agent.checkpointer import SqliteCheckpointer
+
+# shared with intent_classifier; provider clients are built on the first call
+llm = get_llm()
+
+# ":memory:" gives a throwaway store, e.g. for tests and benchmarks
+CHECKPOINT_DB = os.getenv(
+    "INFLX_CHECKPOINT_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "checkpoints.sqlite"),
+)
+CHECKPOINT_KEEP_LAST = int(os.getenv("INFLX_CHECKPOINT_KEEP_LAST", "3"))
+CHECKPOINT_IDLE_TTL_S = float(os.getenv("INFLX_CHECKPOINT_IDLE_TTL_S", str(7 * 24 * 60 * 60)))
+# "graph": intent -> rag/lead -> llm, up to three LLM calls per turn
+# "fused": one structured call returns intent, lead fields and the reply
+TURN_MODE = os.getenv("INFLX_TURN_MODE", "graph")
 
 # LangGraph State Schema
 class AgentState(BaseModel):
@@ -25,22 +47,34 @@ class AgentState(BaseModel):
     conversation: ConversationState = Field(default_factory=ConversationState)
     rag_result: Optional[str] = None
     reply: Optional[str] = None
+    # set by a node whose reply is complete: the graph ends there, without the LLM
+    reply_final: bool = False
     class Config:
         """Configurations for AgentState"""
         arbitrary_types_allowed = True
 
 # NODES
-def intent_node(state: AgentState):
-    """Node responsible for classifying intent"""
-    conv = state.conversation
-    user_message = state.user_message
+# Each LLM-calling node is split into prompt building / state updating helpers
+# so the sync node and its async twin (used by app.ainvoke) share the logic.
 
-    label = classify_intent(user_message)
+def _apply_intent(state: AgentState, label: str):
+    conv = state.conversation
+    state.reply_final = False
+    # KB text is per turn: rag_node sets it again when this turn needs it
+    state.rag_result = None
+    conv.rag_used = False
     conv.last_intent = label
-    conv.add_turn("User", user_message)
-
+    conv.add_turn("User", state.user_message)
     return state
 
+def intent_node(state: AgentState):
+    """Node responsible for classifying intent"""
+    return _apply_intent(state, classify_intent(state.user_message))
+
+async def aintent_node(state: AgentState):
+    """Async version of intent_node"""
+    return _apply_intent(state, await aclassify_intent(state.user_message))
+
 def rag_node(state: AgentState):
     """Node responsible for RAG retrieval"""
     answer = retrieve_from_kb(state.user_message)
@@ -53,22 +87,45 @@ def rag_node(state: AgentState):
 
     return state
 
-def lead_collection_node(state: AgentState):
-    """Node responsible for extracting information and calling the tool"""
-    conv = state.conversation
-    user_msg = state.user_message
-    history_text = "\n".join(f"{turn.role}: {turn.content}" for turn in conv.history)
+async def arag_node(state: AgentState):
+    """Async version of rag_node (retrieval is in-memory, nothing to await)"""
+    return rag_node(state)
 
-    conv.collecting_lead = True
+def template_node(state: AgentState):
+    """
+    Answers plain greetings and direct plan/policy lookups from templates and
+    finalizes the turn; anything else falls through to rag/llm unchanged.
+    """
+    conv = state.conversation
+    reply = templates.reply_for(conv.last_intent, state.user_message)
+    if reply is None:
+        return state
+    telemetry.record_event("templated_reply", intent=conv.last_intent)
+    get_stream_writer()({"reply_chunk": reply})
+    state.reply_final = True
+    return _apply_response(state, reply)
+
+async def atemplate_node(state: AgentState):
+    """Async version of template_node (templates are in-memory, nothing to await)"""
+    return template_node(state)
+
+FIELD_DESCRIPTIONS = {
+    "name": "name",
+    "email": "email",
+    "platform": "platform of interest (e.g., LinkedIn, YouTube, Instagram, WhatsApp, Website)",
+}
+
+def _extraction_prompt(state: AgentState, fields) -> str:
+    conv = state.conversation
+    user_msg = prompt_budget.clip_text(state.user_message, prompt_budget.BUDGETS["lead_extraction"].message)
+    field_list = "\n    ".join(f"- {FIELD_DESCRIPTIONS[f]}" for f in fields)
+    json_form = ",\n    ".join(f'"{f}": <string or null>' for f in fields)
 
-    # ---- LLM extraction ----
-    extraction_prompt = f"""
+    head = f"""
     You extract structured lead details from free-form text.
 
     Extract ONLY the following fields if explicitly mentioned:
-    - name
-    - email
-    - platform of interest (e.g., LinkedIn, YouTube, Instagram, WhatsApp, Website)
+    {field_list}
 
     Rules:
     - Do NOT invent missing fields
@@ -78,12 +135,11 @@ def lead_collection_node(state: AgentState):
 
     Respond ONLY with valid JSON. Do not add any explanation. JSON should follow the form:
     {{
-    "name": <string or null>,
-    "email": <string or null>,
-    "platform": <string or null>
+    {json_form}
     }}
     History of messages:
-    {history_text}
+    """
+    tail = f"""
     User message:
     \"\"\"{user_msg}\"\"\"
 
@@ -92,8 +148,32 @@ def lead_collection_node(state: AgentState):
     Email: {conv.email}
     Platform: {conv.platform}
 """
+    return prompt_budget.with_history(head, conv, tail, "lead_extraction")
+
+def _keep(existing, new):
+    """update state only if missing"""
+    if new  in [None, "null", "None", ""]:
+        return existing
+    return new if not existing else existing
 
-    response = llm.invoke(extraction_prompt)
+def _local_extraction(state: AgentState):
+    """
+    Fast deterministic tier over the user's message.
+    Only this turn's message is read: every earlier turn since lead collection
+    started already ran this tier and its fields are kept on conv, while turns
+    from before (or from a previous signup) must not prefill the lead.
+    :return: fields still missing afterwards (the only ones the LLM is asked for)
+    """
+    conv = state.conversation
+    conv.collecting_lead = True
+    found = extract_lead_fields([state.user_message])
+    conv.name = _keep(conv.name, found["name"])
+    conv.email = _keep(conv.email, found["email"])
+    conv.platform = _keep(conv.platform, found["platform"])
+    return conv.missing_lead_fields()
+
+def _apply_extraction(state: AgentState, response):
+    conv = state.conversation
     raw = response.text.strip()
     raw = re.sub(r"```.*?```", "", raw, flags=re.DOTALL).strip()
 
@@ -102,16 +182,15 @@ def lead_collection_node(state: AgentState):
     except Exception:
         extracted = {"name": None, "email": None, "platform": None}
 
-    # ---- update state only if missing ----
-    def keep(existing, new):
-        if new  in [None, "null", "None", ""]:
-            return existing
-        return new if not existing else existing
+    conv.name = _keep(conv.name, extracted.get("name"))
+    conv.email = _keep(conv.email, extracted.get("email"))
+    conv.platform = _keep(conv.platform, extracted.get("platform"))
+    return state
 
-    conv.name = keep(conv.name, extracted.get("name"))
-    conv.email = keep(conv.email, extracted.get("email"))
-    conv.platform = keep(conv.platform, extracted.get("platform"))
-    
+def _finish_lead_turn(state: AgentState):
+    conv = state.conversation
+    # every branch below writes the complete reply
+    state.reply_final = True
     # ---- check remaining ----
     missing = conv.missing_lead_fields()
 
@@ -124,25 +203,75 @@ def lead_collection_node(state: AgentState):
         conv.add_turn("Assistant", ask)
         return state
 
-    # ---- all details present → capture lead ----
-    out = mock_lead_capture(conv.name, conv.email, conv.platform)
+    # ---- all details present → validate once, then capture lead ----
+    try:
+        lead = conv.validated_lead()
+    except ValueError:
+        conv.email = None
+        ask = "Hmm, that email doesn't look right. Could you share it again?"
+        state.reply = ask
+        conv.add_turn("Assistant", ask)
+        return state
+
+    out = mock_lead_capture(lead["name"], lead["email"], lead["platform"])
     conv.reset_lead_capture()
     conv.last_intent = "post_lead"
     conv.lead_just_captured = True
-    state.reply = (
-        f"🎉 Lead captured successfully!\n\n{out}\n\nOur team will reach out soon."
-    )
+    if out["status"] == "duplicate":
+        state.reply = (
+            f"Looks like we already have your details for {out['email']}, so you're all set. "
+            "Our team will reach out soon."
+        )
+    else:
+        state.reply = (
+            "🎉 Lead captured successfully!\n\n"
+            f"Name: {out['name']}\nEmail: {out['email']}\nPlatform: {out['platform']}\n\n"
+            "Our team will reach out soon."
+        )
     conv.add_turn("Assistant", state.reply)
     return state
 
-def llm_response_node(state: AgentState):
-    """Node responsible for handling llm calls except for extraction"""
+def lead_collection_node(state: AgentState):
+    """Node responsible for extracting information and calling the tool"""
+    missing = _local_extraction(state)
+    if not missing:
+        record_lead_turn()
+        return _finish_lead_turn(state)
+
+    # ---- LLM extraction, only for what the local tier could not find ----
+    start = time.perf_counter()
+    response = llm.invoke(_extraction_prompt(state, missing), call_site="lead_extraction")
+    record_lead_turn(time.perf_counter() - start)
+    _apply_extraction(state, response)
+    return _finish_lead_turn(state)
+
+async def alead_collection_node(state: AgentState):
+    """Async version of lead_collection_node"""
+    missing = _local_extraction(state)
+    if not missing:
+        record_lead_turn()
+        return _finish_lead_turn(state)
+
+    start = time.perf_counter()
+    response = await llm.ainvoke(_extraction_prompt(state, missing), call_site="lead_extraction")
+    record_lead_turn(time.perf_counter() - start)
+    _apply_extraction(state, response)
+    return _finish_lead_turn(state)
+
+def _response_prompt(state: AgentState, shared: bool = False) -> str:
+    """
+    Prompt for the reply. A shared reply (one response_cache may hand to other
+    users) is generated without the conversation history, so it cannot carry
+    this user's name, email or plan.
+    """
     conv = state.conversation
-    history_text = "\n".join(f"{turn.role}: {turn.content}" for turn in conv.history)
+    budget = prompt_budget.BUDGETS["response"]
+    user_msg = prompt_budget.clip_text(state.user_message, budget.message)
     if getattr(conv, "rag_used", False):
+        context = prompt_budget.clip_context(state.rag_result, state.user_message, budget.context)
         rag_section = f"""
         Use the following official knowledge base info and keep your answer grounded to it:
-        {state.rag_result}
+        {context}
         """
     else:
         rag_section = "No reliable info found in the knowledge base. Do NOT invent product details."
@@ -150,13 +279,14 @@ def llm_response_node(state: AgentState):
     if getattr(conv, "lead_just_captured", False):
         post_lead_note = """NOTE: The user has successfully signed up.
         Do NOT try to sell again, focus on support and answering."""
-    prompt = f"""
+    head = """
     You are AutoStream SaaS support assistant.
 
     Conversation history:
-    {history_text}
+    """
+    tail = f"""
 
-    User said: "{state.user_message}"
+    User said: "{user_msg}"
     Detected intent: {conv.last_intent}
 
     {rag_section}
@@ -170,15 +300,57 @@ def llm_response_node(state: AgentState):
 
     {post_lead_note}
     """
+    if shared:
+        return "\n    You are AutoStream SaaS support assistant.\n" + tail
+    return prompt_budget.with_history(head, conv, tail, "response")
 
-    response = llm.invoke(prompt)
-    text = response.text.strip()
+def _apply_response(state: AgentState, text: str):
+    text = text.strip()
 
-    conv.add_turn("Assistant", text)
+    state.conversation.add_turn("Assistant", text)
     state.reply = text
 
     return state
 
+def llm_response_node(state: AgentState):
+    """
+    Node responsible for handling llm calls except for extraction
+    The reply is streamed: every chunk is emitted on the "custom" stream mode as
+    {"reply_chunk": text}, and the full text is committed to history once at the end.
+    Repeated grounded FAQs are answered from response_cache without an LLM call.
+    """
+    writer = get_stream_writer()
+    key = response_cache.cache_key(state.conversation, state.user_message, state.rag_result)
+    cached = response_cache.get(key)
+    if cached is not None:
+        writer({"reply_chunk": cached})
+        return _apply_response(state, cached)
+
+    parts = []
+    for chunk in llm.stream(_response_prompt(state, shared=key is not None), call_site="response"):
+        parts.append(chunk)
+        writer({"reply_chunk": chunk})
+    text = "".join(parts)
+    response_cache.put(key, text.strip())
+    return _apply_response(state, text)
+
+async def allm_response_node(state: AgentState):
+    """Async version of llm_response_node"""
+    writer = get_stream_writer()
+    key = response_cache.cache_key(state.conversation, state.user_message, state.rag_result)
+    cached = response_cache.get(key)
+    if cached is not None:
+        writer({"reply_chunk": cached})
+        return _apply_response(state, cached)
+
+    parts = []
+    async for chunk in llm.astream(_response_prompt(state, shared=key is not None), call_site="response"):
+        parts.append(chunk)
+        writer({"reply_chunk": chunk})
+    text = "".join(parts)
+    response_cache.put(key, text.strip())
+    return _apply_response(state, text)
+
 def router(state: AgentState):
     """Router for the graph"""
     conv = state.conversation
@@ -188,11 +360,8 @@ def router(state: AgentState):
 
     intent = conv.last_intent
 
-    if intent == "greeting":
-        return "llm"
-
-    if intent == "product_inquiry":
-        return "rag"
+    if intent in ("greeting", "product_inquiry"):
+        return "template"
 
     if intent == "high_intent_lead":
         conv.collecting_lead = True
@@ -201,14 +370,201 @@ def router(state: AgentState):
         return "llm"
     return "llm"
 
+def after_template(state: AgentState):
+    """Ends a templated turn; otherwise product questions go to rag, the rest to llm"""
+    if state.reply_final:
+        return END
+    return "rag" if state.conversation.last_intent == "product_inquiry" else "llm"
+
+def finished_or_llm(state: AgentState):
+    """Ends the turn if the node finalized the reply, else lets the LLM write it"""
+    return END if state.reply_final else "llm"
+
+# FUSED TURN
+# Everything local runs first (cached/local intent, retrieval, regex lead fields);
+# what is left -- an uncertain intent, missing lead fields, the reply -- is asked
+# for in a single JSON call. The answer feeds the same state updates and
+# lead capture as the graph nodes.
+
+class _FusedPlan:
+    """Local results of a fused turn, handed from preparation to the apply step"""
+    __slots__ = ("label", "needs_llm", "prompt", "cache_key", "template")
+
+    def __init__(self, label, needs_llm):
+        self.label = label
+        self.needs_llm = needs_llm
+        self.prompt = None
+        self.cache_key = None
+        self.template = None
+
+def _fused_prompt(state: AgentState, shared: bool = False) -> str:
+    """Prompt for the fused turn; a shared reply gets no history or lead details, see _response_prompt"""
+    conv = state.conversation
+    budget = prompt_budget.BUDGETS["fused_turn"]
+    user_msg = prompt_budget.clip_text(state.user_message, budget.message)
+    if conv.rag_used:
+        context = prompt_budget.clip_context(state.rag_result, state.user_message, budget.context)
+        rag_section = f"""Official knowledge base info (keep product answers grounded to it):
+    {context}"""
+    else:
+        rag_section = "No reliable info found in the knowledge base. Do NOT invent product details."
+    post_lead_note = ""
+    if conv.lead_just_captured:
+        post_lead_note = "NOTE: The user has already signed up. Do NOT try to sell again, focus on support."
+    lead_section = "Currently collecting lead details: no" if shared else (
+        f"Lead details collected so far: name={conv.name}, email={conv.email}, platform={conv.platform}\n"
+        f"    Currently collecting lead details: {'yes' if conv.collecting_lead else 'no'}"
+    )
+    head = """
+    You are AutoStream SaaS support assistant. Handle the user's latest message in one step.
+
+    Conversation history:
+    """
+    tail = f"""
+
+    User said: "{user_msg}"
+
+    {rag_section}
+
+    {lead_section}
+
+    Respond ONLY with valid JSON, no explanation:
+    {{"intent": "greeting" | "product_inquiry" | "high_intent_lead",
+      "name": <string or null>, "email": <string or null>, "platform": <string or null>,
+      "reply": <your reply to the user>}}
+
+    Rules:
+    - intent: high_intent_lead if the user wants to sign up, buy or do account actions,
+      product_inquiry for questions about features, pricing and plans, greeting otherwise
+    - name/email/platform: ONLY if explicitly mentioned in the message or history, else null
+    - reply: friendly, to the point and concise; DO NOT MAKE UP PRICES, FEATURES, OR CLAIMS
+    - if the intent is high_intent_lead or lead details are being collected, the reply asks
+      for whichever of name, email and platform (e.g. YouTube, Instagram) are still missing
+    {post_lead_note}
+    """
+    if shared:
+        return "\n    You are AutoStream SaaS support assistant. Handle the user's latest message in one step.\n" + tail
+    return prompt_budget.with_history(head, conv, tail, "fused_turn")
+
+def _prepare_fused(state: AgentState) -> _FusedPlan:
+    """
+    Local part of a fused turn.
+    plan.prompt is None when the turn needs no LLM call at all: a confident intent
+    plus a complete lead, a templated reply or a cached FAQ answer.
+    """
+    conv = state.conversation
+    plan = _FusedPlan(*classify_intent_locally(state.user_message))
+    conv.last_intent = plan.label
+    conv.add_turn("User", state.user_message)
+
+    if plan.needs_llm or plan.label == "product_inquiry":
+        rag_node(state)
+    else:
+        state.rag_result = None
+        conv.rag_used = False
+
+    if conv.collecting_lead or (plan.label == "high_intent_lead" and not plan.needs_llm):
+        # an unsure guess only starts lead collection once the LLM confirms it
+        if not _local_extraction(state) and not plan.needs_llm:
+            return plan
+    elif not plan.needs_llm:
+        plan.template = templates.reply_for(plan.label, state.user_message)
+        if plan.template is not None:
+            return plan
+        plan.cache_key = response_cache.cache_key(conv, state.user_message, state.rag_result)
+        if response_cache.get(plan.cache_key) is not None:
+            return plan
+    plan.prompt = _fused_prompt(state, shared=plan.cache_key is not None)
+    return plan
+
+def _finish_fused(state: AgentState, plan: _FusedPlan, raw: Optional[str], llm_seconds=None):
+    """Applies the fused answer (raw JSON, or None when no call was made) to the state"""
+    conv = state.conversation
+    writer = get_stream_writer()
+    # the fused turn is a single node: whatever it replies is final
+    state.reply_final = True
+    if raw is None:
+        if conv.collecting_lead:
+            record_lead_turn()
+            _finish_lead_turn(state)
+        elif plan.template is not None:
+            telemetry.record_event("templated_reply", intent=plan.label)
+            _apply_response(state, plan.template)
+        else:
+            _apply_response(state, response_cache.get(plan.cache_key))
+        writer({"reply_chunk": state.reply})
+        return state
+
+    raw = re.sub(r"```(?:json)?", "", raw).strip()
+    try:
+        answer = json.loads(raw)
+    except Exception:
+        answer = None
+    if not isinstance(answer, dict):
+        # not JSON: treat the whole answer as the reply
+        answer = {"reply": raw}
+
+    label = plan.label
+    if plan.needs_llm:
+        label = answer.get("intent") if answer.get("intent") in INTENT_LABELS else "unknown"
+        remember_llm_intent(state.user_message, label)
+        conv.last_intent = label
+
+    reply = (answer.get("reply") or "").strip()
+    if conv.collecting_lead or label == "high_intent_lead":
+        if not conv.collecting_lead:
+            _local_extraction(state)
+        record_lead_turn(llm_seconds)
+        conv.name = _keep(conv.name, answer.get("name"))
+        conv.email = _keep(conv.email, answer.get("email"))
+        conv.platform = _keep(conv.platform, answer.get("platform"))
+        if not conv.missing_lead_fields() or not reply:
+            # capture (or the deterministic ask) replaces the model's reply
+            _finish_lead_turn(state)
+            writer({"reply_chunk": state.reply})
+            return state
+    elif plan.cache_key is not None and reply:
+        response_cache.put(plan.cache_key, reply)
+
+    writer({"reply_chunk": reply})
+    return _apply_response(state, reply)
+
+def fused_turn_node(state: AgentState):
+    """
+    Whole turn with at most one LLM call: intent (when the local model is unsure),
+    lead fields and the reply come back together as JSON.
+    The reply is emitted as a single chunk on the "custom" stream mode.
+    """
+    plan = _prepare_fused(state)
+    if plan.prompt is None:
+        return _finish_fused(state, plan, None)
+    start = time.perf_counter()
+    response = llm.invoke(plan.prompt, call_site="fused_turn")
+    return _finish_fused(state, plan, response.text or "", time.perf_counter() - start)
+
+async def afused_turn_node(state: AgentState):
+    """Async version of fused_turn_node"""
+    plan = _prepare_fused(state)
+    if plan.prompt is None:
+        return _finish_fused(state, plan, None)
+    start = time.perf_counter()
+    response = await llm.ainvoke(plan.prompt, call_site="fused_turn")
+    return _finish_fused(state, plan, response.text or "", time.perf_counter() - start)
+
 # GRAPH BUILD
 
 graph = StateGraph(AgentState)
 
-graph.add_node("intent", intent_node)
-graph.add_node("rag", rag_node)
-graph.add_node("lead", lead_collection_node)
-graph.add_node("llm", llm_response_node)
+def _node(graph, name, func, afunc):
+    """Registers a node with its async twin, each wrapped in a telemetry span"""
+    graph.add_node(name, RunnableLambda(telemetry.node(name, func), afunc=telemetry.node(name, afunc)))
+
+# app.invoke runs the sync nodes, app.ainvoke / app.astream run their async twins
+_node(graph, "intent", intent_node, aintent_node)
+_node(graph, "template", template_node, atemplate_node)
+_node(graph, "rag", rag_node, arag_node)
+_node(graph, "lead", lead_collection_node, alead_collection_node)
+_node(graph, "llm", llm_response_node, allm_response_node)
 
 graph.set_entry_point("intent")
 
@@ -216,18 +572,57 @@ graph.add_conditional_edges(
     "intent",
     router,
     {
-        "rag": "rag",
+        "template": "template",
         "lead": "lead",
         "llm": "llm",
     },
 )
 
+# template and lead can finish the turn themselves; rag always needs the LLM
+graph.add_conditional_edges("template", after_template, {"rag": "rag", "llm": "llm", END: END})
+graph.add_conditional_edges("lead", finished_or_llm, {"llm": "llm", END: END})
 graph.add_edge("rag", "llm")
-graph.add_edge("lead", "llm")
 graph.add_edge("llm", END)
 
-memory = MemorySaver()
-app = graph.compile(checkpointer=memory)
+# the fused turn is a one-node graph over the same state and checkpoints
+fused_graph = StateGraph(AgentState)
+_node(fused_graph, "turn", fused_turn_node, afused_turn_node)
+fused_graph.set_entry_point("turn")
+fused_graph.add_edge("turn", END)
+
+memory = SqliteCheckpointer(
+    CHECKPOINT_DB, keep_last=CHECKPOINT_KEEP_LAST, idle_ttl_s=CHECKPOINT_IDLE_TTL_S
+)
+graph_app = graph.compile(checkpointer=memory)
+fused_app = fused_graph.compile(checkpointer=memory)
+# threads can move between modes: both share the state schema and checkpointer
+app = fused_app if TURN_MODE == "fused" else graph_app
+
+def stream_turn(state, config):
+    """
+    Runs one turn and yields ("chunk", text) while the reply is generated,
+    then ("final", result) with the final graph state.
+    Replies written by lead_collection_node alone arrive only in the final state.
+    """
+    result = None
+    with telemetry.turn(config["configurable"].get("thread_id")):
+        for mode, payload in app.stream(state, config=config, stream_mode=["custom", "values"]):
+            if mode == "custom" and "reply_chunk" in payload:
+                yield "chunk", payload["reply_chunk"]
+            elif mode == "values":
+                result = payload
+    yield "final", result
+
+async def astream_turn(state, config):
+    """Async version of stream_turn (runs the async node twins via app.astream)"""
+    result = None
+    with telemetry.turn(config["configurable"].get("thread_id")):
+        async for mode, payload in app.astream(state, config=config, stream_mode=["custom", "values"]):
+            if mode == "custom" and "reply_chunk" in payload:
+                yield "chunk", payload["reply_chunk"]
+            elif mode == "values":
+                result = payload
+    yield "final", result
 
 # Demo
 
@@ -243,9 +638,16 @@ if __name__ == "__main__":
 
         s.user_message = user_input
 
-        result = app.invoke(
-            s,
-            config={"configurable": {"thread_id": THREAD_ID}},
-        )
-
-        print("Agent:", result["reply"])
+        start = time.perf_counter()
+        first_token = None
+        print("Agent: ", end="", flush=True)
+        for kind, payload in stream_turn(s, {"configurable": {"thread_id": THREAD_ID}}):
+            if kind == "chunk":
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                print(payload, end="", flush=True)
+            elif first_token is None:
+                print(payload["reply"], end="")
+        total = time.perf_counter() - start
+        ttft = f"{first_token:.2f}s" if first_token is not None else "n/a"
+        print(f"\n[first token {ttft} | total {total:.2f}s]")
@@ -0,0 +1,92 @@
+"""
+Small in-process caches for Inflx AI.
+
+TTLCache is a size- and time-bounded LRU map with hit/miss/eviction counters.
+It is thread-safe so it can be shared between Streamlit sessions or server workers.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from agent import telemetry
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after `ttl` seconds.
+
+    - get() moves a hit to the most-recently-used end
+    - set() evicts the least-recently-used entry once `maxsize` is reached
+    - expired entries are dropped lazily on access and counted as evictions
+    - a named cache also reports its hits and misses to agent/telemetry.py
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0, name: str = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """Returns the cached value or `default`, counting a hit or a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] <= now:
+                del self._data[key]
+                self.evictions += 1
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if self.name is not None:
+            telemetry.record_cache(self.name, entry is not _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def set(self, key, value):
+        """Stores a value, evicting the oldest entries if the cache is full"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry, e.g. when the data behind the cache changed"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        entry = self._data.get(key, _MISSING)
+        return entry is not _MISSING and entry[1] > time.monotonic()
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,332 @@
+"""
+Durable, bounded SQLite checkpointer for the Inflx AI graph.
+
+Replaces the in-process MemorySaver:
+- checkpoints survive restarts and can be shared by workers on one host (WAL mode)
+- ConversationState is stored in a compact positional msgpack form
+- only the latest `keep_last` checkpoints per thread are retained
+- threads idle for longer than `idle_ttl_s` are garbage-collected
+"""
+
+import time
+import sqlite3
+import asyncio
+import threading
+import ormsgpack
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from agent.state_manager import ConversationState
+
+KEEP_LAST = 3
+IDLE_TTL_S = 7 * 24 * 60 * 60
+GC_INTERVAL_S = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    channel_values BLOB NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_last_seen ON threads (last_seen);
+"""
+
+_CONVERSATION_TYPE = "inflx.conv"
+
+class CompactSerializer:
+    """
+    Serializer that stores ConversationState as a positional msgpack list
+    and delegates everything else to LangGraph's JsonPlusSerializer.
+    """
+    def __init__(self):
+        self.fallback = JsonPlusSerializer()
+
+    def dumps_typed(self, obj):
+        if isinstance(obj, ConversationState):
+            return _CONVERSATION_TYPE, ormsgpack.packb(obj.to_compact())
+        return self.fallback.dumps_typed(obj)
+
+    def loads_typed(self, data):
+        type_, payload = data
+        if type_ == _CONVERSATION_TYPE:
+            return ConversationState.from_compact(ormsgpack.unpackb(payload))
+        return self.fallback.loads_typed(data)
+
+class SqliteCheckpointer(BaseCheckpointSaver):
+    """
+    LangGraph checkpoint saver backed by one SQLite file.
+
+    :param path: database file (":memory:" for a throwaway store)
+    :param keep_last: checkpoints retained per thread and namespace
+    :param idle_ttl_s: threads not written for this long are deleted by gc_idle_threads
+    """
+    def __init__(self, path: str, keep_last: int = KEEP_LAST, idle_ttl_s: float = IDLE_TTL_S,
+                 gc_interval_s: float = GC_INTERVAL_S):
+        super().__init__(serde=CompactSerializer())
+        if keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+        self.path = path
+        self.keep_last = keep_last
+        self.idle_ttl_s = idle_ttl_s
+        self.gc_interval_s = gc_interval_s
+        self._last_gc = time.monotonic()
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        """Closes the database connection"""
+        with self._lock:
+            self.conn.close()
+
+    # ---- helpers ----
+    def _pack_values(self, values: dict) -> bytes:
+        return ormsgpack.packb({k: list(self.serde.dumps_typed(v)) for k, v in values.items()})
+
+    def _unpack_values(self, blob: bytes) -> dict:
+        return {k: self.serde.loads_typed(tuple(v)) for k, v in ormsgpack.unpackb(blob).items()}
+
+    def _row_to_tuple(self, row) -> CheckpointTuple:
+        thread_id, ns, checkpoint_id, parent_id, type_, checkpoint, values, metadata = row
+        with self._lock:
+            writes = self.conn.execute(
+                "SELECT task_id, channel, type, value FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+                "ORDER BY task_id, idx",
+                (thread_id, ns, checkpoint_id),
+            ).fetchall()
+        checkpoint_ = self.serde.loads_typed((type_, checkpoint))
+        checkpoint_["channel_values"] = self._unpack_values(values)
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=checkpoint_,
+            metadata=ormsgpack.unpackb(metadata),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id,
+                }}
+                if parent_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, v)))
+                for task_id, channel, t, v in writes
+            ],
+        )
+
+    def _prune_thread(self, thread_id: str, ns: str):
+        """Drops all but the newest keep_last checkpoints (and their writes)"""
+        stale = self.conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, ns, self.keep_last),
+        ).fetchall()
+        if not stale:
+            return
+        ids = [(thread_id, ns, r[0]) for r in stale]
+        self.conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", ids
+        )
+        self.conn.executemany(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", ids
+        )
+
+    # ---- BaseCheckpointSaver API ----
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        columns = ("thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                   "type, checkpoint, channel_values, metadata")
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, ns),
+                ).fetchone()
+        return self._row_to_tuple(row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                 "type, checkpoint, channel_values, metadata FROM checkpoints")
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = ormsgpack.unpackb(row[7])
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._row_to_tuple(row)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        type_, blob = self.serde.dumps_typed(c)
+        meta = ormsgpack.packb(get_checkpoint_metadata(config, metadata), option=ormsgpack.OPT_NON_STR_KEYS)
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                     type_, blob, self._pack_values(values), meta),
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, time.time())
+                )
+                self._prune_thread(thread_id, ns)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        self._maybe_gc()
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, blob, task_path))
+        # special channels (errors, interrupts) keep the latest write, regular ones the first
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            self.conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                for table in ("checkpoints", "writes", "threads"):
+                    self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def prune(self, thread_ids, *, strategy="keep_latest"):
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                self.delete_thread(thread_id)
+                continue
+            with self._lock:
+                namespaces = self.conn.execute(
+                    "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                ).fetchall()
+                keep_last, self.keep_last = self.keep_last, 1
+                try:
+                    for (ns,) in namespaces:
+                        self._prune_thread(thread_id, ns)
+                finally:
+                    self.keep_last = keep_last
+
+    # async API: SQLite calls are short, run them off the event loop thread
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aprune(self, thread_ids, *, strategy="keep_latest"):
+        await asyncio.to_thread(self.prune, thread_ids, strategy=strategy)
+
+    # ---- garbage collection ----
+    def _maybe_gc(self):
+        if time.monotonic() - self._last_gc >= self.gc_interval_s:
+            self._last_gc = time.monotonic()
+            self.gc_idle_threads()
+
+    def gc_idle_threads(self, idle_ttl_s=None) -> int:
+        """Deletes threads not written for idle_ttl_s seconds, returns how many"""
+        cutoff = time.time() - (self.idle_ttl_s if idle_ttl_s is None else idle_ttl_s)
+        with self._lock:
+            idle = [r[0] for r in self.conn.execute(
+                "SELECT thread_id FROM threads WHERE last_seen < ?", (cutoff,)
+            ).fetchall()]
+        for thread_id in idle:
+            self.delete_thread(thread_id)
+        return len(idle)
+
+    def stats(self) -> dict:
+        """Row counts, handy for checking retention"""
+        with self._lock:
+            return {
+                table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("checkpoints", "writes", "threads")
+            }
@@ -0,0 +1,119 @@
+"""
+Local stand-in for the CRM webhook the lead outbox delivers to.
+
+Accepts POST {"leads": [...]} and applies each lead once per idempotency key
+and version: a newer version (details updated after the first delivery)
+replaces the stored lead, a re-delivery is counted as a duplicate. Latency
+and a failure rate (HTTP 503) can be injected to exercise the outbox's
+batching and retry.
+
+Run it standalone and point the agent at it:
+    python -m agent.crm_stub [port]
+    INFLX_CRM_WEBHOOK=http://127.0.0.1:8787/leads streamlit run app.py
+"""
+
+import sys
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubCRM:
+    """Threaded HTTP receiver that records leads by idempotency key"""
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_s: float = 0.0,
+                 fail_rate: float = 0.0, seed: int = 0):
+        self.latency_s = latency_s
+        self.fail_rate = fail_rate
+        self.leads = {}
+        # (idempotency_key, version) of every lead written, in arrival order
+        self.writes = []
+        self.requests = 0
+        self.duplicates = 0
+        self.failures_injected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/leads"
+
+    def _handler(self):
+        crm = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with crm._lock:
+                    crm.requests += 1
+                    fail = crm._random.random() < crm.fail_rate
+                    if fail:
+                        crm.failures_injected += 1
+                if crm.latency_s:
+                    time.sleep(crm.latency_s)
+                if fail:
+                    self._reply(503, {"error": "injected failure"})
+                    return
+                try:
+                    leads = json.loads(body)["leads"]
+                except (ValueError, KeyError, TypeError):
+                    self._reply(400, {"error": "expected {\"leads\": [...]}"})
+                    return
+                with crm._lock:
+                    for lead in leads:
+                        stored = crm.leads.get(lead["idempotency_key"])
+                        if stored is not None and stored.get("version", 0) >= lead.get("version", 0):
+                            crm.duplicates += 1
+                        else:
+                            crm.leads[lead["idempotency_key"]] = lead
+                            crm.writes.append((lead["idempotency_key"], lead.get("version", 0)))
+                self._reply(200, {"accepted": len(leads)})
+
+            def _reply(self, code: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        """Serves in a background thread; returns the webhook URL"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="crm-stub", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """Shuts the server down"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        """Requests seen, unique leads applied and re-deliveries absorbed"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "unique_leads": len(self.leads),
+                "writes": len(self.writes),
+                "duplicates": self.duplicates,
+                "failures_injected": self.failures_injected,
+            }
+
+if __name__ == "__main__":
+    crm = StubCRM(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8787)
+    print(f"Stub CRM listening on {crm.start()}")
+    try:
+        while True:
+            time.sleep(10)
+            print(crm.stats())
+    except KeyboardInterrupt:
+        crm.stop()
@@ -0,0 +1,71 @@
+"""
+Hedged-request policies for MultiLLM.
+
+With hedging on, a call site whose policy is enabled starts the same prompt on
+the secondary provider once the primary has been silent for `delay` seconds,
+takes whichever answers first and cancels the other.
+
+The delay is the primary's observed latency percentile (p90 by default),
+clamped to [min_delay_s, max_delay_s]; default_delay_s is used until there is data.
+Hedging is opt-in per deployment (INFLX_LLM_HEDGING=1) and per call site.
+"""
+
+import os
+import threading
+from typing import Optional
+from pydantic import BaseModel
+
+HEDGING_ENABLED = os.getenv("INFLX_LLM_HEDGING", "0") == "1"
+
+class HedgePolicy(BaseModel):
+    """When to fire a hedge for one call site"""
+    enabled: bool = False
+    percentile: float = 90
+    min_delay_s: float = 0.3
+    max_delay_s: float = 5.0
+    default_delay_s: float = 2.0
+
+    def delay_for(self, health) -> float:
+        """Seconds to wait on the primary before hedging"""
+        observed = health.latency_percentile(self.percentile)
+        if observed is None:
+            return self.default_delay_s
+        return min(max(observed, self.min_delay_s), self.max_delay_s)
+
+# the intent fallback prompt is tiny, so a duplicate costs almost nothing;
+# the long reply prompt is not hedged by default
+HEDGE_POLICIES = {
+    "intent_fallback": HedgePolicy(enabled=True, default_delay_s=1.0),
+    "lead_extraction": HedgePolicy(enabled=True),
+    "response": HedgePolicy(enabled=False),
+}
+
+def policy_for(call_site: Optional[str]) -> Optional[HedgePolicy]:
+    """The active policy for a call site, None if it should not be hedged"""
+    if not HEDGING_ENABLED or call_site is None:
+        return None
+    policy = HEDGE_POLICIES.get(call_site)
+    if policy is None or not policy.enabled:
+        return None
+    return policy
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+def record(call_site: str, hedged: bool, hedge_won: bool = False):
+    """Counts one hedge-eligible call"""
+    with _stats_lock:
+        s = _stats.setdefault(call_site, {"calls": 0, "hedges_fired": 0, "hedge_wins": 0})
+        s["calls"] += 1
+        s["hedges_fired"] += int(hedged)
+        s["hedge_wins"] += int(hedge_won)
+
+def hedge_stats() -> dict:
+    """Per call site: eligible calls, hedges fired, and how often the hedge answered first"""
+    with _stats_lock:
+        out = {}
+        for site, s in _stats.items():
+            out[site] = dict(s)
+            out[site]["fire_rate"] = s["hedges_fired"] / s["calls"] if s["calls"] else 0.0
+            out[site]["win_rate"] = s["hedge_wins"] / s["hedges_fired"] if s["hedges_fired"] else 0.0
+        return out
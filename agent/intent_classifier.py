@@ -10,40 +10,353 @@ Uses:
 1. Local keyword/TF-IDF classifier (fast, cheap)
 2. Post-processing rules for high-intent overrides
 3. LLM fallback (Gemini/Gemma) for low-confidence or ambiguous messages
+
+With INFLX_INTENT_LEARNING=1 the labels the LLM gives are kept as training
+examples and the local model is refit on them every INFLX_INTENT_RETRAIN_EVERY
+new ones, so similar messages stop needing the LLM. fallback_stats() shows LLM
+fallbacks per 1k messages over time.
+
+A message goes to the LLM when its confidence is below the threshold of its
+predicted label. Per-label thresholds calibrated on held-out data are loaded
+from models/intent_thresholds.json (python -m models.intent_eval --save);
+labels without one, a missing file, or a file calibrated for another model
+version (e.g. after a retrain) use THRESHOLD.
 """
+import os
+import re
+import time
 import string
-from models.intent import classify_intent_local
-from agent.state_manager import MultiLLM
+import threading
+from collections import deque
+from typing import List
+from models.intent import classify_intent_local, classify_intents_local, model_version, retrain
+from models.intent_feedback import get_feedback_store
+from models.intent_eval import load_thresholds
+from agent.state_manager import get_llm
+from agent.cache import TTLCache
+from agent import prompt_budget
+from agent import telemetry
 
 THRESHOLD = 0.40
-llm = MultiLLM()
+INTENT_LABELS = ("greeting", "product_inquiry", "high_intent_lead")
+llm = get_llm()
+
+# Decisions are cached on the cleaned text. LLM-decided labels are the expensive
+# ones, so they live in their own cache with a longer TTL.
+local_cache = TTLCache(maxsize=4096, ttl=15 * 60, name="intent_local")
+llm_cache = TTLCache(maxsize=4096, ttl=24 * 60 * 60, name="intent_llm")
+_cached_model_version = None
+
+# Off by default: a stub LLM must not teach the model its canned answers.
+# server.py turns it on.
+LEARNING = os.getenv("INFLX_INTENT_LEARNING", "0") == "1"
+RETRAIN_EVERY = int(os.getenv("INFLX_INTENT_RETRAIN_EVERY", "25"))
+FALLBACK_WINDOW = 1000
+
+_PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
 
 def clean_text(text: str):
     """Lowers the text, removes extra whitespaces and punctuations"""
-    text = text.lower().strip()
-    text = text.translate(str.maketrans("", "", string.punctuation))
-    return text
+    return text.lower().strip().translate(_PUNCTUATION_TABLE)
+
+def _intent_prompt(user_message: str) -> str:
+    user_message = prompt_budget.clip_text(user_message, prompt_budget.BUDGETS["intent_fallback"].message)
+    return f"""
+    You are an intent classification model for a SaaS support assistant.
+    Classify the user's intent into exactly one of these:
+    - greeting
+    - product_inquiry (general questions about product features, pricing, plans, etc.)
+    - high_intent_lead (showing interest in signing up, purchasing, or requesting account-related actions)
+    Respond ONLY with the one-word label.
+    User message: "{user_message}"
+    """
 
 def classify_with_gemini(user_message: str) -> str:
     """
     Fallback function.
     Uses Gemini model to classify user message in case of ambiguity into one of three intents.
     """
+    response = llm.invoke(_intent_prompt(user_message), call_site="intent_fallback")
+    return response.text.strip().lower() if response.text else "unknown"
+
+async def aclassify_with_gemini(user_message: str) -> str:
+    """Async version of classify_with_gemini"""
+    response = await llm.ainvoke(_intent_prompt(user_message), call_site="intent_fallback")
+    return response.text.strip().lower() if response.text else "unknown"
+
+def classify_batch_with_gemini(user_messages: List[str]) -> List[str]:
+    """
+    Batched fallback.
+    Classifies several messages with a single LLM call using a numbered prompt.
+    Items the LLM does not answer come back as "unknown", same as classify_with_gemini.
+    """
+    if not user_messages:
+        return []
+    numbered = "\n".join(f'{i}. "{msg}"' for i, msg in enumerate(user_messages, start=1))
     prompt = f"""
     You are an intent classification model for a SaaS support assistant.
-    Classify the user's intent into exactly one of these:
+    Classify the intent of EACH numbered user message into exactly one of these:
     - greeting
     - product_inquiry (general questions about product features, pricing, plans, etc.)
     - high_intent_lead (showing interest in signing up, purchasing, or requesting account-related actions)
-    Respond ONLY with the one-word label.
-    User message: "{user_message}"
+    Respond ONLY with one line per message in the form "<number>. <label>", nothing else.
+    User messages:
+    {numbered}
     """
-    # response = client.models.generate_content(
-    #     model="gemini-2.5-flash",
-    #     contents=prompt
-    # )
-    response = llm.invoke(prompt)
-    return response.text.strip().lower() if response.text else "unknown"
+    response = llm.invoke(prompt, call_site="intent_fallback")
+    labels = ["unknown"] * len(user_messages)
+    for line in (response.text or "").splitlines():
+        match = re.match(r"^\s*(\d+)\s*[.):\-]\s*([a-z_]+)", line.strip().lower())
+        if not match:
+            continue
+        idx = int(match.group(1)) - 1
+        if 0 <= idx < len(labels):
+            labels[idx] = match.group(2)
+    return labels
+
+def _sync_cache_with_model(keep_llm_labels: bool = False):
+    """Drops cached decisions if the local model changed since they were stored"""
+    global _cached_model_version
+    version = model_version()
+    if version != _cached_model_version:
+        if _cached_model_version is not None:
+            local_cache.clear()
+            if not keep_llm_labels:
+                llm_cache.clear()
+        _cached_model_version = version
+
+def _cached_label(text: str):
+    """Looks up a previous decision for the cleaned text, LLM decisions first"""
+    label = llm_cache.get(text)
+    if label is None:
+        label = local_cache.get(text)
+    return label
+
+# ---- thresholds ----
+_thresholds = None
+_thresholds_lock = threading.Lock()
+_stale_warned_for = None
+
+def _load_thresholds() -> dict:
+    """The saved thresholds file as loaded, whichever model it was calibrated for"""
+    global _thresholds
+    if _thresholds is None:
+        with _thresholds_lock:
+            if _thresholds is None:
+                _thresholds = load_thresholds() or {}
+    return _thresholds
+
+def get_thresholds() -> dict:
+    """
+    The saved per-label thresholds, loaded on first use ({} if there are none).
+    They only hold for the model they were calibrated on: after a retrain
+    (retrain_from_feedback) they are ignored until models.intent_eval is re-run.
+    """
+    global _stale_warned_for
+    saved = _load_thresholds()
+    if not saved:
+        return saved
+    version = model_version()
+    if saved.get("model_version") == version:
+        return saved
+    if _stale_warned_for != version:
+        _stale_warned_for = version
+        print(f"[intent] thresholds were calibrated for model {(saved.get('model_version') or '?')[:12]}, "
+              f"not {version[:12]}; using {THRESHOLD} until they are recalibrated")
+    return {}
+
+def set_thresholds(saved):
+    """Replaces the per-label thresholds at runtime; None reloads them from disk on next use"""
+    global _thresholds
+    with _thresholds_lock:
+        _thresholds = saved
+
+def threshold_for(label: str) -> float:
+    """Confidence below which a message predicted as label goes to the LLM"""
+    saved = get_thresholds()
+    return saved.get("thresholds", {}).get(label, saved.get("default", THRESHOLD))
+
+def threshold_stats() -> dict:
+    loaded = _load_thresholds()
+    return {
+        "thresholds": {label: threshold_for(label) for label in INTENT_LABELS},
+        "calibrated": bool(get_thresholds()),
+        "calibrated_for_model": (loaded.get("model_version") or "")[:12] or None,
+        "target_accuracy": loaded.get("target_accuracy"),
+    }
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters of both intent caches"""
+    return {"local": local_cache.stats(), "llm": llm_cache.stats()}
+
+# ---- fallback rate ----
+class FallbackRate:
+    """LLM fallbacks per 1k classified messages, overall and per window of `window` messages"""
+    def __init__(self, window: int = FALLBACK_WINDOW, history: int = 48):
+        self.window = window
+        self.messages = 0
+        self.fallbacks = 0
+        self.windows = deque(maxlen=history)
+        self._window_messages = 0
+        self._window_fallbacks = 0
+        self._lock = threading.Lock()
+
+    def record(self, messages: int, fallbacks: int):
+        with self._lock:
+            self.messages += messages
+            self.fallbacks += fallbacks
+            self._window_messages += messages
+            self._window_fallbacks += fallbacks
+            if self._window_messages >= self.window:
+                self.windows.append({
+                    "ended_at": time.time(),
+                    "messages": self._window_messages,
+                    "llm_per_1k": 1000 * self._window_fallbacks / self._window_messages,
+                    "model_version": (_cached_model_version or "")[:12],
+                })
+                self._window_messages = self._window_fallbacks = 0
+        telemetry.record_intents(messages, fallbacks)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "messages": self.messages,
+                "llm_fallbacks": self.fallbacks,
+                "llm_per_1k": 1000 * self.fallbacks / self.messages if self.messages else 0.0,
+                "windows": list(self.windows),
+            }
+
+fallback_rate = FallbackRate()
+
+def classify_intents(messages: List[str]) -> List[str]:
+    """
+    Batch version of classify_intent.
+
+    :param messages: Messages to be classified
+    :type messages: list[str]
+    :return: Classified intents, in input order
+    :rtype: list[str]
+
+    The whole batch is scored locally in one pass; every message below the
+    threshold of its label (threshold_for) is then sent to the LLM together in a single numbered prompt.
+    """
+    _sync_cache_with_model()
+    texts = [clean_text(m) for m in messages]
+    labels = [_cached_label(t) for t in texts]
+
+    pending = [i for i, label in enumerate(labels) if label is None]
+    results = classify_intents_local([texts[i] for i in pending])
+    low_conf = []
+    for i, (label, confidence) in zip(pending, results):
+        labels[i] = label
+        if confidence < threshold_for(label):
+            low_conf.append(i)
+        else:
+            local_cache.set(texts[i], label)
+
+    fallback_rate.record(len(messages), len(low_conf))
+    if low_conf:
+        llm_labels = classify_batch_with_gemini([texts[i] for i in low_conf])
+        for i, label in zip(low_conf, llm_labels):
+            labels[i] = label
+            _remember_llm_label(texts[i], label)
+    return labels
+
+def _classify_local(text: str):
+    """
+    Cache lookup + local model.
+    Returns (label, needs_llm); label is final unless needs_llm is True.
+    """
+    _sync_cache_with_model()
+    label = _cached_label(text)
+    if label is not None:
+        fallback_rate.record(1, 0)
+        return label, False
+
+    label, confidence = classify_intent_local(text)
+    if confidence < threshold_for(label):
+        fallback_rate.record(1, 1)
+        return label, True
+    local_cache.set(text, label)
+    fallback_rate.record(1, 0)
+    return label, False
+
+def _remember_llm_label(text: str, label: str):
+    if label != "unknown":
+        llm_cache.set(text, label)
+    if LEARNING and label in INTENT_LABELS:
+        _learn(text, label)
+
+# ---- learning from LLM fallbacks ----
+_learning = {"retrains": 0, "trained_examples": 0, "trained_at_added": 0, "last_retrain_s": None}
+_retrain_lock = threading.Lock()
+
+def set_learning(enabled: bool):
+    """Turns learning from LLM fallbacks on or off at runtime"""
+    global LEARNING
+    LEARNING = enabled
+
+def retrain_from_feedback() -> bool:
+    """
+    Refits the local model on training_data plus all stored feedback and swaps it in.
+    LLM-decided labels stay cached; local decisions are dropped.
+    :return: False if there is nothing to learn or another retrain is running
+    """
+    if not _retrain_lock.acquire(blocking=False):
+        return False
+    try:
+        store = get_feedback_store()
+        store.reload()
+        examples = store.examples()
+        if not examples:
+            return False
+        added = store.added
+        start = time.perf_counter()
+        retrain(examples)
+        _sync_cache_with_model(keep_llm_labels=True)
+        _learning.update(
+            retrains=_learning["retrains"] + 1,
+            trained_examples=len(examples),
+            trained_at_added=added,
+            last_retrain_s=time.perf_counter() - start,
+        )
+        return True
+    finally:
+        _retrain_lock.release()
+
+def _learn(text: str, label: str):
+    """Stores an LLM label; starts a background retrain every RETRAIN_EVERY new ones"""
+    store = get_feedback_store()
+    if not store.add(text, label):
+        return
+    if store.added - _learning["trained_at_added"] >= RETRAIN_EVERY and not _retrain_lock.locked():
+        threading.Thread(target=retrain_from_feedback, name="intent-retrain", daemon=True).start()
+
+def fallback_stats() -> dict:
+    """LLM fallbacks per 1k messages over time, the thresholds in use and the state of the learning loop"""
+    return {
+        **fallback_rate.stats(),
+        **threshold_stats(),
+        "learning": {
+            "enabled": LEARNING,
+            "retrain_every": RETRAIN_EVERY,
+            "new_examples": get_feedback_store().added,
+            "model_version": (_cached_model_version or "")[:12],
+            **_learning,
+        },
+    }
+
+def classify_intent_locally(user_message: str):
+    """
+    classify_intent without the LLM fallback, for callers that fold the fallback
+    into a bigger LLM call (the fused turn in agent.py).
+    :return: (label, needs_llm); label is only a guess when needs_llm is True
+    """
+    return _classify_local(clean_text(user_message))
+
+def remember_llm_intent(user_message: str, label: str):
+    """Caches a label the LLM decided elsewhere, like classify_intent does"""
+    _remember_llm_label(clean_text(user_message), label)
 
 def classify_intent(user_message: str) -> str:
     """
@@ -57,11 +370,22 @@ def classify_intent(user_message: str) -> str:
     Uses keyword matching to classify the user message into one of three intents:
     - "greeting"; "high_intent_lead"; "product_inquiry"
     If none of the keywords matches, fallbacks to gemini-based detection.
+    Decisions are cached per cleaned text, see local_cache and llm_cache.
     """
     text = clean_text(user_message)
-    label, confidence = classify_intent_local(text)
-    if confidence < THRESHOLD:
+    label, needs_llm = _classify_local(text)
+    if needs_llm:
         label = classify_with_gemini(text)
+        _remember_llm_label(text, label)
+    return label
+
+async def aclassify_intent(user_message: str) -> str:
+    """Async version of classify_intent; only the LLM fallback is awaited"""
+    text = clean_text(user_message)
+    label, needs_llm = _classify_local(text)
+    if needs_llm:
+        label = await aclassify_with_gemini(text)
+        _remember_llm_label(text, label)
     return label
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+"""
+Deterministic lead-field extraction for Inflx AI.
+
+A fast local tier in front of the LLM extraction in lead_collection_node:
+- email: regex
+- platform: gazetteer of known platforms and their aliases; the ones that are
+  also ordinary words ("website", "blog", "yt") only as the whole answer
+- name: only explicit forms, "my name is X" or "name: X". Looser ones ("call
+  me", "I'm", "this is") hit ordinary chat ("call me back", "I'm Super
+  excited"), and a local name is never overwritten later, so anything else is
+  left to the LLM
+
+The LLM is only asked for fields this tier could not find. extraction_stats()
+reports how many lead turns finished without any LLM call and the estimated
+latency that saved.
+"""
+
+import re
+import threading
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+# alias (lowercase, as typed) -> canonical platform name
+PLATFORM_ALIASES = {
+    "youtube": "YouTube",
+    "you tube": "YouTube",
+    "instagram": "Instagram",
+    "insta": "Instagram",
+    "linkedin": "LinkedIn",
+    "linked in": "LinkedIn",
+    "whatsapp": "WhatsApp",
+    "whats app": "WhatsApp",
+    "tiktok": "TikTok",
+    "tik tok": "TikTok",
+    "facebook": "Facebook",
+    "twitter": "Twitter",
+    "twitch": "Twitch",
+}
+# aliases that are also ordinary words or chat ("your website says", "I read
+# the blog"): only taken when they are the whole answer ("yt", "my website")
+SHORT_ANSWER_ALIASES = {
+    "yt": "YouTube",
+    "ig": "Instagram",
+    "fb": "Facebook",
+    "website": "Website",
+    "blog": "Website",
+}
+_PLATFORM_RE = re.compile(
+    r"\b(" + "|".join(re.escape(a) for a in sorted(PLATFORM_ALIASES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_SHORT_ANSWER_RE = re.compile(
+    r"\s*(?:(?:for|on|my|our|the|a|its|it's)\s+)*(" + "|".join(re.escape(a) for a in SHORT_ANSWER_ALIASES)
+    + r")(?:\s+(?:channel|page|account|site))?\s*[.!]*\s*",
+    re.IGNORECASE,
+)
+
+_NAME_WORD = r"[A-Za-z][A-Za-z'\-]+"
+# whatever follows is a name, whatever the casing; "name:" only as a label at
+# the start of the message or a clause, not "plan name: pro"
+_EXPLICIT_NAME_RE = re.compile(
+    rf"(?:\bmy name is|\bmy name's|(?:^|[.,;!?\n])\s*name\s*:)\s*({_NAME_WORD}(?:\s+{_NAME_WORD})?)",
+    re.IGNORECASE,
+)
+# words that can follow "my name is" but are never a name
+_NOT_NAMES = {
+    "a", "an", "the", "not", "ready", "interested", "looking", "considering", "going",
+    "here", "from", "on", "in", "good", "fine", "okay", "ok", "sure", "just", "also",
+    "new", "using", "trying", "thinking", "planning", "excited", "done", "and",
+}
+
+def extract_email(text: str):
+    """First email address in the text, or None"""
+    match = EMAIL_RE.search(text)
+    return match.group(0) if match else None
+
+def extract_platform(text: str):
+    """Canonical platform name for the first known platform mentioned, or None"""
+    match = _PLATFORM_RE.search(text)
+    if match:
+        return PLATFORM_ALIASES[match.group(1).lower()]
+    match = _SHORT_ANSWER_RE.fullmatch(text)
+    return SHORT_ANSWER_ALIASES[match.group(1).lower()] if match else None
+
+def extract_name(text: str):
+    """Name from an explicit "my name is X" / "name: X", or None"""
+    text = EMAIL_RE.sub(" ", text)
+    match = _EXPLICIT_NAME_RE.search(text)
+    if not match:
+        return None
+    words = []
+    for word in match.group(1).split():
+        lowered = word.lower()
+        if lowered in _NOT_NAMES or lowered in PLATFORM_ALIASES or lowered in SHORT_ANSWER_ALIASES:
+            break
+        words.append(word)
+    if not words:
+        return None
+    return " ".join(w[:1].upper() + w[1:] for w in words)
+
+def extract_lead_fields(texts) -> dict:
+    """
+    Runs the local tier over user messages, latest first.
+    :return: {"name", "email", "platform"}, None where nothing was found
+    """
+    found = {"name": None, "email": None, "platform": None}
+    extractors = {"name": extract_name, "email": extract_email, "platform": extract_platform}
+    for text in reversed(list(texts)):
+        for field, extractor in extractors.items():
+            if found[field] is None:
+                found[field] = extractor(text)
+        if all(found.values()):
+            break
+    return found
+
+_stats = {"lead_turns": 0, "llm_free_turns": 0, "llm_calls": 0, "llm_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+def record_turn(llm_seconds=None):
+    """Counts one lead turn; llm_seconds is None when the LLM was skipped"""
+    with _stats_lock:
+        _stats["lead_turns"] += 1
+        if llm_seconds is None:
+            _stats["llm_free_turns"] += 1
+        else:
+            _stats["llm_calls"] += 1
+            _stats["llm_seconds"] += llm_seconds
+
+def extraction_stats() -> dict:
+    """Share of lead turns with zero LLM calls and the latency that saved"""
+    with _stats_lock:
+        s = dict(_stats)
+    mean_llm = s["llm_seconds"] / s["llm_calls"] if s["llm_calls"] else 0.0
+    s["llm_free_fraction"] = s["llm_free_turns"] / s["lead_turns"] if s["lead_turns"] else 0.0
+    s["mean_llm_extraction_s"] = mean_llm
+    s["estimated_latency_saved_s"] = s["llm_free_turns"] * mean_llm
+    return s
+
+if __name__ == "__main__":
+    samples = [
+        "I am Jaspreet, i think it might be good for my linkedin",
+        "my name is jaspreet singh and my email is js@example.com",
+        "I'm interested, use it for my youtube channel",
+        "yt",
+        "your website says pro has 4k",
+        "name: Sam Lee. insta. sam@mail.io",
+        "please call me back tomorrow",
+    ]
+    for sample in samples:
+        print(sample, "=>", extract_lead_fields([sample]))
@@ -0,0 +1,325 @@
+"""
+Durable lead outbox for Inflx AI.
+
+mock_lead_capture() used to hand the lead to the CRM inside the user's turn.
+Now the turn only pays for an enqueue into a local SQLite outbox; a background
+flusher delivers pending leads in batches:
+- one row per email (dedup): re-capturing a pending lead updates it in place
+  and bumps its version; a batch only marks the versions it sent, so an
+  update that arrives while the lead is in flight stays pending and goes out
+  in the next batch
+- every lead carries an idempotency key derived from the email, so a batch that
+  is re-sent after a crash or timeout is safe for the receiver to apply twice
+- failed batches are retried with exponential backoff and jitter; leads that
+  fail max_attempts times, or are rejected outright (4xx), are marked dead
+"""
+
+import json
+import time
+import contextlib
+import random
+import sqlite3
+import hashlib
+import threading
+import urllib.error
+import urllib.request
+
+BATCH_SIZE = 100
+FLUSH_INTERVAL_S = 1.0
+MAX_ATTEMPTS = 8
+BASE_BACKOFF_S = 0.5
+MAX_BACKOFF_S = 60.0
+SENT_RETENTION_S = 7 * 24 * 60 * 60
+HTTP_TIMEOUT_S = 10.0
+
+PENDING = "pending"
+SENT = "sent"
+DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    idempotency_key TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    name TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS leads_due ON leads (status, next_attempt_at);
+"""
+
+class DeliveryError(Exception):
+    """A batch could not be delivered; retryable=False means the receiver rejected it"""
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+def normalize_email(email: str) -> str:
+    """Dedup key form of an email address"""
+    return email.strip().lower()
+
+def idempotency_key(email: str) -> str:
+    """Stable per-lead key: the same email always maps to the same key"""
+    return hashlib.sha256(f"lead:{normalize_email(email)}".encode("utf-8")).hexdigest()[:32]
+
+def batch_key(leads) -> str:
+    """Idempotency-Key header for a batch, stable for the same set of lead versions"""
+    keys = sorted(f'{lead["idempotency_key"]}:{lead.get("version", 0)}' for lead in leads)
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()[:32]
+
+def http_sender(url: str, timeout_s: float = HTTP_TIMEOUT_S):
+    """
+    Sender that POSTs {"leads": [...]} as JSON to a CRM webhook.
+    429 and 5xx are retried, any other 4xx marks the batch dead.
+    """
+    def send(leads):
+        body = json.dumps({"leads": leads}).encode("utf-8")
+        request = urllib.request.Request(
+            url,
+            data=body,
+            method="POST",
+            headers={"Content-Type": "application/json", "Idempotency-Key": batch_key(leads)},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout_s) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            retryable = e.code == 429 or e.code >= 500
+            raise DeliveryError(f"HTTP {e.code} from CRM", retryable=retryable) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise DeliveryError(f"CRM unreachable: {e}") from e
+    return send
+
+def print_sender(leads):
+    """Sender used when no CRM webhook is configured: prints what would be sent"""
+    for lead in leads:
+        print({"status": "success", "name": lead["name"], "email": lead["email"], "platform": lead["platform"]})
+
+class LeadOutbox:
+    """SQLite-backed outbox with a background batch flusher"""
+    def __init__(self, path: str, sender=print_sender, batch_size: int = BATCH_SIZE,
+                 flush_interval_s: float = FLUSH_INTERVAL_S, max_attempts: int = MAX_ATTEMPTS,
+                 base_backoff_s: float = BASE_BACKOFF_S, max_backoff_s: float = MAX_BACKOFF_S):
+        self.path = path
+        self.sender = sender
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_attempts = max_attempts
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._lock = threading.RLock()
+        # one flush at a time, so a lead is never in two in-flight batches
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+        self.counters = {
+            "enqueued": 0, "merged": 0, "duplicates": 0,
+            "batches_sent": 0, "leads_sent": 0, "batch_failures": 0,
+            "leads_dead": 0, "flush_seconds": 0.0,
+        }
+        self.last_error = None
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """BEGIN ... COMMIT, rolled back on any error so the connection is never left mid-transaction"""
+        self.conn.execute("BEGIN")
+        try:
+            yield self.conn
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    # ---- producer side ----
+    def enqueue(self, name: str, email: str, platform: str) -> dict:
+        """
+        Records a lead for delivery; this is all the user's turn pays for.
+        :return: {"status": "queued" | "duplicate", "idempotency_key": ...}
+        "duplicate" means a lead with this email was already delivered.
+        """
+        key = idempotency_key(email)
+        now = time.time()
+        with self._lock:
+            existing = self.conn.execute(
+                "SELECT status FROM leads WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+            if existing is not None and existing[0] == SENT:
+                self.counters["duplicates"] += 1
+                return {"status": "duplicate", "idempotency_key": key}
+            # a pending lead takes the latest details; a dead one gets another chance
+            self.conn.execute(
+                """INSERT INTO leads (idempotency_key, email, name, platform, status, attempts,
+                                      next_attempt_at, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+                   ON CONFLICT (idempotency_key) DO UPDATE SET
+                       name = excluded.name, platform = excluded.platform, status = excluded.status,
+                       attempts = 0, next_attempt_at = excluded.next_attempt_at,
+                       updated_at = excluded.updated_at, last_error = NULL,
+                       version = leads.version + 1""",
+                (key, normalize_email(email), name, platform, PENDING, now, now, now),
+            )
+            self.counters["merged" if existing is not None else "enqueued"] += 1
+            pending = self._count(PENDING)
+        if pending >= self.batch_size:
+            self._wake.set()
+        return {"status": "queued", "idempotency_key": key}
+
+    # ---- delivery ----
+    def _due_batch(self, now: float) -> list:
+        with self._lock:
+            rows = self.conn.execute(
+                """SELECT idempotency_key, name, email, platform, version, attempts FROM leads
+                   WHERE status = ? AND next_attempt_at <= ?
+                   ORDER BY next_attempt_at LIMIT ?""",
+                (PENDING, now, self.batch_size),
+            ).fetchall()
+        return [
+            {"idempotency_key": k, "name": n, "email": e, "platform": p, "version": v, "attempts": a}
+            for k, n, e, p, v, a in rows
+        ]
+
+    def _backoff(self, attempts: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_backoff_s, self.base_backoff_s * 2 ** attempts))
+
+    def _mark_sent(self, batch):
+        """Marks the sent versions; a lead updated while in flight stays pending"""
+        now = time.time()
+        with self._lock:
+            with self._transaction() as conn:
+                marked = conn.executemany(
+                    "UPDATE leads SET status = ?, attempts = attempts + 1, updated_at = ?, last_error = NULL "
+                    "WHERE idempotency_key = ? AND version = ?",
+                    [(SENT, now, lead["idempotency_key"], lead["version"]) for lead in batch],
+                ).rowcount
+            self.counters["batches_sent"] += 1
+            self.counters["leads_sent"] += marked
+        return marked
+
+    def _mark_failed(self, batch, error: DeliveryError):
+        now = time.time()
+        rows = []
+        dead = 0
+        for lead in batch:
+            attempts = lead["attempts"] + 1
+            if not error.retryable or attempts >= self.max_attempts:
+                rows.append((DEAD, attempts, now, now, str(error), lead["idempotency_key"], lead["version"]))
+                dead += 1
+            else:
+                rows.append((PENDING, attempts, now + self._backoff(attempts), now, str(error),
+                             lead["idempotency_key"], lead["version"]))
+        with self._lock:
+            # an update that arrived in flight is a fresh lead: it keeps its own attempts
+            with self._transaction() as conn:
+                conn.executemany(
+                    "UPDATE leads SET status = ?, attempts = ?, next_attempt_at = ?, updated_at = ?, "
+                    "last_error = ? WHERE idempotency_key = ? AND version = ? AND status = 'pending'",
+                    rows,
+                )
+            self.counters["batch_failures"] += 1
+            self.counters["leads_dead"] += dead
+            self.last_error = str(error)
+
+    def flush_once(self) -> int:
+        """Sends every batch that is due right now; returns how many leads were delivered in their latest version"""
+        delivered = 0
+        with self._flush_lock:
+            start = time.perf_counter()
+            while True:
+                batch = self._due_batch(time.time())
+                if not batch:
+                    break
+                payload = [{k: v for k, v in lead.items() if k != "attempts"} for lead in batch]
+                try:
+                    self.sender(payload)
+                except DeliveryError as e:
+                    self._mark_failed(batch, e)
+                    break
+                except Exception as e:
+                    self._mark_failed(batch, DeliveryError(f"{type(e).__name__}: {e}"))
+                    break
+                delivered += self._mark_sent(batch)
+            self.counters["flush_seconds"] += time.perf_counter() - start
+        self._maybe_purge()
+        return delivered
+
+    def drain(self, timeout_s: float = 30.0) -> bool:
+        """Flushes until nothing is pending (waiting out backoffs); False on timeout"""
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            self.flush_once()
+            if self._count(PENDING) == 0:
+                return True
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT MIN(next_attempt_at) FROM leads WHERE status = ?", (PENDING,)
+                ).fetchone()
+            wait = max(0.0, (row[0] or 0) - time.time())
+            time.sleep(min(wait, max(0.0, deadline - time.monotonic()), 1.0) or 0.001)
+        return self._count(PENDING) == 0
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._last_purge < 60.0:
+            return
+        self._last_purge = now
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM leads WHERE status = ? AND updated_at < ?", (SENT, now - SENT_RETENTION_S)
+            )
+
+    # ---- background flusher ----
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush_once()
+            except sqlite3.Error as e:
+                self.last_error = f"outbox: {e}"
+
+    def start(self):
+        """Starts the background flusher (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="lead-outbox", daemon=True)
+                self._thread.start()
+
+    def close(self, flush: bool = True):
+        """Stops the flusher, makes one last delivery attempt and closes the database"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_s + HTTP_TIMEOUT_S)
+        if flush:
+            self.flush_once()
+        with self._lock:
+            self.conn.close()
+
+    # ---- stats ----
+    def _count(self, status: str) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM leads WHERE status = ?", (status,)).fetchone()[0]
+
+    def stats(self) -> dict:
+        """Outbox depth by status, delivery counters and flush throughput"""
+        with self._lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM leads GROUP BY status").fetchall())
+            s = dict(self.counters)
+        for status in (PENDING, SENT, DEAD):
+            s[status] = counts.get(status, 0)
+        s["leads_per_s"] = s["leads_sent"] / s["flush_seconds"] if s["flush_seconds"] else 0.0
+        s["last_error"] = self.last_error
+        return s
@@ -0,0 +1,163 @@
+"""
+Process-wide registry of LLM provider clients.
+
+- clients are built on first use, not at import: importing the agent needs no
+  network and no API keys, and the provider SDKs are only imported when needed
+- every provider shares one sync and one async httpx client (keep-alive
+  connection pools), so all call sites reuse the same warm connections
+- asyncio connections belong to one event loop, so async pools and the
+  provider clients using them are kept per loop
+- prewarm() / aprewarm() build the clients and open their connections
+  before the first turn;
+  server.py calls aprewarm() at startup (INFLX_LLM_PREWARM)
+
+Config:
+    INFLX_GEMINI_BASE_URL / INFLX_GROQ_BASE_URL   point a provider elsewhere (proxies, local stubs)
+    INFLX_LLM_POOL_SIZE       max connections per pool (default 64)
+    INFLX_LLM_KEEPALIVE_S     idle keep-alive connection expiry (default 60)
+    INFLX_LLM_TIMEOUT_S       request timeout (default 60)
+"""
+
+import os
+import time
+import asyncio
+import weakref
+import threading
+
+import httpx
+
+GEMINI_MODEL = "gemini-2.5-flash"
+GROQ_MODEL = "llama-3.1-8b-instant"
+
+BASE_URLS = {
+    "gemini": os.getenv("INFLX_GEMINI_BASE_URL") or "https://generativelanguage.googleapis.com",
+    "groq": os.getenv("INFLX_GROQ_BASE_URL") or "https://api.groq.com",
+}
+POOL_SIZE = int(os.getenv("INFLX_LLM_POOL_SIZE", "64"))
+KEEPALIVE_S = float(os.getenv("INFLX_LLM_KEEPALIVE_S", "60"))
+TIMEOUT_S = float(os.getenv("INFLX_LLM_TIMEOUT_S", "60"))
+
+_lock = threading.Lock()
+_pool_lock = threading.Lock()  # builders take it while _lock is held
+_sync_pool = None
+_clients = {}
+# event loop -> {"pool": httpx.AsyncClient, "clients": {provider: client}}
+_loop_state = weakref.WeakKeyDictionary()
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=POOL_SIZE,
+        max_keepalive_connections=POOL_SIZE,
+        keepalive_expiry=KEEPALIVE_S,
+    )
+
+def http_pool() -> httpx.Client:
+    """The shared sync connection pool"""
+    global _sync_pool
+    if _sync_pool is None:
+        with _pool_lock:
+            if _sync_pool is None:
+                _sync_pool = httpx.Client(limits=_limits(), timeout=TIMEOUT_S)
+    return _sync_pool
+
+def _loop_entry() -> dict:
+    loop = asyncio.get_running_loop()
+    entry = _loop_state.get(loop)
+    if entry is None:
+        entry = {"pool": httpx.AsyncClient(limits=_limits(), timeout=TIMEOUT_S), "clients": {}}
+        _loop_state[loop] = entry
+    return entry
+
+def async_http_pool() -> httpx.AsyncClient:
+    """The async connection pool of the running event loop"""
+    return _loop_entry()["pool"]
+
+# ---- provider builders ----
+def _build_gemini(async_pool):
+    from google.genai import Client, types
+    base_url = os.getenv("INFLX_GEMINI_BASE_URL")
+    return Client(http_options=types.HttpOptions(
+        base_url=base_url,
+        httpx_client=http_pool(),
+        # the async pool is required, or the SDK would open a pool of its own
+        httpx_async_client=async_pool or httpx.AsyncClient(limits=_limits(), timeout=TIMEOUT_S),
+    ))
+
+def _build_groq(async_pool):
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        model=GROQ_MODEL,
+        api_key=os.getenv("GROQ_API_KEY"),
+        base_url=os.getenv("INFLX_GROQ_BASE_URL"),
+        http_client=http_pool(),
+        http_async_client=async_pool or httpx.AsyncClient(limits=_limits(), timeout=TIMEOUT_S),
+    )
+
+BUILDERS = {"gemini": _build_gemini, "groq": _build_groq}
+
+def get_client(name: str):
+    """Provider client for sync calls, built on first use"""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = BUILDERS[name](None)
+    return client
+
+def get_async_client(name: str):
+    """Provider client for async calls on the running event loop, built on first use"""
+    entry = _loop_entry()
+    client = entry["clients"].get(name)
+    if client is None:
+        client = entry["clients"][name] = BUILDERS[name](entry["pool"])
+    return client
+
+# ---- pre-warming ----
+def prewarm(names=None) -> dict:
+    """
+    Builds each provider client (importing its SDK) and opens a keep-alive
+    connection (TCP + TLS) to it in the sync pool.
+    Any HTTP status counts: only the connection matters.
+    :return: seconds per provider, or the error message
+    """
+    result = {}
+    for name in names or BUILDERS:
+        start = time.perf_counter()
+        get_client(name)
+        try:
+            http_pool().head(BASE_URLS[name])
+            result[name] = time.perf_counter() - start
+        except httpx.HTTPError as e:
+            result[name] = f"{type(e).__name__}: {e}"
+    return result
+
+async def aprewarm(names=None, connections: int = 1) -> dict:
+    """Async version of prewarm for the running loop's pool; opens `connections` per provider"""
+    pool = async_http_pool()
+
+    async def warm(name):
+        start = time.perf_counter()
+        get_async_client(name)
+        try:
+            await asyncio.gather(*(pool.head(BASE_URLS[name]) for _ in range(connections)))
+            return name, time.perf_counter() - start
+        except httpx.HTTPError as e:
+            return name, f"{type(e).__name__}: {e}"
+
+    return dict(await asyncio.gather(*(warm(name) for name in names or BUILDERS)))
+
+def close():
+    """Closes the sync pool (at process exit)"""
+    global _sync_pool
+    with _lock, _pool_lock:
+        if _sync_pool is not None:
+            _sync_pool.close()
+            _sync_pool = None
+        _clients.clear()
+
+async def aclose():
+    """Closes the running loop's async pool"""
+    entry = _loop_state.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry["pool"].aclose()
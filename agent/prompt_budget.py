@@ -0,0 +1,127 @@
+"""
+Token budgets for the prompts sent to the LLM.
+
+MAX_TURNS caps how many turns a prompt carries, not how long they are, so one
+long pasted message used to ride along in every later request. Each call site
+now has a Budget, and its prompt is built in this order:
+- the current message is clipped to budget.message (head and tail kept)
+- retrieved context is clipped to budget.context by relevance: the blocks that
+  share the most words with the message are kept, in their original order
+- history gets whatever is left of budget.total: newest turns first, each
+  clipped to budget.turn, older turns replaced by the running summary that
+  ConversationState keeps of evicted turns
+
+Prompts are built as the text before and after the history; with_history()
+measures both and puts in between as much history as still fits. Tokens are estimated
+(~4 characters per token) like everywhere else in the repo.
+
+Budgets can be overridden per call site, e.g. INFLX_PROMPT_BUDGET_RESPONSE=2000;
+INFLX_PROMPT_BUDGETS=0 turns clipping off (the old, unbounded prompts).
+"""
+
+import os
+from typing import NamedTuple
+from agent.telemetry import estimate_tokens
+
+ENABLED = os.getenv("INFLX_PROMPT_BUDGETS", "1") == "1"
+
+CLIP_MARKER = " … [clipped] … "
+
+class Budget(NamedTuple):
+    """Token budget of one call site"""
+    total: int    # whole prompt
+    message: int  # the current user message
+    context: int  # retrieved knowledge base context
+    turn: int     # each history turn
+
+def _total(call_site: str, default: int) -> int:
+    return int(os.getenv(f"INFLX_PROMPT_BUDGET_{call_site.upper()}", str(default)))
+
+BUDGETS = {
+    "response": Budget(total=_total("response", 1500), message=300, context=600, turn=200),
+    "lead_extraction": Budget(total=_total("lead_extraction", 900), message=300, context=0, turn=150),
+    "fused_turn": Budget(total=_total("fused_turn", 1800), message=300, context=600, turn=200),
+    "intent_fallback": Budget(total=_total("intent_fallback", 400), message=300, context=0, turn=0),
+}
+
+def set_enabled(enabled: bool):
+    """Turns budgeting on or off at runtime (benchmarks compare both)"""
+    global ENABLED
+    ENABLED = enabled
+
+def clip_text(text: str, max_tokens: int) -> str:
+    """Cuts text to about max_tokens, keeping its beginning and its end"""
+    # estimate_tokens(text) <= max_tokens, without the call
+    if len(text) <= max_tokens * 4 or not ENABLED:
+        return text
+    keep = max(0, max_tokens * 4 - len(CLIP_MARKER))
+    head = text[:keep * 2 // 3].rsplit(" ", 1)[0]
+    tail = text[len(text) - keep // 3:].split(" ", 1)[-1]
+    return f"{head}{CLIP_MARKER}{tail}"
+
+def clip_context(context: str, query: str, max_tokens: int) -> str:
+    """
+    Fits retrieved context into max_tokens by relevance to the query.
+    Blocks (paragraphs, or lines for a single paragraph) are ranked by the words
+    they share with the query; the best ones that fit are kept in their original order.
+    """
+    if not context or len(context) <= max_tokens * 4 or not ENABLED:
+        return context
+    # imported here: intent_classifier itself uses this module
+    from agent.intent_classifier import clean_text
+    blocks = context.split("\n\n")
+    sep = "\n\n"
+    if len(blocks) == 1:
+        blocks = context.split("\n")
+        sep = "\n"
+    words = set(clean_text(query).split())
+    ranked = sorted(
+        range(len(blocks)),
+        key=lambda i: (-len(words.intersection(clean_text(blocks[i]).split())), i),
+    )
+    kept = []
+    remaining = max_tokens
+    for i in ranked:
+        cost = estimate_tokens(blocks[i]) + 1
+        if cost <= remaining:
+            kept.append(i)
+            remaining -= cost
+    if not kept:
+        # not even the best block fits: keep its beginning
+        return clip_text(blocks[ranked[0]], max_tokens)
+    return sep.join(blocks[i] for i in sorted(kept))
+
+def history_text(conv, max_tokens: int, turn_tokens: int) -> str:
+    """
+    Summary plus transcript within max_tokens.
+    Uses the incrementally maintained transcript as-is when everything fits.
+    """
+    transcript = conv.transcript
+    if not ENABLED:
+        return transcript
+    summary = conv.summary
+    if not summary and len(transcript) <= max_tokens * 4:
+        return transcript
+    summary_block = f"Earlier in the conversation (summary):\n{summary}\n" if summary else ""
+    if estimate_tokens(transcript) + estimate_tokens(summary_block) <= max_tokens:
+        return f"{summary_block}Recent messages:\n{transcript}"
+
+    lines = []
+    remaining = max_tokens
+    for turn in reversed(conv.history):
+        line = f"{turn.role}: {clip_text(turn.content, turn_tokens)}"
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+    lines.reverse()
+    if summary_block and estimate_tokens(summary_block) <= remaining:
+        return f"{summary_block}Recent messages:\n" + "\n".join(lines)
+    return "\n".join(lines)
+
+def with_history(head: str, conv, tail: str, call_site: str) -> str:
+    """head + as much history as the call site's budget leaves room for + tail"""
+    budget = BUDGETS[call_site]
+    remaining = budget.total - (len(head) + len(tail)) // 4
+    return f"{head}{history_text(conv, max(0, remaining), budget.turn)}{tail}"
@@ -0,0 +1,206 @@
+"""
+Per-provider health tracking for MultiLLM.
+
+Each provider gets a ProviderHealth with:
+- a rolling window of call latencies (p50/p90/p99)
+- request, error and rate-limit (429) counters
+- a circuit breaker: closed -> open (skipped for a cooldown) -> half_open
+  (a single probe request) -> closed again on success
+
+Health objects live in a process-wide registry so every MultiLLM instance
+shares what it learns, and provider_stats() shows ops why traffic shifted.
+"""
+
+import time
+import threading
+from collections import deque
+
+LATENCY_WINDOW = 100
+FAILURE_THRESHOLD = 3
+COOLDOWN_S = 30.0
+MAX_COOLDOWN_S = 300.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+def is_rate_limit(error: Exception) -> bool:
+    """True for HTTP 429 / quota errors from either SDK"""
+    for attr in ("code", "status_code"):
+        if getattr(error, attr, None) == 429:
+            return True
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text or "rate limit" in text.lower()
+
+def _percentile(sorted_values, q: float):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+class ProviderHealth:
+    """Rolling stats and circuit breaker for one LLM provider"""
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 cooldown_s: float = COOLDOWN_S):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown_s = cooldown_s
+        self.cooldown_s = cooldown_s
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.outcomes = deque(maxlen=LATENCY_WINDOW)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.requests = 0
+        self.successes = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.breaker_trips = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    # ---- breaker ----
+    def allow_request(self) -> bool:
+        """Whether a call may be sent now; an expired open breaker lets one probe through"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown_s:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def release_probe(self):
+        """
+        Frees the probe slot of a call that ended without an outcome (a cancelled
+        hedge loser, an abandoned stream), so the next request can probe again.
+        """
+        with self._lock:
+            self.probe_in_flight = False
+
+    def cooldown_remaining(self) -> float:
+        """Seconds until an open breaker allows a probe (0 when not open)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.cooldown_s - (time.monotonic() - self.opened_at))
+
+    def _trip(self):
+        if self.state == HALF_OPEN:
+            # failed probe: back off harder
+            self.cooldown_s = min(self.cooldown_s * 2, MAX_COOLDOWN_S)
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.breaker_trips += 1
+
+    # ---- recording ----
+    def record_success(self, latency_s: float):
+        """Records a successful call and closes the breaker"""
+        with self._lock:
+            self.requests += 1
+            self.successes += 1
+            self.latencies.append(latency_s)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            self.state = CLOSED
+            self.cooldown_s = self.base_cooldown_s
+
+    def record_failure(self, error: Exception, latency_s: float):
+        """Records a failed call; rate limits trip the breaker immediately"""
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {str(error)[:200]}"
+            rate_limited = is_rate_limit(error)
+            if rate_limited:
+                self.rate_limited += 1
+            if (
+                self.state == HALF_OPEN
+                or rate_limited
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self._trip()
+            self.probe_in_flight = False
+
+    # ---- stats ----
+    def latency_percentile(self, q: float):
+        """Latency percentile in seconds over the rolling window, None without data"""
+        with self._lock:
+            values = sorted(self.latencies)
+        return _percentile(values, q)
+
+    def error_rate(self) -> float:
+        """Share of failed calls in the rolling window"""
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def routing_score(self):
+        """Lower is better; None while there is no latency data yet"""
+        p50 = self.latency_percentile(50)
+        if p50 is None:
+            return None
+        return p50 * (1 + 4 * self.error_rate())
+
+    def snapshot(self) -> dict:
+        """Everything ops needs to see why traffic moved"""
+        with self._lock:
+            values = sorted(self.latencies)
+            state = self.state
+        return {
+            "state": state,
+            "cooldown_remaining_s": round(self.cooldown_remaining(), 2),
+            "p50_s": _percentile(values, 50),
+            "p90_s": _percentile(values, 90),
+            "p99_s": _percentile(values, 99),
+            "error_rate": self.error_rate(),
+            "requests": self.requests,
+            "successes": self.successes,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "consecutive_failures": self.consecutive_failures,
+            "breaker_trips": self.breaker_trips,
+            "last_error": self.last_error,
+        }
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def get_health(name: str) -> ProviderHealth:
+    """Process-wide health object for a provider name"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = ProviderHealth(name)
+        return _registry[name]
+
+def route(names):
+    """
+    Orders providers for the next call.
+    Providers keep their preference order until both have latency data;
+    after that the lower routing_score goes first. Open breakers go last.
+    """
+    healths = [get_health(n) for n in names]
+    scores = [h.routing_score() for h in healths]
+
+    def key(item):
+        pref, health = item
+        is_open = health.state == OPEN and health.cooldown_remaining() > 0
+        score = scores[pref]
+        if None in scores:
+            score = 0.0
+        return (is_open, score, pref)
+
+    ordered = sorted(enumerate(healths), key=key)
+    return [names[pref] for pref, _ in ordered]
+
+def provider_stats() -> dict:
+    """Snapshot of every known provider"""
+    with _registry_lock:
+        items = list(_registry.items())
+    return {name: health.snapshot() for name, health in items}
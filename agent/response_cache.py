@@ -0,0 +1,69 @@
+"""
+Answer cache for grounded FAQ replies in llm_response_node.
+
+Most product questions resolve to the same few rag_result strings, so the reply
+for (intent, rag_result, normalized question, lead_just_captured) is reused
+instead of generating it again. Only grounded product_inquiry turns are cached,
+and turns whose question leans on earlier messages ("what about that one?") skip
+the cache. Everything is dropped when the knowledge base changes.
+
+A cached reply is served to every user who asks the same question, so replies
+for a cacheable key are generated from a prompt without the conversation
+history or lead details (agent._response_prompt(shared=True)); nothing one
+user told the assistant can end up in another user's answer.
+"""
+
+import hashlib
+from agent.cache import TTLCache
+from agent.intent_classifier import clean_text
+from data.rag_retriever import kb_version
+
+CACHEABLE_INTENTS = {"product_inquiry"}
+# words that point back into the conversation, making the answer context-dependent
+CONTEXT_WORDS = {
+    "it", "its", "that", "this", "those", "these", "they", "them", "one",
+    "same", "also", "else", "other", "another", "instead", "more",
+}
+CONTEXT_PREFIXES = ("and ", "what about", "how about", "but ")
+
+response_cache = TTLCache(maxsize=1024, ttl=6 * 60 * 60, name="response")
+_cached_kb_version = None
+
+def is_context_dependent(question: str, history) -> bool:
+    """True if the question likely refers to earlier turns"""
+    if len(history) <= 1:
+        return False
+    if question.startswith(CONTEXT_PREFIXES):
+        return True
+    return any(word in CONTEXT_WORDS for word in question.split())
+
+def cache_key(conv, user_message: str, rag_result):
+    """Cache key for this turn, or None if the reply must be generated"""
+    global _cached_kb_version
+    if not conv.rag_used or not rag_result or conv.last_intent not in CACHEABLE_INTENTS:
+        return None
+    question = clean_text(user_message)
+    if not question or is_context_dependent(question, conv.history):
+        return None
+
+    version = kb_version()
+    if version != _cached_kb_version:
+        if _cached_kb_version is not None:
+            response_cache.clear()
+        _cached_kb_version = version
+
+    rag_hash = hashlib.sha256(rag_result.encode("utf-8")).hexdigest()
+    return (conv.last_intent, rag_hash, " ".join(question.split()), bool(conv.lead_just_captured))
+
+def get(key):
+    """Stored reply or None"""
+    return None if key is None else response_cache.get(key)
+
+def put(key, reply: str):
+    """Stores a generated reply for a cacheable key"""
+    if key is not None and reply:
+        response_cache.set(key, reply)
+
+def stats() -> dict:
+    """Hit/miss/eviction counters"""
+    return response_cache.stats()
@@ -4,69 +4,433 @@ Tracks conversation context including chat history, detected intents,
 and lead capture details. Pydantic based
 """
 import os
-import json
-from typing import List, Optional, ClassVar
-from pydantic import BaseModel, Field, EmailStr
-from langchain_groq import ChatGroq
-from google.genai import Client
+import time
+import asyncio
+import threading
+import weakref
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed
+from collections import deque
+from typing import List, Optional, ClassVar, NamedTuple
+from pydantic import (
+    BaseModel, EmailStr, PrivateAttr, TypeAdapter, ValidationError, computed_field,
+    model_validator,
+)
 from dotenv import load_dotenv
+from agent.provider_health import get_health, route, provider_stats
+from agent import hedging
+from agent import telemetry
+from agent import llm_clients
 
 load_dotenv()
 
-gemini = Client()
-groq = ChatGroq(
-    model="llama-3.1-8b-instant",
-    api_key=os.getenv("GROQ_API_KEY")
-)
+# cap on in-flight provider calls per event loop (async path only), shared by all MultiLLM
+LLM_MAX_CONCURRENCY = int(os.getenv("INFLX_LLM_MAX_CONCURRENCY", "64"))
+# asyncio primitives belong to one loop, so keep one semaphore per loop
+_llm_semaphores = weakref.WeakKeyDictionary()
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+_shared_llm = None
+def _hedge_pool() -> ThreadPoolExecutor:
+    """Threads for hedged sync calls, created on first use"""
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+    return _hedge_executor
+
+def _response_text(response) -> str:
+    """Text of a gemini or groq response, for size accounting"""
+    text = getattr(response, "text", None)
+    if text is None:
+        text = getattr(response, "content", None)
+    return text if isinstance(text, str) else ""
 
 class MultiLLM:
     """
     Switches between gemini and groq
-    Prefers gemini, toggles to groq if rate limited
+    Prefers gemini, routes to groq when gemini is rate limited, failing or slower.
+    Health and circuit-breaker state is shared process-wide, see agent/provider_health.py
+    Provider clients come from agent/llm_clients.py (built lazily, pooled connections)
+    unless passed in explicitly.
     """
-    def __init__(self, gemini_client=gemini, groq_client=groq):
-        self.gemini = gemini_client
-        self.groq = groq_client
+    PROVIDERS = ("gemini", "groq")
 
-    def invoke(self, prompt):
-        """Common calling function for both llms"""
-        try:
-            # try Gemini first
-            return self.gemini.models.generate_content(
-                model="gemini-2.5-flash",
+    def __init__(self, gemini_client=None, groq_client=None):
+        self._overrides = {"gemini": gemini_client, "groq": groq_client}
+
+    def _client(self, name):
+        return self._overrides[name] or llm_clients.get_client(name)
+
+    def _aclient(self, name):
+        return self._overrides[name] or llm_clients.get_async_client(name)
+
+    @staticmethod
+    def _log_fallback(name, e):
+        """Prints why a provider was skipped"""
+        print(f"[LLM fallback] {name} failed: {e}")
+        telemetry.record_fallback(name, e)
+
+    @staticmethod
+    def _semaphore() -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        sem = _llm_semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+            _llm_semaphores[loop] = sem
+        return sem
+
+    def _candidates(self):
+        """
+        Providers to try, best first.
+        If every breaker is open the best one is tried anyway rather than failing the turn.
+        """
+        order = route(self.PROVIDERS)
+        tried = False
+        # lazy, so a half-open provider is only marked as probing when it is actually called
+        for name in order:
+            if get_health(name).allow_request():
+                tried = True
+                yield name
+        if not tried:
+            yield order[0]
+
+    def _call(self, name, prompt):
+        if name == "gemini":
+            return self._client(name).models.generate_content(
+                model=llm_clients.GEMINI_MODEL,
                 contents=prompt
             )
+        return self._client(name).invoke(prompt)
+
+    async def _acall(self, name, prompt):
+        if name == "gemini":
+            return await self._aclient(name).aio.models.generate_content(
+                model=llm_clients.GEMINI_MODEL,
+                contents=prompt
+            )
+        return await self._aclient(name).ainvoke(prompt)
+
+    def _timed_call(self, name, prompt, call_site=None):
+        """One provider call, recorded in that provider's health"""
+        health = get_health(name)
+        start = time.perf_counter()
+        try:
+            response = self._call(name, prompt)
+        except Exception as e:
+            health.record_failure(e, time.perf_counter() - start)
+            telemetry.record_llm_call(name, call_site, time.perf_counter() - start, prompt, None, ok=False)
+            self._log_fallback(name, e)
+            raise
+        except BaseException:
+            health.release_probe()
+            raise
+        seconds = time.perf_counter() - start
+        health.record_success(seconds)
+        telemetry.record_llm_call(name, call_site, seconds, prompt, _response_text(response))
+        return response
+
+    async def _atimed_call(self, name, prompt, call_site=None):
+        """
+        Async version of _timed_call. A cancelled call (hedge loser, abandoned
+        turn) records no outcome but frees the provider's half-open probe.
+        """
+        health = get_health(name)
+        start = time.perf_counter()
+        try:
+            response = await self._acall(name, prompt)
         except Exception as e:
+            health.record_failure(e, time.perf_counter() - start)
+            telemetry.record_llm_call(name, call_site, time.perf_counter() - start, prompt, None, ok=False)
+            self._log_fallback(name, e)
+            raise
+        except BaseException:
+            health.release_probe()
+            raise
+        seconds = time.perf_counter() - start
+        health.record_success(seconds)
+        telemetry.record_llm_call(name, call_site, seconds, prompt, _response_text(response))
+        return response
+
+    def invoke(self, prompt, call_site=None):
+        """
+        Common calling function for both llms
+        call_site names the caller (e.g. "intent_fallback") to pick its hedging policy.
+        """
+        candidates = self._candidates()
+        policy = hedging.policy_for(call_site)
+        if policy is not None:
+            return self._hedged_invoke(prompt, candidates, policy, call_site)
+
+        last_error = None
+        for name in candidates:
+            try:
+                return self._timed_call(name, prompt, call_site)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _hedged_invoke(self, prompt, candidates, policy, call_site):
+        primary = next(candidates)
+        first = _hedge_pool().submit(contextvars.copy_context().run, self._timed_call, primary, prompt, call_site)
+        done, _ = wait([first], timeout=policy.delay_for(get_health(primary)))
+        secondary = None if done else next(candidates, None)
+        if secondary is None:
+            # answered in time, or nobody to hedge with: plain fallback semantics
+            hedging.record(call_site, hedged=False)
+            try:
+                return first.result()
+            except Exception as e:
+                last_error = e
+            for name in candidates:
+                try:
+                    return self._timed_call(name, prompt, call_site)
+                except Exception as e:
+                    last_error = e
+            raise last_error
+
+        second = _hedge_pool().submit(contextvars.copy_context().run, self._timed_call, secondary, prompt, call_site)
+        last_error = None
+        for fut in as_completed([first, second]):
+            if fut.exception() is None:
+                hedging.record(call_site, hedged=True, hedge_won=fut is second)
+                # threads cannot be interrupted; a started loser just finishes in the background
+                loser, loser_name = (first, primary) if fut is second else (second, secondary)
+                if loser.cancel():
+                    # never started, so it will not record an outcome
+                    get_health(loser_name).release_probe()
+                return fut.result()
+            last_error = fut.exception()
+        hedging.record(call_site, hedged=True)
+        raise last_error
+
+    async def ainvoke(self, prompt, call_site=None):
+        """Async version of invoke, at most LLM_MAX_CONCURRENCY calls in flight per loop"""
+        async with self._semaphore():
+            candidates = self._candidates()
+            policy = hedging.policy_for(call_site)
+            if policy is not None:
+                return await self._ahedged_invoke(prompt, candidates, policy, call_site)
+
+            last_error = None
+            for name in candidates:
+                try:
+                    return await self._atimed_call(name, prompt, call_site)
+                except Exception as e:
+                    last_error = e
+            raise last_error
+
+    @staticmethod
+    def _start_call_task(coro, name):
+        """
+        Task for a hedged call. A task cancelled before its first step never runs
+        _atimed_call's handlers, so the probe is also released when it ends cancelled.
+        """
+        task = asyncio.ensure_future(coro)
+        task.add_done_callback(lambda t: get_health(name).release_probe() if t.cancelled() else None)
+        return task
+
+    async def _ahedged_invoke(self, prompt, candidates, policy, call_site):
+        primary = next(candidates)
+        first = self._start_call_task(self._atimed_call(primary, prompt, call_site), primary)
+        try:
+            done, _ = await asyncio.wait([first], timeout=policy.delay_for(get_health(primary)))
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        secondary = None if done else next(candidates, None)
+        if secondary is None:
+            hedging.record(call_site, hedged=False)
             try:
-                err_json = json.loads(str(e))
-                print(f"[LLM fallback] Gemini failed:")
-                print(str(e))
-            except:
-                print(f"Error: {e}")
-            finally:
-                print("Using Groq")
-            return self.groq.invoke(prompt)
-
-class Turn(BaseModel):
+                return await first
+            except Exception as e:
+                last_error = e
+            for name in candidates:
+                try:
+                    return await self._atimed_call(name, prompt, call_site)
+                except Exception as e:
+                    last_error = e
+            raise last_error
+
+        second = self._start_call_task(self._atimed_call(secondary, prompt, call_site), secondary)
+        pending = {first, second}
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedging.record(call_site, hedged=True, hedge_won=task is second)
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        hedging.record(call_site, hedged=True)
+        raise last_error
+
+    def _stream_chunks(self, name, prompt):
+        if name == "gemini":
+            return self._client(name).models.generate_content_stream(
+                model=llm_clients.GEMINI_MODEL,
+                contents=prompt
+            )
+        return self._client(name).stream(prompt)
+
+    async def _astream_chunks(self, name, prompt):
+        if name == "gemini":
+            return await self._aclient(name).aio.models.generate_content_stream(
+                model=llm_clients.GEMINI_MODEL,
+                contents=prompt
+            )
+        return self._aclient(name).astream(prompt)
+
+    def stream(self, prompt, call_site=None):
+        """
+        Yields the reply as text chunks.
+        Falls back to the next provider only if nothing was yielded yet;
+        a stream that breaks mid-way raises instead of repeating text.
+        """
+        last_error = None
+        for name in self._candidates():
+            health = get_health(name)
+            start = time.perf_counter()
+            emitted = False
+            received = []
+            try:
+                for chunk in self._stream_chunks(name, prompt):
+                    text = getattr(chunk, "text", None)
+                    if text:
+                        emitted = True
+                        received.append(text)
+                        yield text
+            except Exception as e:
+                health.record_failure(e, time.perf_counter() - start)
+                telemetry.record_llm_call(name, call_site, time.perf_counter() - start, prompt,
+                                          "".join(received), ok=False)
+                self._log_fallback(name, e)
+                if emitted:
+                    raise
+                last_error = e
+                continue
+            except BaseException:
+                # the consumer closed the generator mid-stream
+                health.release_probe()
+                raise
+            seconds = time.perf_counter() - start
+            health.record_success(seconds)
+            telemetry.record_llm_call(name, call_site, seconds, prompt, "".join(received))
+            return
+        raise last_error
+
+    async def astream(self, prompt, call_site=None):
+        """Async version of stream"""
+        async with self._semaphore():
+            last_error = None
+            for name in self._candidates():
+                health = get_health(name)
+                start = time.perf_counter()
+                emitted = False
+                received = []
+                try:
+                    async for chunk in await self._astream_chunks(name, prompt):
+                        text = getattr(chunk, "text", None)
+                        if text:
+                            emitted = True
+                            received.append(text)
+                            yield text
+                except Exception as e:
+                    health.record_failure(e, time.perf_counter() - start)
+                    telemetry.record_llm_call(name, call_site, time.perf_counter() - start, prompt,
+                                              "".join(received), ok=False)
+                    self._log_fallback(name, e)
+                    if emitted:
+                        raise
+                    last_error = e
+                    continue
+                except BaseException:
+                    # cancelled, or the consumer closed the generator mid-stream
+                    health.release_probe()
+                    raise
+                seconds = time.perf_counter() - start
+                health.record_success(seconds)
+                telemetry.record_llm_call(name, call_site, seconds, prompt, "".join(received))
+                return
+            raise last_error
+
+    @staticmethod
+    def stats() -> dict:
+        """Per-provider latency percentiles, error/429 counts, breaker state and hedging counters"""
+        return {"providers": provider_stats(), "hedging": hedging.hedge_stats()}
+
+def get_llm() -> MultiLLM:
+    """The MultiLLM shared by every call site (agent nodes, intent fallback)"""
+    global _shared_llm
+    if _shared_llm is None:
+        _shared_llm = MultiLLM()
+    return _shared_llm
+
+class Turn(NamedTuple):
     """Stores the turn-wise messages for memory"""
-    role: str = Field(..., description="User or Assistant")
+    role: str  # "user" or "assistant"
     content: str
 
+_email_adapter = TypeAdapter(EmailStr)
+
+class _TurnLog:
+    """
+    Ring buffer of turns plus the "role: content" transcript, updated incrementally.
+    Turns pushed out of the buffer are kept in `evicted` (bounded) for the summary.
+    A plain object read straight from __pydantic_private__: going through
+    pydantic's __getattr__ for a private attribute costs more than the update.
+    """
+    __slots__ = ("turns", "lines", "text", "evicted")
+
+    def __init__(self, maxlen: int, summary_turns: int):
+        self.turns = deque(maxlen=maxlen)
+        self.lines = deque(maxlen=maxlen)
+        self.text = ""
+        # Turns, or already summarized lines restored from a checkpoint
+        self.evicted = deque(maxlen=summary_turns)
+
+    def append(self, role: str, content: str):
+        line = f"{role}: {content}"
+        lines = self.lines
+        if len(lines) == lines.maxlen:
+            self.evicted.append(self.turns[0])
+            # drop the oldest line (and its newline) instead of re-joining everything
+            self.text = f"{self.text[len(lines[0]) + 1:]}\n{line}"
+        elif lines:
+            self.text = f"{self.text}\n{line}"
+        else:
+            self.text = line
+        self.turns.append(Turn(role, content))
+        lines.append(line)
+
 class ConversationState(BaseModel):
     """
     Tracks conversation context for the AutoStream assistant.
     
     Stored:
-    - chat history
+    - chat history (ring buffer of the last MAX_TURNS turns)
+    - a running summary of the turns that fell out of the ring buffer (rendered
+      only when a prompt reads it)
     - last detected intent
     - whether we are collecting lead details
     - lead fields: name, email, platform
+
+    Assignments are not validated on the hot path; lead data is validated once,
+    by validated_lead(), when it leaves the agent.
     """
 
     MAX_TURNS: ClassVar[int] = 5
+    # each evicted turn becomes one short summary line
+    SUMMARY_TURNS: ClassVar[int] = 6
+    SUMMARY_TURN_CHARS: ClassVar[int] = 160
 
     #memory
-    history: List[Turn] = Field(default_factory=list, description="Chat history")
     last_intent: Optional[str] = None
     rag_used: bool = False
     lead_just_captured: bool = False
@@ -74,14 +438,81 @@ class ConversationState(BaseModel):
     # Lead capture flags
     collecting_lead: bool = False
     name: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[str] = None
     platform: Optional[str] = None
 
+    _log: _TurnLog = PrivateAttr(
+        default_factory=lambda: _TurnLog(ConversationState.MAX_TURNS, ConversationState.SUMMARY_TURNS)
+    )
+
     class Config:
         """Configurations for the ConversationState"""
-        validate_assignment = True
         arbitrary_types_allowed = True
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def _replay_history(cls, data, handler):
+        """history and summary are not stored fields: they are replayed into the ring buffer"""
+        history = summary = None
+        if isinstance(data, dict) and ("history" in data or "summary" in data):
+            data = dict(data)
+            history = data.pop("history", None)
+            summary = data.pop("summary", None)
+        conv = handler(data)
+        conv._restore_summary(summary)
+        conv._extend(history)
+        return conv
+
+    @classmethod
+    def model_construct(cls, _fields_set=None, history=None, summary=None, **values):
+        """Unvalidated construction (checkpoint loads), replaying history like __init__"""
+        conv = super().model_construct(_fields_set, **values)
+        conv._restore_summary(summary)
+        conv._extend(history)
+        return conv
+
+    @computed_field(description="Chat history")
+    @property
+    def history(self) -> List[Turn]:
+        """Chat history, oldest first (a copy of the ring buffer)"""
+        return list(self.__pydantic_private__["_log"].turns)
+
+    @computed_field(description="Summary of the turns older than the history")
+    @property
+    def summary(self) -> str:
+        """One line per evicted turn (its first sentence, clipped), oldest first"""
+        evicted = self.__pydantic_private__["_log"].evicted
+        if not evicted:
+            return ""
+        return "\n".join(t if isinstance(t, str) else self._summary_line(t) for t in evicted)
+
+    @classmethod
+    def _summary_line(cls, turn: Turn) -> str:
+        text = " ".join(turn.content.split())
+        end = text.find(". ")
+        if end != -1:
+            text = text[:end + 1]
+        if len(text) > cls.SUMMARY_TURN_CHARS:
+            text = text[:cls.SUMMARY_TURN_CHARS].rsplit(" ", 1)[0] + " …"
+        return f"{turn.role}: {text}"
+
+    def _restore_summary(self, summary):
+        if summary:
+            self._log.evicted.extend(summary.split("\n"))
+
+    @property
+    def transcript(self) -> str:
+        """History rendered as "role: content" lines, maintained incrementally"""
+        return self.__pydantic_private__["_log"].text
+
+    def _extend(self, turns):
+        log = self._log
+        for turn in turns or []:
+            if isinstance(turn, dict):
+                log.append(turn["role"], turn["content"])
+            else:
+                log.append(turn[0], turn[1])
+
     def add_turn(self, role: str, message: str):
         """
         Adds a messages to the history
@@ -90,9 +521,53 @@ class ConversationState(BaseModel):
         :param message: the message content
         :type message: str
         """
-        self.history.append(Turn(role=role.lower(), content=message))
-        if len(self.history) > self.MAX_TURNS:
-            self.history = self.history[-self.MAX_TURNS:]
+        self.__pydantic_private__["_log"].append(role.lower(), message)
+
+    def to_compact(self) -> list:
+        """Positional, validation-free form used by the checkpointer"""
+        return [
+            [[t.role, t.content] for t in self._log.turns],
+            self.last_intent,
+            self.rag_used,
+            self.lead_just_captured,
+            self.collecting_lead,
+            self.name,
+            self.email,
+            self.platform,
+            self.summary,
+        ]
+
+    @classmethod
+    def from_compact(cls, data: list) -> "ConversationState":
+        """Inverse of to_compact; skips validation since the data was valid when stored"""
+        history, last_intent, rag_used, lead_just_captured, collecting_lead, name, email, platform = data[:8]
+        return cls.model_construct(
+            history=history,
+            # checkpoints written before the summary existed have 8 fields
+            summary=data[8] if len(data) > 8 else "",
+            last_intent=last_intent,
+            rag_used=rag_used,
+            lead_just_captured=lead_just_captured,
+            collecting_lead=collecting_lead,
+            name=name,
+            email=email,
+            platform=platform,
+        )
+
+    def validated_lead(self) -> dict:
+        """
+        Validates the lead fields at the point they leave the agent.
+        :return: {"name", "email", "platform"} with a normalized email
+        :raises ValueError: if a field is missing or the email is invalid
+        """
+        missing = self.missing_lead_fields()
+        if missing:
+            raise ValueError(f"Missing lead fields: {', '.join(missing)}")
+        try:
+            email = _email_adapter.validate_python(self.email)
+        except ValidationError as e:
+            raise ValueError(f"Invalid email: {self.email}") from e
+        return {"name": self.name.strip(), "email": email, "platform": self.platform.strip()}
 
     def missing_lead_fields(self) -> List[str]:
         """
@@ -135,3 +610,4 @@ if __name__ == "__main__":
         s.add_turn("User", f"message {i}")
 
     print(s.history)  # should only show last 5
+    print(s.summary)  # the evicted turns, one line each
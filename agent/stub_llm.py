@@ -0,0 +1,77 @@
+"""
+Stand-in for MultiLLM used to load-test the agent without provider keys or quota.
+
+Sleeps for a fixed latency like a provider call, answers the intent fallback
+with a label (one numbered line per message for batched prompts), lead
+extraction with empty JSON, the fused turn with JSON around the canned reply
+and everything else with the canned reply streamed in a few chunks. Enabled in
+server.py and triage.py by INFLX_STUB_LLM_LATENCY_S.
+"""
+
+import re
+import json
+import time
+import asyncio
+from agent import telemetry
+
+_NUMBERED_RE = re.compile(r'^\s*\d+\. "', re.MULTILINE)
+
+REPLY = "AutoStream has a Basic and a Pro plan. Want me to walk you through the differences?"
+
+class StubResponse:
+    """Mimics the .text attribute of the provider responses"""
+    def __init__(self, text):
+        self.text = text
+
+class StubLLM:
+    """MultiLLM-compatible stub with a fixed per-call latency"""
+    def __init__(self, latency_s: float = 0.05, chunks: int = 4):
+        self.latency_s = latency_s
+        self.chunks = chunks
+        self.calls = 0
+
+    def _answer(self, prompt, call_site) -> str:
+        self.calls += 1
+        if call_site == "intent_fallback":
+            # batched prompts (classify_batch_with_gemini) number their messages
+            numbered = len(_NUMBERED_RE.findall(prompt))
+            if numbered:
+                text = "\n".join(f"{i}. product_inquiry" for i in range(1, numbered + 1))
+            else:
+                text = "product_inquiry"
+        elif call_site == "lead_extraction":
+            text = '{"name": null, "email": null, "platform": null}'
+        elif call_site == "fused_turn":
+            text = json.dumps({"intent": "product_inquiry", "name": None, "email": None,
+                               "platform": None, "reply": REPLY})
+        else:
+            text = REPLY
+        telemetry.record_llm_call("stub", call_site, self.latency_s, prompt, text)
+        return text
+
+    def _split(self, text: str):
+        words = text.split(" ")
+        size = max(1, len(words) // self.chunks)
+        for i in range(0, len(words), size):
+            yield " ".join(words[i:i + size]) + (" " if i + size < len(words) else "")
+
+    def invoke(self, prompt, call_site=None):
+        time.sleep(self.latency_s)
+        return StubResponse(self._answer(prompt, call_site))
+
+    async def ainvoke(self, prompt, call_site=None):
+        await asyncio.sleep(self.latency_s)
+        return StubResponse(self._answer(prompt, call_site))
+
+    def stream(self, prompt, call_site=None):
+        time.sleep(self.latency_s)
+        yield from self._split(self._answer(prompt, call_site))
+
+    async def astream(self, prompt, call_site=None):
+        await asyncio.sleep(self.latency_s)
+        for chunk in self._split(self._answer(prompt, call_site)):
+            yield chunk
+
+    def stats(self) -> dict:
+        """Same shape as MultiLLM.stats()"""
+        return {"providers": {"stub": {"requests": self.calls, "latency_s": self.latency_s}}, "hedging": {}}
@@ -0,0 +1,322 @@
+"""
+Per-node tracing and metrics for the Inflx AI graph.
+
+When enabled (INFLX_TELEMETRY=1, or set_enabled(True); server.py turns it on
+by default) every turn records:
+- a wall-time span per graph node
+- every LLM call: provider, call site, latency, prompt/response chars and
+  estimated tokens, success or failure
+- provider fallbacks and cache hits/misses
+
+Two outputs:
+- process-wide Prometheus counters/histograms (render_prometheus())
+- one JSON trace per turn, kept in memory (recent_traces()) and optionally
+  appended to INFLX_TRACE_FILE as JSONL
+
+Turns are delimited by turn() (used by stream_turn/astream_turn); spans recorded
+outside a turn still update the metrics. When disabled, every hook returns
+after a single flag check.
+"""
+
+import os
+import json
+import time
+import uuid
+import bisect
+import inspect
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+ENABLED = os.getenv("INFLX_TELEMETRY", "0") == "1"
+TRACE_FILE = os.getenv("INFLX_TRACE_FILE")
+RECENT_TRACES = 200
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8)
+
+def set_enabled(enabled: bool):
+    """Turns all recording on or off at runtime"""
+    global ENABLED
+    ENABLED = enabled
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, the same estimate as data.sparse_retriever"""
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+# ---- metrics ----
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+def _render_labels(key: tuple, extra: str = "") -> str:
+    parts = [f'{k}="{str(v)}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    """Monotonic counter with labels"""
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_render_labels(key)} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_render_labels(key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{_render_labels(key, le)} {series['count']}")
+                lines.append(f"{self.name}_sum{_render_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_render_labels(key)} {series['count']}")
+        return lines
+
+TURN_SECONDS = Histogram("inflx_turn_seconds", "Wall time of a whole turn")
+NODE_SECONDS = Histogram("inflx_node_seconds", "Wall time per graph node")
+LLM_SECONDS = Histogram("inflx_llm_call_seconds", "Latency of one provider call")
+TURN_LLM_CALLS = Histogram("inflx_turn_llm_calls", "LLM calls made in one turn", COUNT_BUCKETS)
+LLM_CALLS = Counter("inflx_llm_calls_total", "Provider calls by provider, call site and outcome")
+LLM_PROMPT_CHARS = Counter("inflx_llm_prompt_chars_total", "Prompt characters sent")
+LLM_PROMPT_TOKENS = Counter("inflx_llm_prompt_tokens_total", "Estimated prompt tokens sent")
+LLM_RESPONSE_CHARS = Counter("inflx_llm_response_chars_total", "Response characters received")
+LLM_RESPONSE_TOKENS = Counter("inflx_llm_response_tokens_total", "Estimated response tokens received")
+LLM_FALLBACKS = Counter("inflx_llm_fallbacks_total", "Provider failures that moved the call to another provider")
+CACHE_EVENTS = Counter("inflx_cache_events_total", "Cache lookups by cache and result")
+TURNS = Counter("inflx_turns_total", "Turns by outcome")
+INTENT_DECISIONS = Counter("inflx_intent_decisions_total", "Classified messages by whether the LLM was needed")
+
+METRICS = (
+    TURNS, TURN_SECONDS, NODE_SECONDS, TURN_LLM_CALLS, LLM_CALLS, LLM_SECONDS,
+    LLM_PROMPT_CHARS, LLM_PROMPT_TOKENS, LLM_RESPONSE_CHARS, LLM_RESPONSE_TOKENS,
+    LLM_FALLBACKS, CACHE_EVENTS, INTENT_DECISIONS,
+)
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ---- per-turn traces ----
+class TurnTrace:
+    """Everything recorded during one turn"""
+    def __init__(self, thread_id=None):
+        self.turn_id = uuid.uuid4().hex
+        self.thread_id = thread_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.total_s = None
+        self.error = None
+        self.nodes = []
+        self.llm_calls = []
+        self.fallbacks = []
+        self.cache = []
+        self.events = []
+        self._lock = threading.Lock()
+
+    def offset(self) -> float:
+        return time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "turn_id": self.turn_id,
+                "thread_id": self.thread_id,
+                "started_at": self.started_at,
+                "total_s": self.total_s,
+                "error": self.error,
+                "llm_call_count": len(self.llm_calls),
+                "nodes": list(self.nodes),
+                "llm_calls": list(self.llm_calls),
+                "fallbacks": list(self.fallbacks),
+                "cache": list(self.cache),
+                "events": list(self.events),
+            }
+
+_current = contextvars.ContextVar("inflx_turn_trace", default=None)
+_recent = deque(maxlen=RECENT_TRACES)
+_recent_lock = threading.Lock()
+
+def current_trace():
+    """The trace of the turn running in this context, or None"""
+    return _current.get() if ENABLED else None
+
+@contextmanager
+def turn(thread_id=None):
+    """Delimits one turn; yields its TurnTrace (None when disabled)"""
+    if not ENABLED:
+        yield None
+        return
+    trace = TurnTrace(thread_id)
+    token = _current.set(trace)
+    try:
+        yield trace
+    except Exception as e:
+        trace.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # a generator closed from another context
+            _current.set(None)
+        _finish(trace)
+
+def _finish(trace: TurnTrace):
+    trace.total_s = trace.offset()
+    TURN_SECONDS.observe(trace.total_s)
+    TURN_LLM_CALLS.observe(len(trace.llm_calls))
+    TURNS.inc(outcome="error" if trace.error else "ok")
+    data = trace.to_dict()
+    with _recent_lock:
+        _recent.append(data)
+        if TRACE_FILE:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(data) + "\n")
+
+def recent_traces(limit: int = 20) -> list:
+    """The latest turn traces, newest last"""
+    with _recent_lock:
+        return list(_recent)[-limit:]
+
+# ---- hooks ----
+def _record_node(name: str, start: float, trace):
+    seconds = time.perf_counter() - start
+    NODE_SECONDS.observe(seconds, node=name)
+    if trace is not None:
+        with trace._lock:
+            trace.nodes.append({"node": name, "start_s": start - trace._start, "seconds": seconds})
+
+def node(name: str, fn):
+    """Wraps a graph node (sync or async) in a wall-time span"""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            if not ENABLED:
+                return await fn(state)
+            trace = _current.get()
+            start = time.perf_counter()
+            try:
+                return await fn(state)
+            finally:
+                _record_node(name, start, trace)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        if not ENABLED:
+            return fn(state)
+        trace = _current.get()
+        start = time.perf_counter()
+        try:
+            return fn(state)
+        finally:
+            _record_node(name, start, trace)
+    return wrapper
+
+def record_llm_call(provider: str, call_site, seconds: float, prompt: str, response_text, ok: bool = True):
+    """One provider call (streams are recorded once, when they end)"""
+    if not ENABLED:
+        return
+    site = call_site or "unknown"
+    LLM_CALLS.inc(provider=provider, call_site=site, outcome="ok" if ok else "error")
+    LLM_SECONDS.observe(seconds, provider=provider, call_site=site)
+    prompt_tokens = estimate_tokens(prompt)
+    response_text = response_text or ""
+    response_tokens = estimate_tokens(response_text)
+    LLM_PROMPT_CHARS.inc(len(prompt), call_site=site)
+    LLM_PROMPT_TOKENS.inc(prompt_tokens, call_site=site)
+    LLM_RESPONSE_CHARS.inc(len(response_text), call_site=site)
+    LLM_RESPONSE_TOKENS.inc(response_tokens, call_site=site)
+    trace = _current.get()
+    if trace is not None:
+        with trace._lock:
+            trace.llm_calls.append({
+                "provider": provider,
+                "call_site": site,
+                "seconds": seconds,
+                "ok": ok,
+                "prompt_chars": len(prompt),
+                "prompt_tokens": prompt_tokens,
+                "response_chars": len(response_text),
+                "response_tokens": response_tokens,
+            })
+
+def record_fallback(provider: str, error: Exception):
+    """A provider failed and the call moved on"""
+    if not ENABLED:
+        return
+    LLM_FALLBACKS.inc(provider=provider)
+    trace = _current.get()
+    if trace is not None:
+        with trace._lock:
+            trace.fallbacks.append({"provider": provider, "error": f"{type(error).__name__}: {str(error)[:200]}"})
+
+def record_cache(cache: str, hit: bool):
+    """One cache lookup"""
+    if not ENABLED:
+        return
+    result = "hit" if hit else "miss"
+    CACHE_EVENTS.inc(cache=cache, result=result)
+    trace = _current.get()
+    if trace is not None:
+        with trace._lock:
+            trace.cache.append({"cache": cache, "result": result})
+
+def record_intents(messages: int, llm_fallbacks: int):
+    """Messages classified and how many of them needed the LLM"""
+    if not ENABLED:
+        return
+    if messages > llm_fallbacks:
+        INTENT_DECISIONS.inc(messages - llm_fallbacks, source="local")
+    if llm_fallbacks:
+        INTENT_DECISIONS.inc(llm_fallbacks, source="llm")
+
+def record_event(name: str, **fields):
+    """A notable step in the turn (e.g. a lead enqueued)"""
+    if not ENABLED:
+        return
+    trace = _current.get()
+    if trace is not None:
+        with trace._lock:
+            trace.events.append({"event": name, "at_s": trace.offset(), **fields})
@@ -0,0 +1,42 @@
+"""
+Templated replies that need no LLM call.
+
+- greetings with nothing else in them ("hi", "good morning!") get a fixed welcome
+- direct plan/policy lookups get an answer rendered from the KB
+  (data.rag_retriever.templated_answer)
+
+Anything more than that returns None and the turn goes to the LLM as before.
+"""
+
+from agent.intent_classifier import clean_text
+from data.rag_retriever import templated_answer
+
+GREETING_WORDS = {"hi", "hii", "hello", "hey", "heya", "hiya", "yo", "hola", "howdy", "greetings", "morning", "afternoon", "evening"}
+# may accompany a greeting word without changing the reply
+GREETING_FILLER = {"there", "good", "team", "all", "everyone", "folks", "again", "autostream"}
+
+GREETING_REPLY = (
+    "Hi! 👋 I'm the AutoStream assistant. I can walk you through our Basic and Pro plans, "
+    "pricing and policies, or help you get started. What would you like to know?"
+)
+
+def greeting_reply(user_message: str):
+    """The welcome reply if the message is only a greeting, else None"""
+    words = clean_text(user_message).split()
+    if not words or not any(w in GREETING_WORDS for w in words):
+        return None
+    if all(w in GREETING_WORDS or w in GREETING_FILLER for w in words):
+        return GREETING_REPLY
+    return None
+
+def kb_reply(user_message: str):
+    """Plan/policy answer rendered from the KB, or None if the LLM is needed"""
+    return templated_answer(user_message)
+
+def reply_for(intent: str, user_message: str):
+    """Templated reply for this intent and message, or None"""
+    if intent == "greeting":
+        return greeting_reply(user_message)
+    if intent == "product_inquiry":
+        return kb_reply(user_message)
+    return None
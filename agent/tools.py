@@ -2,29 +2,65 @@
 Tools for Inflx AI agent.
 
 Currently includes:
-- mock lead capture tool
+- mock lead capture tool, backed by the durable lead outbox (agent/lead_outbox.py)
 """
 
+import os
+import atexit
+import threading
+from agent.lead_outbox import LeadOutbox, http_sender, print_sender
+from agent import telemetry
+
+LEAD_OUTBOX_PATH = os.getenv(
+    "INFLX_LEAD_OUTBOX",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lead_outbox.sqlite"),
+)
+# unset: leads are printed instead of posted, as in the original mock
+CRM_WEBHOOK = os.getenv("INFLX_CRM_WEBHOOK")
+LEAD_BATCH_SIZE = int(os.getenv("INFLX_LEAD_BATCH_SIZE", "100"))
+LEAD_FLUSH_INTERVAL_S = float(os.getenv("INFLX_LEAD_FLUSH_INTERVAL_S", "1.0"))
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+def get_lead_outbox() -> LeadOutbox:
+    """Process-wide outbox; the background flusher starts on first use"""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                outbox = LeadOutbox(
+                    LEAD_OUTBOX_PATH,
+                    sender=http_sender(CRM_WEBHOOK) if CRM_WEBHOOK else print_sender,
+                    batch_size=LEAD_BATCH_SIZE,
+                    flush_interval_s=LEAD_FLUSH_INTERVAL_S,
+                )
+                outbox.start()
+                atexit.register(outbox.close)
+                _outbox = outbox
+    return _outbox
+
 def mock_lead_capture(name: str, email: str, platform: str) -> dict:
     """
-    Simulates sending captured lead details to CRM/webhook.
-    For assignment demo: we only print + return string.
+    Hands captured lead details to the CRM/webhook.
+    The lead is only enqueued in the outbox; delivery happens in the background.
     Args:
         name: Lead's name
         email: Lead's email
         platform: Platform of interest
     Returns:
-        Confirmation string
+        Confirmation dict; status is "queued", or "duplicate" if this email was already delivered
     """
     if not (name and email and platform):
         raise ValueError("All fields (name, email, platform) must be provided")
+    queued = get_lead_outbox().enqueue(name, email, platform)
+    telemetry.record_event("lead_enqueued", status=queued["status"])
     result = {
-    "status": "success",
+    "status": queued["status"],
     "name": name,
     "email": email,
     "platform": platform
     }
-    print(result)
     return result
 
 if __name__ == "__main__":
@@ -41,3 +77,5 @@ if __name__ == "__main__":
     print("Tool returned:", out)
     print("Collecting lead mode:", s.collecting_lead)
     print("Missing fields now:", s.missing_lead_fields())
+    get_lead_outbox().flush_once()
+    print("Outbox:", get_lead_outbox().stats())
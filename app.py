@@ -3,8 +3,10 @@ UI for Inflx Agent
 Uses streamlit for the frontend
 """
 
+import time
+import uuid
 import streamlit as st
-from agent.agent import app, AgentState
+from agent.agent import stream_turn, AgentState
 
 st.set_page_config(page_title="Inflx: AutoStream Support", page_icon="🤖", layout="centered")
 
@@ -22,7 +24,8 @@ st.markdown(
 if "state" not in st.session_state:
     st.session_state.state = AgentState()
 if "thread_id" not in st.session_state:
-    st.session_state.thread_id = "ui-thread-1"
+    # one checkpoint thread per browser session
+    st.session_state.thread_id = f"ui-{uuid.uuid4().hex}"
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
@@ -44,17 +47,32 @@ if user_input:
     # update LangGraph state
     st.session_state.state.user_message = user_input
 
-    # invoke graph
-    result = app.invoke(
-        st.session_state.state,
-        config={"configurable": {"thread_id": st.session_state.thread_id}},
-    )
+    # run graph, rendering reply chunks into the assistant bubble as they arrive
+    start = time.perf_counter()
+    first_token = None
+    streamed = ""
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        for kind, payload in stream_turn(
+            st.session_state.state,
+            {"configurable": {"thread_id": st.session_state.thread_id}},
+        ):
+            if kind == "chunk":
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                streamed += payload
+                placeholder.markdown(streamed + "▌")
+            else:
+                result = payload
 
-    reply = result["reply"]
+        reply = result["reply"]
+        total = time.perf_counter() - start
 
-    # show assistant text
+        # show assistant text
+        placeholder.markdown(reply)
+        ttft = f"{first_token:.2f}s" if first_token is not None else "n/a"
+        st.caption(f"first token {ttft} · total {total:.2f}s")
     st.session_state.messages.append(("assistant", reply))
-    st.chat_message("assistant").markdown(reply)
 
 # ✅ celebration if lead just captured
 if getattr(st.session_state.state.conversation, "lead_just_captured", False):
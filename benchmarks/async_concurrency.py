@@ -0,0 +1,82 @@
+"""
+Concurrency benchmark for the async agent path.
+
+Runs N one-turn conversations through app.invoke (one after another) and through
+app.ainvoke (all at once on one event loop) against a stub LLM that sleeps for
+a fixed provider latency, and reports wall time and turns/sec for both.
+
+Run from the repo root:
+    python -m benchmarks.async_concurrency [conversations]
+"""
+
+import sys
+import json
+import time
+import asyncio
+
+from agent import agent as agent_module
+from agent import intent_classifier
+
+CONVERSATIONS = 200
+PROVIDER_LATENCY_S = 0.05
+MESSAGES = ["hi there", "what are your plans", "what does the pro plan cost", "hmm ok"]
+
+class StubResponse:
+    """Mimics the .text attribute of the provider responses"""
+    def __init__(self, text):
+        self.text = text
+
+class StubLLM:
+    """Sleeps like a provider call and returns a fixed reply"""
+    def invoke(self, prompt, call_site=None):
+        time.sleep(PROVIDER_LATENCY_S)
+        return StubResponse("product_inquiry")
+
+    async def ainvoke(self, prompt, call_site=None):
+        await asyncio.sleep(PROVIDER_LATENCY_S)
+        return StubResponse("product_inquiry")
+
+    def stream(self, prompt, call_site=None):
+        yield self.invoke(prompt).text
+
+    async def astream(self, prompt, call_site=None):
+        yield (await self.ainvoke(prompt)).text
+
+def turn_input(i: int):
+    return agent_module.AgentState(user_message=MESSAGES[i % len(MESSAGES)])
+
+def config(i: int, mode: str):
+    return {"configurable": {"thread_id": f"bench-{mode}-{i}"}}
+
+def run_sync(n: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n):
+        agent_module.app.invoke(turn_input(i), config=config(i, "sync"))
+    return time.perf_counter() - t0
+
+async def run_async(n: int) -> float:
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        agent_module.app.ainvoke(turn_input(i), config=config(i, "async"))
+        for i in range(n)
+    ))
+    return time.perf_counter() - t0
+
+def run(n: int = CONVERSATIONS) -> dict:
+    stub = StubLLM()
+    agent_module.llm = stub
+    intent_classifier.llm = stub
+    sync_s = run_sync(n)
+    async_s = asyncio.run(run_async(n))
+    return {
+        "conversations": n,
+        "provider_latency_s": PROVIDER_LATENCY_S,
+        "sync_total_s": sync_s,
+        "sync_turns_per_s": n / sync_s,
+        "async_total_s": async_s,
+        "async_turns_per_s": n / async_s,
+    }
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else CONVERSATIONS
+    print(json.dumps(run(count), indent=2))
@@ -0,0 +1,55 @@
+"""
+Throughput of the bulk triage CLI (triage.py) on a synthetic comment export.
+
+Writes RECORDS JSONL lines built from the intent training texts plus noise
+(emails, platforms, short off-topic comments), then triages the file in this
+process (workers=0) and with 1, 2 and cpu_count() worker processes. LLM
+escalation goes to a stub with a fixed latency and no rate limit, so the
+numbers show the local stage and how few batched requests the escalations need.
+
+Run from the repo root:
+    python -m benchmarks.bulk_triage
+"""
+
+import os
+import json
+import random
+import tempfile
+
+os.environ.setdefault("INFLX_STUB_LLM_LATENCY_S", "0.05")
+
+import triage
+from agent import intent_classifier
+from models.intent_data import training_data
+
+RECORDS = 50_000
+SEED = 7
+NOISE = ["lol", "first!", "nice video bro", "ok", "🔥🔥", "my email is fan{n}@example.com",
+         "I post on instagram", "is this on youtube too?"]
+
+def write_export(path: str, records: int = RECORDS):
+    rng = random.Random(SEED)
+    texts = [x[0] for x in training_data]
+    with open(path, "w", encoding="utf-8") as f:
+        for n in range(records):
+            text = rng.choice(texts) if rng.random() < 0.7 else rng.choice(NOISE).format(n=n)
+            f.write(json.dumps({"id": n, "text": text}, ensure_ascii=False) + "\n")
+
+def run(records: int = RECORDS) -> dict:
+    tmp = tempfile.mkdtemp(prefix="inflx-triage-")
+    export = os.path.join(tmp, "export.jsonl")
+    write_export(export, records)
+    results = {}
+    for workers in sorted({0, 1, 2, os.cpu_count() or 1}):
+        intent_classifier.llm_cache.clear()
+        summary = triage.triage(export, os.path.join(tmp, f"out-{workers}.jsonl"), workers=workers, llm_rps=0)
+        results[f"workers_{workers}"] = {
+            key: summary[key] for key in (
+                "records", "wall_s", "records_per_s", "records_per_s_per_core", "records_per_cpu_s",
+                "escalated", "llm_requests",
+            )
+        }
+    return {"records": records, "cpu_count": os.cpu_count(), "runs": results}
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
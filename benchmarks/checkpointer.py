@@ -0,0 +1,118 @@
+"""
+Checkpointer benchmark: SqliteCheckpointer vs LangGraph's in-process MemorySaver.
+
+Simulates N conversations of TURNS turns each (a 5-turn ConversationState per
+checkpoint, the size the agent really stores). Reports put/get latency
+percentiles, peak resident memory and, for SQLite, the database size. Each saver
+runs in its own interpreter so their memory numbers do not mix.
+
+Run from the repo root:
+    python -m benchmarks.checkpointer [conversations]
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import subprocess
+import statistics
+
+CONVERSATIONS = 100_000
+TURNS = 3
+SAMPLE_EVERY = 50
+
+def make_state(turn: int):
+    from agent.state_manager import ConversationState
+    conv = ConversationState()
+    for i in range(turn * 2 + 1):
+        conv.add_turn("User" if i % 2 == 0 else "Assistant",
+                      f"message {i}: what does the pro plan include for my youtube channel?")
+    conv.last_intent = "product_inquiry"
+    conv.rag_used = True
+    return {
+        "user_message": "what does the pro plan include?",
+        "conversation": conv,
+        "rag_result": "Pro Plan details:\nPrice: $79/month\nLimits: Unlimited videos/month",
+        "reply": "The Pro plan is $79/month with unlimited videos and 4K.",
+    }
+
+def run_saver(kind: str, conversations: int) -> dict:
+    """Runs inside the child process"""
+    from langgraph.checkpoint.base import empty_checkpoint
+    from langgraph.checkpoint.base.id import uuid6
+    from langgraph.checkpoint.memory import MemorySaver
+    from agent.checkpointer import SqliteCheckpointer
+
+    db_path = None
+    if kind == "sqlite":
+        db_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+        saver = SqliteCheckpointer(db_path)
+    else:
+        saver = MemorySaver()
+
+    states = [make_state(t) for t in range(TURNS)]
+    put_ms, get_ms = [], []
+    for n in range(conversations):
+        config = {"configurable": {"thread_id": f"thread-{n}", "checkpoint_ns": ""}}
+        for turn in range(TURNS):
+            checkpoint = empty_checkpoint()
+            checkpoint["id"] = str(uuid6())
+            checkpoint["channel_values"] = states[turn]
+            checkpoint["channel_versions"] = {k: turn + 1 for k in states[turn]}
+            sample = n % SAMPLE_EVERY == 0
+            t0 = time.perf_counter()
+            config = saver.put(config, checkpoint, {"step": turn}, checkpoint["channel_versions"])
+            if sample:
+                put_ms.append((time.perf_counter() - t0) * 1000)
+        if n % SAMPLE_EVERY == 0:
+            t0 = time.perf_counter()
+            saver.get_tuple({"configurable": {"thread_id": f"thread-{n}", "checkpoint_ns": ""}})
+            get_ms.append((time.perf_counter() - t0) * 1000)
+
+    result = {
+        "conversations": conversations,
+        "turns": TURNS,
+        "put_p50_ms": statistics.median(put_ms),
+        "put_p99_ms": sorted(put_ms)[int(len(put_ms) * 0.99)],
+        "get_p50_ms": statistics.median(get_ms),
+        "get_p99_ms": sorted(get_ms)[int(len(get_ms) * 0.99)],
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    if db_path:
+        result["db_mb"] = sum(
+            os.path.getsize(db_path + suffix)
+            for suffix in ("", "-wal") if os.path.exists(db_path + suffix)
+        ) / 1e6
+        result["rows"] = saver.stats()
+    return result
+
+def run(conversations: int = CONVERSATIONS) -> dict:
+    """Runs both savers in fresh interpreters"""
+    results = {}
+    for kind in ("memory", "sqlite"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.checkpointer", str(conversations), "--child", kind],
+            capture_output=True, text=True, check=True,
+        )
+        results[kind] = json.loads(out.stdout.strip().splitlines()[-1])
+    return results
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Checkpointer latency and memory, SQLite vs MemorySaver")
+    parser.add_argument("conversations", nargs="?", type=int, default=CONVERSATIONS,
+                        help=f"conversations of {TURNS} turns each (default: {CONVERSATIONS})")
+    # internal: run() measures each saver in a fresh interpreter
+    parser.add_argument("--child", choices=("memory", "sqlite"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.conversations < 1:
+        parser.error("conversations must be at least 1")
+    if args.child:
+        print(json.dumps(run_saver(args.child, args.conversations)))
+    else:
+        print(json.dumps(run(args.conversations), indent=2))
+
+if __name__ == "__main__":
+    main()
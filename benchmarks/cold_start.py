@@ -0,0 +1,57 @@
+"""
+Cold-start benchmark for the local intent classifier.
+
+Measures import-to-first-classification time in a fresh interpreter for:
+- before: fitting the pipeline at import (the old behaviour of models/intent.py)
+- after: lazily loading the prebuilt artifact on the first classification
+
+Run from the repo root:
+    python -m benchmarks.cold_start
+"""
+
+import sys
+import json
+import subprocess
+import statistics
+
+RUNS = 5
+
+BEFORE = """
+import time
+t0 = time.perf_counter()
+from models.intent import train_pipeline
+clf = train_pipeline()
+label = clf.predict(["what are your plans"])[0]
+conf = clf.predict_proba(["what are your plans"]).max()
+print(time.perf_counter() - t0)
+"""
+
+AFTER = """
+import time
+t0 = time.perf_counter()
+from models.intent import classify_intent_local
+classify_intent_local("what are your plans")
+print(time.perf_counter() - t0)
+"""
+
+def time_fresh_process(code: str) -> float:
+    """Runs code in a new interpreter and returns the time it reports"""
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+def run(runs: int = RUNS) -> dict:
+    """Returns median cold-start seconds for both paths"""
+    before = [time_fresh_process(BEFORE) for _ in range(runs)]
+    after = [time_fresh_process(AFTER) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "train_at_import_s": statistics.median(before),
+        "prebuilt_artifact_s": statistics.median(after),
+    }
+
+if __name__ == "__main__":
+    results = run()
+    print(json.dumps(results, indent=2))
+    print(f"speedup: {results['train_at_import_s'] / results['prebuilt_artifact_s']:.2f}x")
@@ -0,0 +1,70 @@
+"""
+LLM calls per turn and turn latency: the graph (intent -> rag/lead -> llm) vs
+the fused single-call turn (INFLX_TURN_MODE=fused).
+
+Replays the conversations of benchmarks/prompt_budget.py (or a JSONL file with
+one {"messages": [...]} object per line) through both compiled graphs against a
+stub LLM with a fixed per-call latency, starting each mode from empty caches.
+
+Run from the repo root:
+    python -m benchmarks.fused_turn [conversations.jsonl]
+"""
+
+import sys
+import json
+import time
+import statistics
+
+from benchmarks.prompt_budget import load_conversations
+from agent import agent as agent_module
+from agent import intent_classifier, response_cache
+from agent.stub_llm import StubLLM
+
+STUB_LATENCY_S = 0.05
+
+def replay(app, conversations, label: str) -> dict:
+    llm = StubLLM(latency_s=STUB_LATENCY_S)
+    agent_module.llm = intent_classifier.llm = llm
+    # load the classifier and KB index outside the measurement
+    app.invoke({"user_message": "warm up"}, config={"configurable": {"thread_id": f"fused-bench-{label}-warmup"}})
+    response_cache.response_cache.clear()
+    intent_classifier.local_cache.clear()
+    intent_classifier.llm_cache.clear()
+
+    calls, latencies = [], []
+    for n, messages in enumerate(conversations):
+        config = {"configurable": {"thread_id": f"fused-bench-{label}-{n}"}}
+        for message in messages:
+            before = llm.calls
+            t0 = time.perf_counter()
+            app.invoke({"user_message": message}, config=config)
+            latencies.append(time.perf_counter() - t0)
+            calls.append(llm.calls - before)
+    latencies.sort()
+    return {
+        "turns": len(calls),
+        "llm_calls_total": sum(calls),
+        "llm_calls_per_turn": sum(calls) / len(calls),
+        "max_llm_calls_in_a_turn": max(calls),
+        "turns_with_2plus_calls": sum(1 for c in calls if c >= 2),
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1000,
+            "p50": statistics.median(latencies) * 1000,
+            "p95": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        },
+    }
+
+def run(path=None) -> dict:
+    conversations = load_conversations(path)
+    graph = replay(agent_module.graph_app, conversations, "graph")
+    fused = replay(agent_module.fused_app, conversations, "fused")
+    return {
+        "stub_latency_s": STUB_LATENCY_S,
+        "graph": graph,
+        "fused": fused,
+        "llm_call_reduction": 1 - fused["llm_calls_total"] / graph["llm_calls_total"],
+        "mean_latency_reduction": 1 - fused["latency_ms"]["mean"] / graph["latency_ms"]["mean"],
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(run(sys.argv[1] if len(sys.argv) > 1 else None), indent=2))
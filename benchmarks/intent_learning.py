@@ -0,0 +1,140 @@
+"""
+LLM intent fallbacks per 1k messages over time, with and without learning from
+the fallbacks (INFLX_INTENT_LEARNING, agent/intent_classifier.py).
+
+A stream of MESSAGES unique messages is generated from phrasings the shipped
+model has not seen, so the intent caches cannot help. Low-confidence messages
+go to a teacher stub that knows the right label. The same stream runs twice from a fresh model and an empty feedback file: learning
+off, then on. Reports the fallback rate per window of WINDOW messages, the
+accuracy against the teacher, and how long a retrain took.
+
+Run from the repo root:
+    python -m benchmarks.intent_learning
+"""
+
+import os
+import re
+import json
+import random
+import tempfile
+import threading
+import itertools
+
+_tmp = tempfile.mkdtemp(prefix="inflx-learning-")
+os.environ["INFLX_INTENT_FEEDBACK"] = os.path.join(_tmp, "intent_feedback.jsonl")
+
+from agent import intent_classifier
+from agent.stub_llm import StubResponse
+from models import intent as intent_model
+from models import intent_feedback
+
+MESSAGES = 6000
+WINDOW = 500
+SEED = 11
+
+# one word from each list; sign-up phrasings the shipped model is unsure about,
+# plus greetings and feature questions it mostly already handles
+PHRASES = {
+    "high_intent_lead": (
+        ["hey", "hi", "ok", "so"],
+        ["how do i", "where can i", "can i", "let me"],
+        ["checkout", "pay", "enroll", "purchase", "activate", "upgrade"],
+        ["pro", "basic", "plan", "pricing"],
+    ),
+    "greeting": (
+        ["hello", "hey", "hi", "good morning"],
+        ["friends", "partner", "crew", "mate", "everyone"],
+        ["", "again", "from berlin"],
+    ),
+    "product_inquiry": (
+        ["hey", "hi", "so", "ok"],
+        ["does it", "can it", "will it"],
+        ["transcode", "watermark", "schedule", "caption", "stitch", "livestream"],
+        ["shorts", "podcasts", "videos", "streams"],
+    ),
+}
+
+def make_stream(n: int = MESSAGES, seed: int = SEED) -> list:
+    """
+    (message, true label) pairs. Each message ends in a ticket number: the
+    model ignores it, but it makes the texts unique, so caches cannot help.
+    """
+    rng = random.Random(seed)
+    combos = [
+        (" ".join(w for w in parts if w), label)
+        for label, lists in PHRASES.items()
+        for parts in itertools.product(*lists)
+    ]
+    return [(f"{text} #{n}", label) for n, (text, label) in enumerate(rng.choice(combos) for _ in range(n))]
+
+class TeacherLLM:
+    """Answers the intent fallback with the true label of each message"""
+    _single = re.compile(r'User message: "(.*)"')
+    _numbered = re.compile(r'^\s*(\d+)\. "(.*)"$', re.MULTILINE)
+
+    def __init__(self, truth: dict):
+        self.truth = truth
+        self.calls = 0
+
+    def invoke(self, prompt, call_site=None):
+        self.calls += 1
+        numbered = self._numbered.findall(prompt)
+        if numbered:
+            return StubResponse("\n".join(f"{i}. {self.truth.get(t, 'product_inquiry')}" for i, t in numbered))
+        match = self._single.search(prompt)
+        return StubResponse(self.truth.get(match.group(1) if match else "", "product_inquiry"))
+
+def replay(stream: list, learning: bool) -> dict:
+    # fresh model, caches and feedback for each run
+    intent_model._classifier = None
+    intent_model.get_intent_classifier()
+    intent_classifier.local_cache.clear()
+    intent_classifier.llm_cache.clear()
+    intent_classifier.fallback_rate = intent_classifier.FallbackRate(window=WINDOW)
+    intent_classifier._learning.update(retrains=0, trained_examples=0, trained_at_added=0, last_retrain_s=None)
+    if os.path.exists(intent_feedback.FEEDBACK_PATH):
+        os.remove(intent_feedback.FEEDBACK_PATH)
+    intent_feedback._store = None
+    intent_classifier.set_learning(learning)
+
+    truth = {intent_classifier.clean_text(m): label for m, label in stream}
+    teacher = TeacherLLM(truth)
+    intent_classifier.llm = teacher
+    correct = 0
+    retrain_s = []
+    for message, label in stream:
+        before = intent_classifier._learning["retrains"]
+        correct += intent_classifier.classify_intent(message) == label
+        # retrains run in a background thread; wait so the replay is deterministic
+        for thread in [t for t in threading.enumerate() if t.name == "intent-retrain"]:
+            thread.join()
+        if intent_classifier._learning["retrains"] > before:
+            retrain_s.append(intent_classifier._learning["last_retrain_s"])
+    stats = intent_classifier.fallback_stats()
+    return {
+        "llm_calls": teacher.calls,
+        "llm_per_1k": stats["llm_per_1k"],
+        "llm_per_1k_by_window": [round(w["llm_per_1k"], 1) for w in stats["windows"]],
+        "accuracy": correct / len(stream),
+        "retrains": stats["learning"]["retrains"],
+        "learned_examples": stats["learning"]["trained_examples"],
+        "mean_retrain_ms": 1000 * sum(retrain_s) / len(retrain_s) if retrain_s else None,
+    }
+
+def run() -> dict:
+    stream = make_stream()
+    off = replay(stream, learning=False)
+    on = replay(stream, learning=True)
+    intent_classifier.set_learning(False)
+    return {
+        "messages": len(stream),
+        "unique_messages": len({m for m, _ in stream}),
+        "window": WINDOW,
+        "retrain_every": intent_classifier.RETRAIN_EVERY,
+        "learning_off": off,
+        "learning_on": on,
+        "llm_call_reduction": 1 - on["llm_calls"] / off["llm_calls"] if off["llm_calls"] else 0.0,
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
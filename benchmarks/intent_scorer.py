@@ -0,0 +1,93 @@
+"""
+Per-message latency and memory of the local intent model: the sklearn pipeline
+rebuilt from the artifact vs the NumPy IntentScorer (models/intent.py).
+
+- single message: pipeline predict + predict_proba (the old
+  classify_intent_local), pipeline predict_proba alone, IntentScorer.proba
+- batch of BATCH messages: pipeline predict_proba vs IntentScorer.predict_proba
+- agreement: the largest probability difference and the share of equal labels
+  over the training texts plus random word salads of them
+- memory: bytes allocated to build each model from the loaded artifact
+
+Run from the repo root:
+    python -m benchmarks.intent_scorer
+"""
+
+import json
+import time
+import random
+import tracemalloc
+
+import numpy as np
+
+from models.intent import IntentScorer, load_artifact, pipeline_from_artifact
+from models.intent_data import training_data
+from benchmarks.micro import MESSAGES
+
+BATCH = 1024
+REPEATS = 5
+SEED = 3
+
+def per_message_us(fn, messages, repeats: int = REPEATS) -> float:
+    """Best-of-repeats microseconds per message for fn(message)"""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for m in messages:
+            fn(m)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(messages) * 1e6
+
+def allocated_bytes(build) -> int:
+    tracemalloc.start()
+    model = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del model
+    return size
+
+def word_salad(n: int) -> list:
+    rng = random.Random(SEED)
+    words = [w for text, _ in training_data for w in text.split()]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(1, 25))) for _ in range(n)]
+
+def run() -> dict:
+    artifact = load_artifact()
+    pipeline = pipeline_from_artifact(artifact)
+    scorer = IntentScorer(artifact)
+
+    def pipeline_twice(m):
+        pipeline.predict([m])
+        pipeline.predict_proba([m])
+
+    single = MESSAGES * 40
+    batch = word_salad(BATCH)
+    check = [text for text, _ in training_data] + batch
+    expected = pipeline.predict_proba(check)
+    got = scorer.predict_proba(check)
+    got_single = np.vstack([scorer.proba(m) for m in check])
+
+    return {
+        "single_message_us": {
+            "pipeline_predict_and_proba": per_message_us(pipeline_twice, single),
+            "pipeline_proba": per_message_us(lambda m: pipeline.predict_proba([m]), single),
+            "numpy_scorer": per_message_us(scorer.proba, single),
+        },
+        f"batch_{BATCH}_us_per_message": {
+            "pipeline": per_message_us(lambda b: pipeline.predict_proba(b), [batch]) / BATCH,
+            "numpy_scorer": per_message_us(lambda b: scorer.predict_proba(b), [batch]) / BATCH,
+        },
+        "agreement": {
+            "messages": len(check),
+            "max_abs_proba_diff": float(max(np.abs(expected - got).max(), np.abs(expected - got_single).max())),
+            "same_label": float((expected.argmax(axis=1) == got.argmax(axis=1)).mean()),
+        },
+        "build_bytes": {
+            "pipeline": allocated_bytes(lambda: pipeline_from_artifact(artifact)),
+            "numpy_scorer": allocated_bytes(lambda: IntentScorer(artifact)),
+        },
+        "features": len(artifact["vocabulary"]),
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,74 @@
+"""
+Throughput benchmark for intent classification.
+
+Compares messages/sec of the per-message path (classify_intent_local in a loop)
+against the batched path (classify_intents_local) at batch sizes 1, 32 and 1024.
+Also reports how many LLM calls classify_intents makes per batch, with the LLM
+replaced by a stub that answers instantly.
+
+Run from the repo root:
+    python -m benchmarks.intent_throughput
+"""
+
+import json
+import time
+import itertools
+
+from models.intent import classify_intent_local, classify_intents_local
+from models.intent_data import training_data
+from agent import intent_classifier
+
+BATCH_SIZES = (1, 32, 1024)
+REPEATS = 3
+
+class StubResponse:
+    """Mimics the .text attribute of the provider responses"""
+    def __init__(self, text):
+        self.text = text
+
+class StubLLM:
+    """Answers every numbered item with product_inquiry and counts calls"""
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt, call_site=None):
+        self.calls += 1
+        n = prompt.count('. "')
+        return StubResponse("\n".join(f"{i}. product_inquiry" for i in range(1, n + 1)))
+
+def make_batch(size: int):
+    """Cycles through the training texts plus some unseen phrasing"""
+    pool = [x[0] for x in training_data] + ["ok cool", "hmm not sure", "tell me more"]
+    return list(itertools.islice(itertools.cycle(pool), size))
+
+def best_of(fn, repeats: int = REPEATS) -> float:
+    """Best wall time of several runs"""
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def run() -> dict:
+    """Returns messages/sec per batch size for both paths"""
+    classify_intent_local("warm up")
+    stub = StubLLM()
+    intent_classifier.llm = stub
+
+    results = {}
+    for size in BATCH_SIZES:
+        batch = make_batch(size)
+        single = best_of(lambda: [classify_intent_local(m) for m in batch])
+        batched = best_of(lambda: classify_intents_local(batch))
+        stub.calls = 0
+        intent_classifier.classify_intents(batch)
+        results[size] = {
+            "per_message_msgs_per_s": size / single,
+            "batched_msgs_per_s": size / batched,
+            "llm_calls_per_batch": stub.calls,
+        }
+    return results
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
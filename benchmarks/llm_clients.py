@@ -0,0 +1,142 @@
+"""
+Import time and first-call latency of the LLM provider clients (agent/llm_clients.py).
+
+A local stub serves the Gemini generateContent and Groq chat-completions
+endpoints over HTTP. Each new connection waits HANDSHAKE_S before its first
+response, standing in for the TCP + TLS setup a real provider costs. Every
+measurement runs in a fresh interpreter with INFLX_GEMINI_BASE_URL /
+INFLX_GROQ_BASE_URL pointed at the stub:
+- import: `import agent.agent` now, vs importing both SDKs and building both
+  clients (what state_manager used to do at import)
+- first call / second call through MultiLLM, cold (SDK import + connection
+  on the first call) vs after prewarm()
+- the first groq call after the gemini calls
+
+Run from the repo root:
+    python -m benchmarks.llm_clients
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RUNS = 5
+HANDSHAKE_S = 0.15
+STUB_LATENCY_S = 0.02
+
+class StubProviderHandler(BaseHTTPRequestHandler):
+    """Gemini + Groq compatible endpoints with a per-connection setup delay"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        time.sleep(HANDSHAKE_S)
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(STUB_LATENCY_S)
+        if self.path.endswith(":generateContent"):
+            self._send({"candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]},
+                                        "finishReason": "STOP"}]})
+        else:
+            self._send({
+                "id": "stub", "object": "chat.completion", "created": int(time.time()),
+                "model": "stub", "choices": [{"index": 0, "finish_reason": "stop",
+                                             "message": {"role": "assistant", "content": "ok"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            })
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubProviderHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+EAGER_IMPORT = """
+import time
+t0 = time.perf_counter()
+from google.genai import Client
+from langchain_groq import ChatGroq
+import os
+Client()
+ChatGroq(model="llama-3.1-8b-instant", api_key=os.getenv("GROQ_API_KEY"))
+print(json.dumps({"import_s": time.perf_counter() - t0}))
+"""
+
+LAZY_IMPORT = """
+import time
+t0 = time.perf_counter()
+import agent.agent
+print(json.dumps({"import_s": time.perf_counter() - t0}))
+"""
+
+CALLS = """
+import time
+from agent import llm_clients
+from agent.state_manager import get_llm
+result = {}
+if PREWARM:
+    t0 = time.perf_counter()
+    llm_clients.prewarm()
+    result["prewarm_s"] = time.perf_counter() - t0
+llm = get_llm()
+for key in ("first_call_s", "second_call_s"):
+    t0 = time.perf_counter()
+    llm._timed_call("gemini", "hello")
+    result[key] = time.perf_counter() - t0
+t0 = time.perf_counter()
+llm._timed_call("groq", "hello")
+result["first_groq_call_s"] = time.perf_counter() - t0
+print(json.dumps(result))
+"""
+
+def fresh(code: str, env: dict, **params) -> dict:
+    prelude = "import json\n" + "".join(f"{k} = {v!r}\n" for k, v in params.items())
+    out = subprocess.run([sys.executable, "-c", prelude + code], env=env,
+                         capture_output=True, text=True, check=True, timeout=120)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def median_of(runs: list) -> dict:
+    return {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+
+def run(runs: int = RUNS) -> dict:
+    server, url = start_stub()
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env.update({"INFLX_GEMINI_BASE_URL": url, "INFLX_GROQ_BASE_URL": url})
+    try:
+        return {
+            "handshake_s": HANDSHAKE_S,
+            "stub_latency_s": STUB_LATENCY_S,
+            "eager_clients_import": median_of([fresh(EAGER_IMPORT, env) for _ in range(runs)]),
+            "lazy_agent_import": median_of([fresh(LAZY_IMPORT, env) for _ in range(runs)]),
+            "cold": median_of([fresh(CALLS, env, PREWARM=False) for _ in range(runs)]),
+            "prewarmed": median_of([fresh(CALLS, env, PREWARM=True) for _ in range(runs)]),
+        }
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
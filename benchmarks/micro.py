@@ -0,0 +1,259 @@
+"""
+Component microbenchmarks with regression gates.
+
+Times the hot paths of a turn: clean_text, classify_intent_local,
+retrieve_from_kb, ConversationState.add_turn, the prompt built in each graph
+node, and a full app.invoke turn against a deterministic fake MultiLLM
+(agent/stub_llm.py with zero latency).
+
+Each benchmark reports the best per-call time over several auto-sized runs.
+Times are also divided by a pure-Python reference loop measured right before
+each benchmark, so a baseline recorded on one machine can gate runs on another
+and CPU frequency drift during a run cancels out. A benchmark that looks slower
+than its baseline by more than its tolerance is re-measured CONFIRM_RUNS times;
+the run fails (exit code 1) only if it stays slower.
+
+Run from the repo root:
+    python -m benchmarks.micro                 # compare against the baseline
+    python -m benchmarks.micro --save          # record a new baseline
+    python -m benchmarks.micro --only clean_text,add_turn --tolerance 0.5
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+
+# keep the benchmark's checkpoints and leads out of the repo
+_tmp = tempfile.mkdtemp(prefix="inflx-micro-")
+os.environ.setdefault("INFLX_CHECKPOINT_DB", os.path.join(_tmp, "checkpoints.sqlite"))
+os.environ.setdefault("INFLX_LEAD_OUTBOX", os.path.join(_tmp, "lead_outbox.sqlite"))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+DEFAULT_TOLERANCE = 0.25
+# noisier benchmarks get more room
+TOLERANCES = {
+    "app_invoke_turn": 0.5,
+}
+REPEATS = 7
+MIN_RUN_S = 0.1
+CONFIRM_RUNS = 2
+
+MESSAGES = [
+    "Hi there!",
+    "What does the Pro plan cost per month?",
+    "Do you offer refunds after 7 days?",
+    "I want to sign up for my YouTube channel",
+    "hmm not sure yet, tell me more about the basic plan limits",
+]
+
+BENCHMARKS = {}
+
+def bench(name: str):
+    """Registers a setup function that returns the operation to time"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+# ---- benchmarks ----
+@bench("reference_loop")
+def _reference_loop():
+    def op():
+        total = 0
+        for i in range(1000):
+            total += i * i
+        return total
+    return op
+
+@bench("clean_text")
+def _clean_text():
+    from agent.intent_classifier import clean_text
+    def op():
+        for m in MESSAGES:
+            clean_text(m)
+    return op
+
+@bench("classify_intent_local")
+def _classify_intent_local():
+    from models.intent import classify_intent_local
+    classify_intent_local("warm up")
+    def op():
+        for m in MESSAGES:
+            classify_intent_local(m)
+    return op
+
+@bench("retrieve_from_kb")
+def _retrieve_from_kb():
+    from data.rag_retriever import retrieve_from_kb
+    retrieve_from_kb("warm up")
+    def op():
+        for m in MESSAGES:
+            retrieve_from_kb(m)
+    return op
+
+@bench("add_turn")
+def _add_turn():
+    from agent.state_manager import ConversationState
+    conv = ConversationState()
+    def op():
+        for m in MESSAGES:
+            conv.add_turn("User", m)
+    return op
+
+def _node_state():
+    from agent.agent import AgentState
+    from agent.state_manager import ConversationState
+    conv = ConversationState()
+    for i, m in enumerate(MESSAGES):
+        conv.add_turn("User" if i % 2 == 0 else "Assistant", m)
+    conv.last_intent = "product_inquiry"
+    conv.rag_used = True
+    conv.collecting_lead = True
+    conv.name = "Sam"
+    return AgentState(
+        user_message=MESSAGES[1],
+        conversation=conv,
+        rag_result="Pro Plan details:\nPrice: $79/month\nVideos: Unlimited videos/month\nResolution: 4K",
+    )
+
+@bench("prompt_intent_node")
+def _prompt_intent_node():
+    from agent.intent_classifier import _intent_prompt
+    def op():
+        for m in MESSAGES:
+            _intent_prompt(m)
+    return op
+
+@bench("prompt_lead_node")
+def _prompt_lead_node():
+    from agent.agent import _extraction_prompt
+    state = _node_state()
+    return lambda: _extraction_prompt(state, ["email", "platform"])
+
+@bench("prompt_llm_node")
+def _prompt_llm_node():
+    from agent.agent import _response_prompt
+    state = _node_state()
+    return lambda: _response_prompt(state)
+
+@bench("app_invoke_turn")
+def _app_invoke_turn():
+    from agent import agent as agent_module
+    from agent import intent_classifier, response_cache
+    from agent.stub_llm import StubLLM
+    agent_module.llm = intent_classifier.llm = StubLLM(latency_s=0.0)
+    config = {"configurable": {"thread_id": "micro-bench"}}
+    agent_module.app.invoke({"user_message": MESSAGES[0]}, config=config)
+    def op():
+        # a product question that goes all the way to the (fake) LLM every time
+        # (MESSAGES[1] is a direct plan lookup, answered from a template)
+        response_cache.response_cache.clear()
+        agent_module.app.invoke({"user_message": MESSAGES[2]}, config=config)
+    return op
+
+# ---- runner ----
+def time_op(op, repeats: int = REPEATS) -> float:
+    """Best seconds per call; loops are sized so each run takes at least MIN_RUN_S"""
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            op()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= MIN_RUN_S:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(MIN_RUN_S / elapsed * 1.2))
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            op()
+        best = min(best, (time.perf_counter() - t0) / loops)
+    return best
+
+def measure(name: str) -> dict:
+    """Times one benchmark next to the reference loop"""
+    reference = time_op(BENCHMARKS["reference_loop"]())
+    us = time_op(BENCHMARKS[name]())
+    return {"us_per_op": us * 1e6, "relative": us / reference}
+
+def run(names=None) -> dict:
+    """us per call and reference-normalized cost for each benchmark"""
+    return {name: measure(name) for name in names or BENCHMARKS}
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+def save_baseline(results: dict, path: str = BASELINE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"machine": machine(), "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(results: dict, baseline: dict, tolerance=None) -> list:
+    """
+    Regressions beyond tolerance, compared on the reference-normalized cost.
+    :return: list of (name, baseline_relative, relative, slowdown)
+    """
+    regressions = []
+    for name, r in results.items():
+        if name == "reference_loop" or name not in baseline["results"]:
+            continue
+        allowed = tolerance if tolerance is not None else TOLERANCES.get(name, DEFAULT_TOLERANCE)
+        before = baseline["results"][name]["relative"]
+        slowdown = r["relative"] / before - 1
+        r["vs_baseline"] = slowdown
+        if slowdown > allowed:
+            regressions.append((name, before, r["relative"], slowdown))
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inflx AI component microbenchmarks")
+    parser.add_argument("--save", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--tolerance", type=float, help="override every per-benchmark tolerance")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else None
+    unknown = [n for n in names or [] if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)} (known: {', '.join(BENCHMARKS)})")
+    results = run(names)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(json.dumps(results, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(json.dumps(results, indent=2))
+        print(f"No baseline at {args.baseline}; run with --save to record one")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for _ in range(CONFIRM_RUNS):
+        if not regressions:
+            break
+        # keep the best of the original and the re-measurements
+        for name, *_ in regressions:
+            again = measure(name)
+            if again["relative"] < results[name]["relative"]:
+                results[name] = again
+        regressions = compare(results, baseline, args.tolerance)
+    print(json.dumps(results, indent=2))
+    if baseline.get("machine") != machine():
+        print(f"note: baseline recorded on {baseline.get('machine')}; comparing reference-normalized costs")
+    for name, before, after, slowdown in regressions:
+        print(f"REGRESSION {name}: {before:.3f} -> {after:.3f} reference units ({slowdown:+.0%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Prompt size with and without the per-call-site token budgets (agent/prompt_budget.py).
+
+Replays conversations through the graph against a stub LLM that records every
+prompt, once with budgets off (the previous, unbounded prompts) and once with
+them on. Reports prompt tokens per call site (mean, p95, max), the time spent
+building the prompts, and a modeled provider latency: a fixed per-call cost plus
+prefill time proportional to prompt tokens (the part a smaller prompt saves).
+
+Conversations are built in by default, including one with a long pasted
+message; recorded ones can be replayed from a JSONL file with one
+{"messages": [...]} object per line.
+
+Run from the repo root:
+    python -m benchmarks.prompt_budget [conversations.jsonl]
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import statistics
+
+_tmp = tempfile.mkdtemp(prefix="inflx-prompt-")
+os.environ.setdefault("INFLX_CHECKPOINT_DB", os.path.join(_tmp, "checkpoints.sqlite"))
+os.environ.setdefault("INFLX_LEAD_OUTBOX", os.path.join(_tmp, "lead_outbox.sqlite"))
+
+from agent import agent as agent_module
+from agent import intent_classifier, prompt_budget, response_cache
+from agent.stub_llm import StubLLM
+from agent.telemetry import estimate_tokens
+
+# modeled provider latency per call
+BASE_LATENCY_S = 0.25
+PREFILL_TOKENS_PER_S = 4000
+
+PASTE = (
+    "Here is the error log from our encoder, sorry it is long. "
+    + "frame=1200 fps=29.9 q=28.0 size=10240kB time=00:00:40.00 bitrate=2097.2kbits/s speed=0.99x " * 60
+)
+
+CONVERSATIONS = [
+    ["hi", "what plans do you have?", "what does the pro plan cost?", "does basic have 4k?",
+     "what is the refund policy?", "is there 24/7 support?", "ok thanks"],
+    ["hello", PASTE, "can the pro plan handle that bitrate?", "what about captions?",
+     "and the refund policy?", "how much is basic?", "cool"],
+    ["I want to sign up for the pro plan", "I'm Sam", "sam@example.com", "YouTube",
+     "what does pro include?", "thanks!"],
+    ["hey", "tell me about pricing " + "I run three channels and post daily, " * 30,
+     "I want to try it", "my name is Alex Kim", "alex@example.com", "Instagram"],
+]
+
+class RecordingLLM(StubLLM):
+    """Zero-latency stub that keeps the size of every prompt"""
+    def __init__(self):
+        super().__init__(latency_s=0.0)
+        self.prompts = []
+
+    def _answer(self, prompt, call_site):
+        self.prompts.append((call_site or "unknown", estimate_tokens(prompt)))
+        return super()._answer(prompt, call_site)
+
+def load_conversations(path=None) -> list:
+    if path is None:
+        return CONVERSATIONS
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["messages"] for line in f if line.strip()]
+
+def replay(conversations, budgets: bool, label: str) -> dict:
+    prompt_budget.set_enabled(budgets)
+    llm = RecordingLLM()
+    agent_module.llm = intent_classifier.llm = llm
+    response_cache.response_cache.clear()
+    intent_classifier.llm_cache.clear()
+
+    # prompt building time, measured on the final state of each conversation
+    build_s = []
+    for n, messages in enumerate(conversations):
+        config = {"configurable": {"thread_id": f"prompt-bench-{label}-{n}"}}
+        for message in messages:
+            agent_module.app.invoke({"user_message": message}, config=config)
+        state = agent_module.AgentState(**agent_module.app.get_state(config).values)
+        state.rag_result = state.rag_result or "Pro Plan details:\nPrice: $79/month"
+        t0 = time.perf_counter()
+        for _ in range(200):
+            agent_module._response_prompt(state)
+        build_s.append((time.perf_counter() - t0) / 200)
+
+    by_site = {}
+    for site, tokens in llm.prompts:
+        by_site.setdefault(site, []).append(tokens)
+    report = {}
+    for site, tokens in sorted(by_site.items()):
+        tokens.sort()
+        report[site] = {
+            "calls": len(tokens),
+            "mean_tokens": statistics.mean(tokens),
+            "p95_tokens": tokens[int(0.95 * (len(tokens) - 1))],
+            "max_tokens": tokens[-1],
+        }
+    total = sum(tokens for _, tokens in llm.prompts)
+    modeled = [BASE_LATENCY_S + tokens / PREFILL_TOKENS_PER_S for _, tokens in llm.prompts]
+    return {
+        "prompt_tokens_total": total,
+        "by_call_site": report,
+        "modeled_llm_ms_mean": statistics.mean(modeled) * 1000,
+        "response_prompt_build_us": statistics.mean(build_s) * 1e6,
+    }
+
+def run(path=None) -> dict:
+    conversations = load_conversations(path)
+    before = replay(conversations, budgets=False, label="off")
+    after = replay(conversations, budgets=True, label="on")
+    prompt_budget.set_enabled(True)
+    return {
+        "conversations": len(conversations),
+        "turns": sum(len(m) for m in conversations),
+        "budgets": {site: b._asdict() for site, b in prompt_budget.BUDGETS.items()},
+        "unbounded": before,
+        "budgeted": after,
+        "prompt_token_reduction": 1 - after["prompt_tokens_total"] / before["prompt_tokens_total"],
+        "modeled_latency_reduction": 1 - after["modeled_llm_ms_mean"] / before["modeled_llm_ms_mean"],
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(run(sys.argv[1] if len(sys.argv) > 1 else None), indent=2))
@@ -0,0 +1,126 @@
+"""
+Load benchmark for server.py against the stub LLM.
+
+Starts the server in a subprocess (INFLX_STUB_LLM_LATENCY_S set, temporary
+checkpoint and outbox files), then runs USERS concurrent users that each send
+TURNS turns one after another over POST /chat. Reports turns/sec, latency
+percentiles and 503s for 1 and 2 workers, and for a deliberately small
+admission limit to show load shedding instead of unbounded queueing.
+
+Run from the repo root:
+    python -m benchmarks.server_load [users]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import tempfile
+import statistics
+import subprocess
+
+import httpx
+
+USERS = 200
+TURNS = 3
+STUB_LATENCY_S = 0.05
+# users share a bounded connection pool, like clients behind a proxy
+CLIENT_CONNECTIONS = 64
+MESSAGES = ["hi there", "what are your plans", "what does the pro plan cost", "hmm ok"]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(directory: str, workers: int, extra_env=None):
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "INFLX_STUB_LLM_LATENCY_S": str(STUB_LATENCY_S),
+        "INFLX_CHECKPOINT_DB": os.path.join(directory, f"checkpoints-{port}.sqlite"),
+        "INFLX_LEAD_OUTBOX": os.path.join(directory, f"outbox-{port}.sqlite"),
+    })
+    env.update(extra_env or {})
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "server", "--port", str(port), "--workers", str(workers)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/healthz", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+async def user_session(client: httpx.AsyncClient, url: str, user: int, latencies: list,
+                       server_times: list, codes: dict):
+    for turn in range(TURNS):
+        t0 = time.perf_counter()
+        response = await client.post(f"{url}/chat", json={
+            "user_id": f"bench-{user}", "message": MESSAGES[(user + turn) % len(MESSAGES)],
+        })
+        codes[response.status_code] = codes.get(response.status_code, 0) + 1
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - t0)
+            server_times.append(response.json()["total_s"])
+
+def percentiles_ms(values) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        "p50": statistics.median(values) * 1000,
+        "p99": values[int(0.99 * (len(values) - 1))] * 1000,
+    }
+
+async def load(url: str, users: int) -> dict:
+    latencies, server_times, codes = [], [], {}
+    limits = httpx.Limits(max_connections=CLIENT_CONNECTIONS, max_keepalive_connections=CLIENT_CONNECTIONS)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(user_session(client, url, u, latencies, server_times, codes) for u in range(users)))
+        elapsed = time.perf_counter() - t0
+    return {
+        "turns_ok": len(latencies),
+        "status_codes": codes,
+        "turns_per_s": len(latencies) / elapsed,
+        # client view includes waiting for a pooled connection and for admission
+        "client_ms": percentiles_ms(latencies),
+        # time the graph took once the turn was admitted
+        "server_turn_ms": percentiles_ms(server_times),
+    }
+
+def scenario(directory: str, users: int, workers: int, extra_env=None) -> dict:
+    proc, url = start_server(directory, workers, extra_env)
+    try:
+        result = asyncio.run(load(url, users))
+        result["workers"] = workers
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+def run(users: int = USERS) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        return {
+            "users": users,
+            "turns_per_user": TURNS,
+            "stub_latency_s": STUB_LATENCY_S,
+            "1_worker": scenario(directory, users, 1),
+            "2_workers": scenario(directory, users, 2),
+            "shedding": scenario(directory, users, 1, {
+                "INFLX_SERVER_MAX_INFLIGHT": "16",
+                "INFLX_SERVER_MAX_QUEUE": "16",
+                "INFLX_SERVER_QUEUE_TIMEOUT_S": "0.5",
+            }),
+        }
+
+if __name__ == "__main__":
+    print(json.dumps(run(int(sys.argv[1]) if len(sys.argv) > 1 else USERS), indent=2))
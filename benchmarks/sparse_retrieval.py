@@ -0,0 +1,79 @@
+"""
+Benchmark for the BM25 retriever (data/sparse_retriever.py).
+
+Builds indexes over synthetic help-center chunks (Zipf-distributed vocabulary)
+and reports build time, index memory and top-k query latency at 1k, 10k and
+100k chunks.
+
+Run from the repo root:
+    python -m benchmarks.sparse_retrieval [sizes...]
+"""
+
+import json
+import time
+import statistics
+import numpy as np
+
+from data.sparse_retriever import BM25Index, render_context
+
+SIZES = (1_000, 10_000, 100_000)
+VOCAB_SIZE = 30_000
+WORDS_PER_CHUNK = 80
+QUERIES = 200
+TOP_K = 5
+SEED = 7
+
+def synthetic_chunks(n: int, rng) -> list:
+    """n chunks of Zipf-distributed pseudo-words"""
+    vocab = np.array([f"w{i}" for i in range(VOCAB_SIZE)])
+    ids = np.minimum(rng.zipf(1.2, size=n * WORDS_PER_CHUNK), VOCAB_SIZE) - 1
+    words = vocab[ids].reshape(n, WORDS_PER_CHUNK)
+    return [
+        {"id": f"doc-{i}#0", "title": f"article {i}", "text": " ".join(row)}
+        for i, row in enumerate(words)
+    ]
+
+def percentile(values, q):
+    return float(np.percentile(values, q))
+
+def run(sizes=SIZES) -> dict:
+    """Returns build/memory/latency figures per corpus size"""
+    rng = np.random.default_rng(SEED)
+    results = {}
+    for n in sizes:
+        chunks = synthetic_chunks(n, rng)
+        t0 = time.perf_counter()
+        index = BM25Index.build(chunks)
+        build_s = time.perf_counter() - t0
+
+        queries = [
+            " ".join(f"w{int(i)}" for i in rng.integers(0, 2_000, size=4))
+            for _ in range(QUERIES)
+        ]
+        latencies = []
+        for q in queries:
+            t0 = time.perf_counter()
+            render_context(index.search(q, k=TOP_K), token_budget=800)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        results[n] = {
+            "build_s": build_s,
+            "index_mb": index.memory_bytes() / 1e6,
+            "terms": len(index.vocabulary),
+            "query_p50_ms": statistics.median(latencies),
+            "query_p95_ms": percentile(latencies, 95),
+        }
+    return results
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="BM25 build time, index memory and query latency by corpus size")
+    parser.add_argument("sizes", nargs="*", type=int, default=list(SIZES),
+                        help=f"corpus sizes in chunks (default: {' '.join(map(str, SIZES))})")
+    args = parser.parse_args(argv)
+    if any(n < 1 for n in args.sizes):
+        parser.error("sizes must be at least 1")
+    print(json.dumps(run(tuple(args.sizes)), indent=2))
+
+if __name__ == "__main__":
+    main()
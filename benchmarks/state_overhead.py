@@ -0,0 +1,104 @@
+"""
+Per-turn state overhead: the ring-buffer ConversationState vs the previous model.
+
+The previous model (validate_assignment on, EmailStr, a list of pydantic Turn
+models re-sliced on every add_turn, transcript re-joined for every prompt) is
+kept here as LegacyConversationState so the two can be measured side by side.
+Reports microseconds per operation for add_turn, field assignment and building
+the prompt transcript, plus the serialized checkpoint size of a full state.
+
+Run from the repo root:
+    python -m benchmarks.state_overhead
+"""
+
+import json
+import time
+from typing import ClassVar, List, Optional
+
+from pydantic import BaseModel, EmailStr, Field
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from agent.state_manager import ConversationState
+from agent.checkpointer import CompactSerializer
+
+N = 20_000
+MESSAGE = "what does the pro plan include for my youtube channel? I post about twice a week"
+
+class LegacyTurn(BaseModel):
+    role: str = Field(..., description="User or Assistant")
+    content: str
+
+class LegacyConversationState(BaseModel):
+    """ConversationState as it was before the ring buffer"""
+    MAX_TURNS: ClassVar[int] = 5
+
+    history: List[LegacyTurn] = Field(default_factory=list)
+    last_intent: Optional[str] = None
+    rag_used: bool = False
+    lead_just_captured: bool = False
+    collecting_lead: bool = False
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    platform: Optional[str] = None
+
+    class Config:
+        validate_assignment = True
+        arbitrary_types_allowed = True
+
+    def add_turn(self, role: str, message: str):
+        self.history.append(LegacyTurn(role=role.lower(), content=message))
+        self.history = self.history[-self.MAX_TURNS:]
+
+    @property
+    def transcript(self) -> str:
+        return "\n".join(f"{turn.role}: {turn.content}" for turn in self.history)
+
+def per_op_us(fn, n: int = N) -> float:
+    """Microseconds per call of fn, best of three runs"""
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        best = min(best, time.perf_counter() - t0)
+    return best / n * 1e6
+
+def full_state(cls):
+    conv = cls()
+    for i in range(cls.MAX_TURNS):
+        conv.add_turn("User" if i % 2 == 0 else "Assistant", MESSAGE)
+    conv.last_intent = "high_intent_lead"
+    conv.collecting_lead = True
+    conv.name = "Sam"
+    conv.email = "sam@example.com"
+    conv.platform = "YouTube"
+    return conv
+
+def measure(cls) -> dict:
+    conv = full_state(cls)
+    # a turn touches history once per message and reads the transcript for each LLM prompt
+    return {
+        "add_turn_us": per_op_us(lambda i: conv.add_turn("User", MESSAGE)),
+        "assign_email_us": per_op_us(lambda i: setattr(conv, "email", "sam@example.com")),
+        "assign_intent_us": per_op_us(lambda i: setattr(conv, "last_intent", "product_inquiry")),
+        "transcript_us": per_op_us(lambda i: conv.transcript),
+        "turn_us": per_op_us(lambda i: (
+            conv.add_turn("User", MESSAGE),
+            setattr(conv, "last_intent", "product_inquiry"),
+            conv.transcript,
+            conv.add_turn("Assistant", MESSAGE),
+        )),
+        "checkpoint_bytes_jsonplus": len(JsonPlusSerializer().dumps_typed(conv)[1]),
+    }
+
+def run() -> dict:
+    legacy = measure(LegacyConversationState)
+    lean = measure(ConversationState)
+    lean["checkpoint_bytes_compact"] = len(CompactSerializer().dumps_typed(full_state(ConversationState))[1])
+    return {
+        "legacy": legacy,
+        "ring_buffer": lean,
+        "turn_speedup": legacy["turn_us"] / lean["turn_us"],
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
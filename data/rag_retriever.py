@@ -1,86 +1,316 @@
 """
 RAG-based knowledge retriever for Inflx-AI's AutoStream product.
 Features:
-- NLTK lemmatization of user query
-- Multi-attribute detection
+- Multi-attribute detection on query tokens
 - Explicit plan detection (Basic/Pro)
 - retrieves from knowledge_base.json
+
+The KB is compiled once into a KnowledgeIndex (token -> section lookups plus
+pre-rendered answers). Direct lookups ("pro plan price", "refund policy") can
+also be answered to the user straight from the KB, see templated_answer. The
+index is rebuilt only when the file's mtime changes and its content hash
+differs, so a query is a handful of dict lookups.
+
+The retrieval backend is pluggable via INFLX_RETRIEVER:
+- "rules" (default): the KnowledgeIndex above
+- "bm25": chunked BM25 top-k over the KB or the INFLX_KB_DOCS JSONL corpus,
+  see data/sparse_retriever.py
 """
 
+import os
 import json
+import time
+import hashlib
+import threading
 from agent.intent_classifier import clean_text
 
-KB_PATH = "data/knowledge_base.json"
+KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json")
+# how often (seconds) retrieval is allowed to stat the KB file for changes
+RELOAD_CHECK_INTERVAL = 2.0
+
+RETRIEVER = os.getenv("INFLX_RETRIEVER", "rules")
+# optional JSONL corpus for the bm25 backend; defaults to documents built from KB_PATH
+KB_DOCS_PATH = os.getenv("INFLX_KB_DOCS")
+RAG_TOP_K = int(os.getenv("INFLX_RAG_TOP_K", "5"))
+# max tokens of retrieved context handed to the LLM prompt
+RAG_TOKEN_BUDGET = int(os.getenv("INFLX_RAG_TOKEN_BUDGET", "800"))
+
+PRICING_SECTION = "AutoStream Pricing & Features"
+POLICY_SECTION = "Company Policies"
+
+GENERIC_PLAN_TERMS = {"plan", "pricing", "subscription"}
+ATTRIBUTE_MAP = {
+    "price": "Price",
+    "cost": "Price",
+    "limit": "Limits",
+    "video": "Limits",
+    "quality": "Quality",
+    "resolution": "Quality",
+    "feature": "Additional Features",
+    "caption": "Additional Features",
+    "refund": POLICY_SECTION,
+    "support": POLICY_SECTION,
+}
 
-def load_kb():
+# words a templated answer may contain besides KB terms; any other word means
+# the question asks for more than a lookup and goes to the LLM
+TEMPLATE_FILLER_WORDS = {
+    "what", "whats", "is", "are", "the", "a", "an", "of", "for", "on", "in", "do",
+    "does", "how", "much", "your", "you", "about", "tell", "me", "i", "can", "get",
+    "with", "and", "per", "month", "its", "it", "to", "show", "give", "please",
+    "details", "detail", "info", "information", "which", "have", "has", "any",
+    "include", "includes", "offer", "policy", "policies", "my", "there", "again",
+}
+# "features" of a plan means all of its details, not only "Additional Features"
+TEMPLATE_GENERIC_TERMS = {"feature"}
+TEMPLATE_PLAN_FOLLOW_UP = "Want help choosing a plan or getting started?"
+TEMPLATE_POLICY_FOLLOW_UP = "Anything else I can help with?"
+
+FALLBACK_ANSWER = (
+    "AutoStream offers Basic and Pro plans. "
+    "Ask about price, limits, quality, features, refunds, or support for more details."
+)
+
+def load_kb(path: str = KB_PATH):
     """Load the knowledge base from a JSON file."""
-    with open(KB_PATH, "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 def format_plan(plan_name: str, kb):
     """Format the plan details from the knowledge base."""
-    plan_data = kb["AutoStream Pricing & Features"][plan_name]
+    plan_data = kb[PRICING_SECTION][plan_name]
     lines = [f"{k}: {v}" for k, v in plan_data.items()]
     return f"{plan_name} details:\n" + "\n".join(lines)
 
-def retrieve_from_kb(user_query: str) -> str:
+class KnowledgeIndex:
+    """
+    Compiled, read-only view of one version of the knowledge base.
+
+    - plan_terms: query token -> plan name ("basic" -> "Basic Plan")
+    - token_index: query token -> KB section (attributes, generic plan words)
+    - answers: pre-rendered answer strings, rendered once per KB version
+    """
+    def __init__(self, kb: dict, version: str):
+        self.version = version
+        self.kb = kb
+
+        plans = kb[PRICING_SECTION]
+        self.plan_order = list(plans)
+        self.plan_terms = {name.split()[0].lower(): name for name in plans}
+
+        self.token_index = {}
+        for term in GENERIC_PLAN_TERMS:
+            self.token_index[term] = PRICING_SECTION
+        for term, section in ATTRIBUTE_MAP.items():
+            self.token_index[term] = section
+
+        rendered = [format_plan(name, kb) for name in plans]
+        self.answers = {name: text for name, text in zip(plans, rendered)}
+        self.answers["all_plans"] = "\n\n".join(rendered)
+        self.answers[POLICY_SECTION] = (
+            f"{POLICY_SECTION}:\n- " + "\n- ".join(kb[POLICY_SECTION])
+        )
+        self.answers["fallback"] = FALLBACK_ANSWER
+        # templated replies, rendered on first use per (plans, attributes, policy terms)
+        self.templates = {}
+
+    @staticmethod
+    def _lookup(table: dict, token: str):
+        """Dict lookup that also accepts simple plurals ("plans", "videos")"""
+        hit = table.get(token)
+        if hit is None and token.endswith("s"):
+            hit = table.get(token[:-1])
+        return hit
+
+    def retrieve(self, text: str) -> str:
+        """Answers an already cleaned query"""
+        mentioned_plans = set()
+        generic_plan_mentioned = False
+        detected_attributes = set()
+
+        for token in text.split():
+            plan_name = self._lookup(self.plan_terms, token)
+            if plan_name is not None:
+                mentioned_plans.add(plan_name)
+            section = self._lookup(self.token_index, token)
+            if section == PRICING_SECTION:
+                generic_plan_mentioned = True
+            elif section is not None:
+                detected_attributes.add(section)
+
+        # ---------------- policy handling ----------------
+        if POLICY_SECTION in detected_attributes:
+            return self.answers[POLICY_SECTION]
+
+        # ---------------- explicit plan mentioned → ALWAYS full plan ----------------
+        # (if several are named, the first one in KB order wins)
+        for plan in self.plan_order:
+            if plan in mentioned_plans:
+                return self.answers[plan]
+
+        # ---------------- generic plan or attributes → return BOTH full plans ----------------
+        if generic_plan_mentioned or detected_attributes:
+            return self.answers["all_plans"]
+
+        # ---------------- generic fallback ----------------
+        return self.answers["fallback"]
+
+    def template_answer(self, text: str):
+        """
+        User-facing reply rendered from the KB for a direct lookup in an already
+        cleaned query, or None when the question needs the LLM (a word that is
+        neither a KB term nor filler, no KB term at all, or a missing attribute).
+        """
+        plans, attributes, policy_terms = set(), set(), set()
+        found = False
+        for token in text.split():
+            plan_name = self._lookup(self.plan_terms, token)
+            section = self._lookup(self.token_index, token)
+            if plan_name is not None:
+                plans.add(plan_name)
+                found = True
+            elif token in TEMPLATE_GENERIC_TERMS or token[:-1] in TEMPLATE_GENERIC_TERMS:
+                found = True
+            elif section == POLICY_SECTION:
+                policy_terms.add(token if token in ATTRIBUTE_MAP else token[:-1])
+            elif section == PRICING_SECTION:
+                found = True
+            elif section is not None:
+                attributes.add(section)
+                found = True
+            elif token not in TEMPLATE_FILLER_WORDS:
+                return None
+        if not found and not policy_terms:
+            return None
+
+        key = (frozenset(plans), frozenset(attributes), frozenset(policy_terms))
+        if key not in self.templates:
+            self.templates[key] = self._render_template(plans, attributes, policy_terms)
+        return self.templates[key]
+
+    def _render_template(self, plans, attributes, policy_terms):
+        if policy_terms:
+            policies = self.kb[POLICY_SECTION]
+            lines = [p for p in policies if any(t in p.lower() for t in policy_terms)] or policies
+            header = "Here's our policy:" if len(lines) == 1 else "Here are our policies:"
+            return f"{header}\n- " + "\n- ".join(lines) + f"\n\n{TEMPLATE_POLICY_FOLLOW_UP}"
+
+        pricing = self.kb[PRICING_SECTION]
+        names = [name for name in self.plan_order if name in plans] or self.plan_order
+        if len(names) == 1:
+            data = pricing[names[0]]
+            keys = [k for k in data if k in attributes] if attributes else list(data)
+            if len(keys) < len(attributes):
+                return None
+            lines = [f"{k}: {data[k]}" for k in keys]
+            header = f"Here's what I have on the {names[0]}:"
+        else:
+            lines = []
+            for name in names:
+                data = pricing[name]
+                keys = [k for k in data if k in attributes] if attributes else list(data)
+                if plans and len(keys) < len(attributes):
+                    return None
+                if keys:
+                    lines.append(f"{name} — " + ", ".join(f"{k}: {data[k]}" for k in keys))
+            if not lines:
+                return None
+            header = "Here's how our plans compare:"
+        return f"{header}\n- " + "\n- ".join(lines) + f"\n\n{TEMPLATE_PLAN_FOLLOW_UP}"
+
+class _IndexHolder:
+    """Keeps the current KnowledgeIndex and swaps it when the KB file changes"""
+    def __init__(self, path: str):
+        self.path = path
+        self.index = None
+        self.mtime = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+
+    def _rebuild(self, mtime):
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            version = hashlib.sha256(raw).hexdigest()
+            if self.index is None or self.index.version != version:
+                self.index = KnowledgeIndex(json.loads(raw), version)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            if self.index is None:
+                raise
+            # a half-written or invalid KB: keep serving the last good version
+            # until the file changes again
+            print(f"[rag] could not reload {self.path}, keeping version {self.index.version[:12]}: {type(e).__name__}: {e}")
+        self.mtime = mtime
+
+    def get(self) -> KnowledgeIndex:
+        """Returns the index, stat-ing the file at most every RELOAD_CHECK_INTERVAL"""
+        now = time.monotonic()
+        if self.index is not None and now - self.last_check < RELOAD_CHECK_INTERVAL:
+            return self.index
+        with self.lock:
+            self.last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                if self.index is None:
+                    raise
+                # keep serving the last good version if the file vanished mid-edit
+                return self.index
+            if self.index is None or mtime != self.mtime:
+                self._rebuild(mtime)
+            return self.index
+
+_holder = _IndexHolder(KB_PATH)
+
+def get_knowledge_index() -> KnowledgeIndex:
+    """Process-wide index for KB_PATH, reloaded when the file changes"""
+    return _holder.get()
+
+def kb_version() -> str:
+    """Content hash of the knowledge base currently being served"""
+    return get_knowledge_index().version
+
+_sparse = {"source": None, "index": None}
+_sparse_lock = threading.Lock()
+
+def get_sparse_index():
+    """Lazily loads (or builds) the BM25 index for the configured corpus"""
+    # imported here so the default rules backend never pays for numpy/scipy
+    from data import sparse_retriever
+
+    source = KB_DOCS_PATH or kb_version()
+    if _sparse["source"] != source:
+        with _sparse_lock:
+            if _sparse["source"] != source:
+                if KB_DOCS_PATH:
+                    docs = sparse_retriever.load_documents(KB_DOCS_PATH)
+                else:
+                    docs = sparse_retriever.kb_documents(get_knowledge_index().kb)
+                _sparse["index"] = sparse_retriever.load_or_build_index(docs)
+                _sparse["source"] = source
+    return _sparse["index"]
+
+def retrieve_sparse(user_query: str, k: int = RAG_TOP_K, token_budget: int = RAG_TOKEN_BUDGET) -> str:
+    """Top-k BM25 retrieval, packed into at most token_budget tokens"""
+    from data.sparse_retriever import render_context
+
+    results = get_sparse_index().search(user_query, k=k)
+    return render_context(results, token_budget)
+
+def retrieve_from_kb(user_query: str, token_budget: int = RAG_TOKEN_BUDGET) -> str:
     """Retrieve relevant information from the knowledge base based on the user query."""
-    kb = load_kb()
-    text = clean_text(user_query)
-
-    # ---------------- detect explicit plan ----------------
-    plan = None
-    if "basic" in text:
-        plan = "Basic Plan"
-    elif "pro" in text:
-        plan = "Pro Plan"
-
-    # ---------------- detect generic plan language ----------------
-    generic_plan_terms = {"plan", "plans", "pricing", "subscription"}
-    generic_plan_mentioned = any(term in text for term in generic_plan_terms)
-
-    # ---------------- attribute detection ----------------
-    attribute_map = {
-        "price": "Price",
-        "cost": "Price",
-        "limit": "Limits",
-        "video": "Limits",
-        "quality": "Quality",
-        "resolution": "Quality",
-        "feature": "Additional Features",
-        "caption": "Additional Features",
-        "refund": "Company Policies",
-        "support": "Company Policies",
-    }
-
-    detected_attributes = {attribute_map[t] for t in text if t in attribute_map}
-
-    # ---------------- policy handling ----------------
-    if "Company Policies" in detected_attributes:
-        return "Company Policies:\n- " + "\n- ".join(kb["Company Policies"])
-
-    # ---------------- explicit plan mentioned → ALWAYS full plan ----------------
-    if plan:
-        return format_plan(plan, kb)
-
-    # ---------------- generic plan mentioned → return BOTH full plans ----------------
-    if generic_plan_mentioned:
-        basic = format_plan("Basic Plan", kb)
-        pro = format_plan("Pro Plan", kb)
-        return basic + "\n\n" + pro
-
-    # ---------------- attributes mentioned but no specific plan ----------------
-    if detected_attributes:
-        # return BOTH plans with full info (no partial loss)
-        basic = format_plan("Basic Plan", kb)
-        pro = format_plan("Pro Plan", kb)
-        return basic + "\n\n" + pro
-
-    # ---------------- generic fallback ----------------
-    return (
-        "AutoStream offers Basic and Pro plans. "
-        "Ask about price, limits, quality, features, refunds, or support for more details."
-    )
+    if RETRIEVER == "bm25":
+        return retrieve_sparse(user_query, token_budget=token_budget)
+    return get_knowledge_index().retrieve(clean_text(user_query))
+
+def templated_answer(user_query: str):
+    """
+    Reply for a direct plan/policy lookup rendered from the KB, or None if the
+    question needs the LLM. Only the rules backend has structured answers.
+    """
+    if RETRIEVER != "rules":
+        return None
+    return get_knowledge_index().template_answer(clean_text(user_query))
 
 if __name__ == "__main__":
     test_queries = [
@@ -99,4 +329,4 @@ if __name__ == "__main__":
 
     for query in test_queries:
         result = retrieve_from_kb(query)
-        print(f"Query: '{query}'\nRetrieved Info:\n{result}\n{'-'*50}")
+        print(f"Query: '{query}'\nRetrieved Info:\n{result}\nTemplated reply: {templated_answer(query)}\n{'-'*50}")
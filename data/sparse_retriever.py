@@ -0,0 +1,301 @@
+"""
+Sparse (BM25) retriever for large knowledge bases.
+
+The rule-based KnowledgeIndex in data/rag_retriever.py is enough for the demo KB,
+but does not scale to thousands of help-center articles. This module:
+- chunks documents into passages of at most CHUNK_WORDS words
+- builds a BM25-weighted term matrix offline and persists it to disk
+- answers top-k queries by summing matrix columns (one vectorized pass)
+- packs the best chunks into a context string under a token budget
+
+Documents are dicts with "id", "title" and "text". By default they are derived
+from knowledge_base.json; larger corpora can be passed as a JSONL file.
+
+Build / rebuild the persisted index with:
+    python -m data.sparse_retriever --build [--docs path/to/docs.jsonl]
+"""
+
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+from scipy import sparse
+from agent.intent_classifier import clean_text
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kb_index.npz")
+INDEX_FORMAT_VERSION = 1
+
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 20
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting"""
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+def kb_documents(kb: dict) -> list:
+    """Flattens the structured knowledge_base.json into retrievable documents"""
+    docs = []
+    for plan_name, plan_data in kb.get("AutoStream Pricing & Features", {}).items():
+        lines = [f"{k}: {v}" for k, v in plan_data.items()]
+        docs.append({
+            "id": plan_name.lower().replace(" ", "-"),
+            "title": f"{plan_name} details",
+            "text": "\n".join(lines),
+        })
+    policies = kb.get("Company Policies", [])
+    if policies:
+        docs.append({
+            "id": "company-policies",
+            "title": "Company Policies",
+            "text": "\n".join(f"- {p}" for p in policies),
+        })
+    return docs
+
+def load_documents(path: str) -> list:
+    """Reads documents from a JSONL file (one {"id", "title", "text"} per line)"""
+    docs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                docs.append(json.loads(line))
+    return docs
+
+def tokenize(text: str) -> list:
+    """clean_text + whitespace split, with plural "s" stripped ("refunds" -> "refund")"""
+    return [
+        t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+        for t in clean_text(text).split()
+    ]
+
+def chunk_documents(docs, chunk_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list:
+    """
+    Splits documents into chunks of at most chunk_words words.
+    Lines are packed greedily so short KB entries keep their line breaks; the
+    last line of a chunk is repeated in the next one if it is within `overlap`
+    words. The title is kept on every chunk for matching and for the prompt.
+    """
+    if overlap >= chunk_words:
+        raise ValueError("overlap must be smaller than chunk_words")
+    chunks = []
+    for doc in docs:
+        pieces = []
+        for line in doc["text"].splitlines():
+            words = line.split()
+            for start in range(0, len(words), chunk_words):
+                pieces.append(words[start:start + chunk_words])
+
+        current = []
+        n = 0
+        for piece in pieces:
+            size = sum(len(p) for p in current)
+            if current and size + len(piece) > chunk_words:
+                chunks.append(_make_chunk(doc, n, current))
+                n += 1
+                current = [current[-1]] if len(current[-1]) <= overlap else []
+                if current and len(current[0]) + len(piece) > chunk_words:
+                    current = []
+            current.append(piece)
+        if current:
+            chunks.append(_make_chunk(doc, n, current))
+    return chunks
+
+def _make_chunk(doc, n: int, lines) -> dict:
+    return {
+        "id": f"{doc['id']}#{n}",
+        "title": doc.get("title", ""),
+        "text": "\n".join(" ".join(words) for words in lines),
+    }
+
+def _pack_strings(strings):
+    """Stores strings as one utf-8 byte blob plus offsets (fixed-width str arrays waste memory)"""
+    encoded = [x.encode("utf-8") for x in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack_strings(blob, offsets) -> list:
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+def corpus_hash(chunks) -> str:
+    """Identifies the chunk set an index was built from"""
+    h = hashlib.sha256()
+    for c in chunks:
+        h.update(c["id"].encode("utf-8"))
+        h.update(b"\0")
+        h.update(c["text"].encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+class BM25Index:
+    """
+    Precomputed BM25 weights in a CSC matrix (chunks x terms).
+    Scoring a query sums the columns of its terms, so a query costs
+    O(postings of the query terms) and no Python loop over chunks.
+    """
+    def __init__(self, weights, vocabulary: dict, chunks: list, source_hash: str):
+        self.weights = weights.tocsc()
+        self.vocabulary = vocabulary
+        self.chunks = chunks
+        self.source_hash = source_hash
+
+    @classmethod
+    def build(cls, chunks, k1: float = BM25_K1, b: float = BM25_B):
+        """Builds the index from chunk dicts (offline step)"""
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        texts = [f"{c['title']} {c['text']}" for c in chunks]
+        # same tokenizer as search(), so query terms line up with the vocabulary
+        counter = CountVectorizer(analyzer=tokenize, dtype=np.float32)
+        tf = counter.fit_transform(texts).tocsr()
+
+        n_docs = tf.shape[0]
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avg_len = doc_len.mean() if n_docs else 0.0
+        df = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len)), per non-zero
+        norm = k1 * (1 - b + b * doc_len / (avg_len or 1.0))
+        row_norm = np.repeat(norm, np.diff(tf.indptr)).astype(np.float32)
+        tf.data = idf[tf.indices] * tf.data * (k1 + 1) / (tf.data + row_norm)
+
+        vocabulary = {t: int(i) for t, i in counter.vocabulary_.items()}
+        return cls(tf, vocabulary, chunks, corpus_hash(chunks))
+
+    def save(self, path: str = INDEX_PATH):
+        """Persists the index as a single .npz (no pickling)"""
+        terms = [None] * len(self.vocabulary)
+        for term, i in self.vocabulary.items():
+            terms[i] = term
+        arrays = {}
+        for name, strings in (
+            ("terms", terms),
+            ("chunk_ids", [c["id"] for c in self.chunks]),
+            ("chunk_titles", [c["title"] for c in self.chunks]),
+            ("chunk_texts", [c["text"] for c in self.chunks]),
+        ):
+            arrays[f"{name}_blob"], arrays[f"{name}_offsets"] = _pack_strings(strings)
+
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            format_version=np.array(INDEX_FORMAT_VERSION),
+            source_hash=np.array(self.source_hash),
+            data=self.weights.data,
+            indices=self.weights.indices,
+            indptr=self.weights.indptr,
+            shape=np.array(self.weights.shape),
+            **arrays,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH):
+        """Loads a persisted index, returns None if missing or of another format"""
+        try:
+            f = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        with f:
+            if "format_version" not in f or int(f["format_version"]) != INDEX_FORMAT_VERSION:
+                return None
+            weights = sparse.csc_matrix(
+                (f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"])
+            )
+            strings = {
+                name: _unpack_strings(f[f"{name}_blob"], f[f"{name}_offsets"])
+                for name in ("terms", "chunk_ids", "chunk_titles", "chunk_texts")
+            }
+            vocabulary = {t: i for i, t in enumerate(strings["terms"])}
+            chunks = [
+                {"id": i, "title": t, "text": x}
+                for i, t, x in zip(strings["chunk_ids"], strings["chunk_titles"], strings["chunk_texts"])
+            ]
+            return cls(weights, vocabulary, chunks, str(f["source_hash"]))
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the index: scoring structures plus the stored chunks"""
+        m = self.weights
+        size = m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+        size += sys.getsizeof(self.vocabulary) + sum(sys.getsizeof(t) for t in self.vocabulary)
+        size += sys.getsizeof(self.chunks)
+        for chunk in self.chunks:
+            size += sys.getsizeof(chunk) + sum(sys.getsizeof(v) for v in chunk.values())
+        return size
+
+    def search(self, query: str, k: int = 5):
+        """Returns up to k (chunk, score) pairs, best first"""
+        term_ids = [self.vocabulary[t] for t in set(tokenize(query)) if t in self.vocabulary]
+        if not term_ids:
+            return []
+        scores = np.asarray(self.weights[:, term_ids].sum(axis=1)).ravel()
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunks[i], float(scores[i])) for i in top if scores[i] > 0]
+
+def render_context(results, token_budget: int) -> str:
+    """
+    Concatenates retrieved chunks best-first until the token budget is used.
+    The last chunk that does not fit is cut at a word boundary instead of dropped.
+    """
+    parts = []
+    remaining = token_budget
+    for chunk, _ in results:
+        block = f"{chunk['title']}:\n{chunk['text']}" if chunk["title"] else chunk["text"]
+        cost = estimate_tokens(block)
+        if cost <= remaining:
+            parts.append(block)
+            remaining -= cost
+            continue
+        if remaining > 16:
+            cut = block[: remaining * 4].rsplit(" ", 1)[0]
+            parts.append(cut + " …")
+        break
+    return "\n\n".join(parts)
+
+def build_index(docs, path: str = INDEX_PATH) -> BM25Index:
+    """Offline step: chunk, index and persist"""
+    index = BM25Index.build(chunk_documents(docs))
+    index.save(path)
+    return index
+
+def load_or_build_index(docs, path: str = INDEX_PATH) -> BM25Index:
+    """Loads the persisted index, rebuilding it if it was built from other documents"""
+    chunks = chunk_documents(docs)
+    index = BM25Index.load(path)
+    if index is None or index.source_hash != corpus_hash(chunks):
+        index = BM25Index.build(chunks)
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"[rag] could not write sparse index: {e}")
+    return index
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the persisted BM25 index of the knowledge base")
+    parser.add_argument("--build", action="store_true", help=f"build the index and write it to {INDEX_PATH}")
+    parser.add_argument("--docs", metavar="PATH", help="JSONL of {id, title, text} documents (default: knowledge_base.json)")
+    args = parser.parse_args(argv)
+    if not args.build:
+        if args.docs:
+            parser.error("--docs is only used with --build")
+        parser.print_help()
+        return 0
+    if args.docs:
+        documents = load_documents(args.docs)
+    else:
+        from data.rag_retriever import load_kb
+        documents = kb_documents(load_kb())
+    built = build_index(documents)
+    print(f"Wrote {INDEX_PATH} ({len(built.chunks)} chunks, {len(built.vocabulary)} terms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
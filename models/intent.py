@@ -1,29 +1,283 @@
 """
 Trains a classifier for intent detecting using tfidf and logistic regression
+
+The fitted model is shipped as a versioned artifact (models/intent_model.json)
+holding the vocabulary, idf weights, coefficients, label set and a hash of the
+training data. Nothing is trained at import: the artifact is loaded lazily on
+the first classification and the model is retrained only when the artifact is
+missing or stale. retrain() refits it in-process on extra examples (the
+labels learned from LLM fallbacks, models/intent_feedback.py) and swaps it in.
+
+Rebuild the artifact after editing models/intent_data.py with:
+    python -m models.intent --build
 """
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import Pipeline
+import os
+import re
+import sys
+import json
+import hashlib
+import threading
 from models.intent_data import training_data
 
-texts = [x[0] for x in training_data]
-labels = [x[1] for x in training_data]
+ARTIFACT_VERSION = 1
+ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_model.json")
+NGRAM_RANGE = (1, 2)
+# TfidfVectorizer's default token_pattern, applied after lowercasing
+TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+_classifier = None
+_model_version = None
+_classifier_lock = threading.Lock()
+
+def training_data_hash(data=None) -> str:
+    """Stable hash of the training examples, used to detect a stale artifact"""
+    data = training_data if data is None else data
+    payload = json.dumps([list(x) for x in data], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def train_pipeline(data=None):
+    """Fits the tfidf + logistic regression pipeline on the training data"""
+    # sklearn is only imported when we actually have to train
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    data = training_data if data is None else data
+    texts = [x[0] for x in data]
+    labels = [x[1] for x in data]
+
+    pipeline = Pipeline([
+        ('tfidf', TfidfVectorizer(ngram_range=NGRAM_RANGE)),
+        ('clf', LogisticRegression())
+    ])
+    pipeline.fit(texts, labels)
+    return pipeline
+
+def export_artifact(pipeline, data=None) -> dict:
+    """Serializes a fitted pipeline into a plain JSON-compatible dict"""
+    tfidf = pipeline.named_steps["tfidf"]
+    clf = pipeline.named_steps["clf"]
+    return {
+        "version": ARTIFACT_VERSION,
+        "training_data_hash": training_data_hash(data),
+        "ngram_range": list(NGRAM_RANGE),
+        "labels": [str(c) for c in clf.classes_],
+        "vocabulary": {term: int(idx) for term, idx in sorted(tfidf.vocabulary_.items())},
+        "idf": [float(x) for x in tfidf.idf_],
+        "coef": [[float(x) for x in row] for row in clf.coef_],
+        "intercept": [float(x) for x in clf.intercept_],
+    }
+
+def save_artifact(artifact: dict, path: str = ARTIFACT_PATH):
+    """Writes the artifact atomically so readers never see a half-written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_artifact(path: str = ARTIFACT_PATH):
+    """Loads the artifact from disk, returns None if it is missing or unreadable"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_stale(artifact) -> bool:
+    """True if the artifact was built by another format version or other training data"""
+    if not artifact:
+        return True
+    return (
+        artifact.get("version") != ARTIFACT_VERSION
+        or artifact.get("training_data_hash") != training_data_hash()
+    )
+
+def build_artifact(path: str = ARTIFACT_PATH) -> dict:
+    """Build step: trains the model and writes the artifact to disk"""
+    artifact = export_artifact(train_pipeline())
+    save_artifact(artifact, path)
+    return artifact
+
+def pipeline_from_artifact(artifact: dict):
+    """Rebuilds a ready-to-use sklearn pipeline from an artifact without fitting"""
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    tfidf = TfidfVectorizer(
+        ngram_range=tuple(artifact["ngram_range"]),
+        vocabulary=artifact["vocabulary"],
+    )
+    tfidf.idf_ = np.asarray(artifact["idf"], dtype=np.float64)
 
-intent_classifier = Pipeline([
-    ('tfidf', TfidfVectorizer(ngram_range=(1,2))),
-    ('clf', LogisticRegression())
-])
+    clf = LogisticRegression()
+    clf.classes_ = np.asarray(artifact["labels"])
+    clf.coef_ = np.asarray(artifact["coef"], dtype=np.float64)
+    clf.intercept_ = np.asarray(artifact["intercept"], dtype=np.float64)
 
-intent_classifier.fit(texts, labels)
+    return Pipeline([('tfidf', tfidf), ('clf', clf)])
+
+class IntentScorer:
+    """
+    The artifact's TF-IDF + logistic regression model scored directly in NumPy.
+    Gives the same probabilities as pipeline_from_artifact() without sklearn's
+    per-call input validation and sparse matrices, and without importing sklearn.
+    Each message is tokenized and its unigrams and bigrams looked up in the
+    vocabulary; the batch is then scored in one pass: counts weighted by idf,
+    l2-normalized per message, multiplied by the coefficient rows of the
+    present features and summed per message, softmax.
+    """
+    __slots__ = ("vocabulary", "ngram_range", "classes_", "idf", "coef_t", "intercept")
+
+    def __init__(self, artifact: dict):
+        import numpy as np
+        self.vocabulary = artifact["vocabulary"]
+        self.ngram_range = tuple(artifact["ngram_range"])
+        self.classes_ = np.asarray(artifact["labels"])
+        self.idf = np.asarray(artifact["idf"], dtype=np.float64)
+        # one row per feature, so the features of a message are a row gather
+        self.coef_t = np.ascontiguousarray(np.asarray(artifact["coef"], dtype=np.float64).T)
+        self.intercept = np.asarray(artifact["intercept"], dtype=np.float64)
+
+    def term_counts(self, message: str) -> dict:
+        """feature index -> count of the message's in-vocabulary n-grams"""
+        tokens = TOKEN_RE.findall(message.lower())
+        low, high = self.ngram_range
+        grams = tokens if low == 1 else []
+        for n in range(max(low, 2), high + 1):
+            if n == 2:
+                grams = grams + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            else:
+                grams = grams + [" ".join(g) for g in zip(*(tokens[k:] for k in range(n)))]
+        get = self.vocabulary.get
+        counts = {}
+        for gram in grams:
+            idx = get(gram)
+            if idx is not None:
+                counts[idx] = counts.get(idx, 0) + 1
+        return counts
+
+    def decision_function(self, messages) -> "np.ndarray":
+        """Class scores; the whole batch is one gather and one bincount per class"""
+        import numpy as np
+        rows, idx, tf = [], [], []
+        for row, message in enumerate(messages):
+            counts = self.term_counts(message)
+            rows += [row] * len(counts)
+            idx += counts.keys()
+            tf += counts.values()
+        n = len(messages)
+        scores = np.empty((n, len(self.intercept)))
+        scores[:] = self.intercept
+        if idx:
+            rows = np.asarray(rows, dtype=np.intp)
+            idx = np.asarray(idx, dtype=np.intp)
+            x = np.asarray(tf, dtype=np.float64) * self.idf[idx]
+            x /= np.sqrt(np.bincount(rows, weights=x * x, minlength=n))[rows]
+            weighted = self.coef_t[idx] * x[:, None]
+            for k in range(scores.shape[1]):
+                scores[:, k] += np.bincount(rows, weights=weighted[:, k], minlength=n)
+        return scores
+
+    def predict_proba(self, messages) -> "np.ndarray":
+        import numpy as np
+        scores = self.decision_function(messages)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, messages) -> "np.ndarray":
+        return self.classes_[self.decision_function(messages).argmax(axis=1)]
+
+    def proba(self, message: str) -> "np.ndarray":
+        """predict_proba of a single message, without the batch bookkeeping"""
+        import numpy as np
+        counts = self.term_counts(message)
+        scores = self.intercept.copy()
+        if counts:
+            idx = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+            x = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[idx]
+            x /= np.sqrt(x @ x)
+            scores += x @ self.coef_t[idx]
+        scores = np.exp(scores - scores.max())
+        return scores / scores.sum()
+
+def load_intent_classifier(path: str = ARTIFACT_PATH):
+    """
+    Loads the classifier from the artifact, retraining only if it is missing or stale.
+    A freshly trained model is written back so the next process can reuse it.
+    """
+    artifact = load_artifact(path)
+    if is_stale(artifact):
+        artifact = export_artifact(train_pipeline())
+        try:
+            save_artifact(artifact, path)
+        except OSError as e:
+            print(f"[intent] could not write model artifact: {e}")
+    return IntentScorer(artifact), artifact["training_data_hash"]
+
+def get_intent_classifier():
+    """Returns the process-wide classifier, loading it on first use"""
+    global _classifier, _model_version
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier, _model_version = load_intent_classifier()
+    return _classifier
+
+def model_version() -> str:
+    """Identifier of the loaded model; changes whenever the model is retrained"""
+    get_intent_classifier()
+    return _model_version
+
+def retrain(extra_examples) -> str:
+    """
+    Fits the model on training_data plus extra (text, label) examples and swaps
+    it in. Classifications already running finish on the old model.
+    The artifact on disk is left as built from training_data alone.
+    :return: the new model version
+    """
+    global _classifier, _model_version
+    texts = {x[0] for x in training_data}
+    data = list(training_data) + [tuple(x) for x in extra_examples if x[0] not in texts]
+    artifact = export_artifact(train_pipeline(data), data)
+    classifier = IntentScorer(artifact)
+    with _classifier_lock:
+        _classifier, _model_version = classifier, artifact["training_data_hash"]
+    return _model_version
+
+def classify_intents_local(messages):
+    """
+    Batch version of classify_intent_local.
+    Takes both the label and the confidence from a single predict_proba call.
+
+    :param messages: list of (cleaned) messages
+    :return: list of (label, confidence) tuples, in input order
+    """
+    if not messages:
+        return []
+    intent_classifier = get_intent_classifier()
+    probs = intent_classifier.predict_proba(list(messages))
+    best = probs.argmax(axis=1)
+    classes = intent_classifier.classes_
+    return [(str(classes[i]), float(probs[row, i])) for row, i in enumerate(best)]
 
 def classify_intent_local(message):
     """Uses tfidf vectors for classification, done locally"""
-    label = intent_classifier.predict([message])[0]
-    confidence = intent_classifier.predict_proba([message]).max()
-    return label, float(confidence)
+    intent_classifier = get_intent_classifier()
+    probs = intent_classifier.proba(message)
+    best = probs.argmax()
+    return str(intent_classifier.classes_[best]), float(probs[best])
 
 if __name__ == "__main__":
+    if "--build" in sys.argv:
+        built = build_artifact()
+        print(f"Wrote {ARTIFACT_PATH} ({len(built['vocabulary'])} features, labels={built['labels']})")
+        sys.exit(0)
+
     test_messages = [
         "Hello!",
         "What are your pricing plans?",
@@ -0,0 +1,336 @@
+"""
+Evaluates the local intent model on held-out labeled messages and calibrates
+the confidence threshold below which a message goes to the LLM.
+
+- every held-out message (models/intent_eval_data.py, or --data JSONL files of
+  {"text", "label"} rows) is scored by classify_intent_local
+- the confidence is calibrated per predicted label with isotonic regression of
+  "the label was right" on the raw confidence; the expected calibration error
+  (ECE) is reported before and after, the latter cross-fitted over FOLDS folds
+- a table of global thresholds shows the LLM fallback rate, the accuracy of the
+  messages kept local and the overall accuracy if the LLM is right
+  --llm-accuracy of the time
+- per label, the recommended threshold is the lowest one at which the messages
+  kept local are expected to be right --target-accuracy of the time, i.e. the
+  fewest fallbacks that still meet the target. Labels with fewer than
+  MIN_SUPPORT predictions keep the default threshold.
+- the fallback rate and accuracy reported for the recommended thresholds are
+  cross-fitted: each fold is scored with thresholds recommended on the other
+  FOLDS - 1 folds. The in-sample figures (thresholds fit on all messages, then
+  scored on the same ones) are shown too, but overstate the gain.
+
+--save writes the recommendation to models/intent_thresholds.json
+(INFLX_INTENT_THRESHOLDS points elsewhere), which agent/intent_classifier.py
+loads instead of its THRESHOLD constant. Re-run after rebuilding the model.
+
+Run from the repo root:
+    python -m models.intent_eval [--target-accuracy 0.9] [--save]
+"""
+
+import os
+import sys
+import json
+import time
+
+DEFAULT_THRESHOLD = 0.40
+TARGET_ACCURACY = 0.90
+LLM_ACCURACY = 0.97
+MIN_SUPPORT = 10
+FOLDS = 5
+SEED = 7
+THRESHOLDS_VERSION = 1
+THRESHOLDS_PATH = os.getenv("INFLX_INTENT_THRESHOLDS") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "intent_thresholds.json"
+)
+TABLE_THRESHOLDS = [round(0.30 + 0.05 * i, 2) for i in range(14)]
+
+# ---- thresholds file ----
+def load_thresholds(path: str = THRESHOLDS_PATH):
+    """Loads a saved recommendation, returns None if it is missing, unreadable or of another version"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(saved, dict) or saved.get("version") != THRESHOLDS_VERSION:
+        return None
+    return saved
+
+def save_thresholds(saved: dict, path: str = THRESHOLDS_PATH):
+    """Writes the recommendation atomically so readers never see a half-written file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(saved, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+# ---- scoring ----
+def load_labeled(path: str) -> list:
+    """(text, label) pairs from a JSONL file of {"text", "label"} rows"""
+    examples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                examples.append((row["text"], row["label"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return examples
+
+def score(examples) -> list:
+    """(true label, predicted label, confidence) for every (text, label) example"""
+    from agent.intent_classifier import clean_text
+    from models.intent import classify_intent_local
+    rows = []
+    for text, label in examples:
+        predicted, confidence = classify_intent_local(clean_text(text))
+        rows.append((label, predicted, confidence))
+    return rows
+
+# ---- calibration ----
+def fit_calibrator(confidences, correct):
+    """Isotonic map raw confidence -> probability of being right, as (x, y) knots"""
+    import numpy as np
+    from sklearn.isotonic import IsotonicRegression
+    if len(set(confidences)) < 2:
+        p = float(np.mean(correct)) if len(correct) else 0.0
+        return [0.0, 1.0], [p, p]
+    iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip")
+    iso.fit(np.asarray(confidences, dtype=np.float64), np.asarray(correct, dtype=np.float64))
+    return [float(x) for x in iso.X_thresholds_], [float(y) for y in iso.y_thresholds_]
+
+def calibrate(calibrator, confidences):
+    import numpy as np
+    x, y = calibrator
+    return np.interp(np.asarray(confidences, dtype=np.float64), x, y)
+
+def fit_calibrators(rows) -> dict:
+    """One calibrator per predicted label"""
+    calibrators = {}
+    for label in sorted({p for _, p, _ in rows}):
+        mine = [(c, t == p) for t, p, c in rows if p == label]
+        calibrators[label] = fit_calibrator([c for c, _ in mine], [ok for _, ok in mine])
+    return calibrators
+
+def assign_folds(n: int, folds: int = FOLDS, seed: int = SEED):
+    """Fold index of each of n rows, shuffled, with fold sizes differing by at most one"""
+    import numpy as np
+    order = np.random.default_rng(seed).permutation(n)
+    fold_of = np.empty(n, dtype=int)
+    fold_of[order] = np.arange(n) % folds
+    return fold_of
+
+def cross_fitted(rows, folds: int = FOLDS, seed: int = SEED) -> list:
+    """Calibrated confidence of each row from calibrators fit on the other folds"""
+    fold_of = assign_folds(len(rows), folds, seed)
+    out = [0.0] * len(rows)
+    for k in range(folds):
+        calibrators = fit_calibrators([r for i, r in enumerate(rows) if fold_of[i] != k])
+        for i, (_, predicted, confidence) in enumerate(rows):
+            if fold_of[i] == k:
+                calibrator = calibrators.get(predicted)
+                out[i] = float(calibrate(calibrator, [confidence])[0]) if calibrator else confidence
+    return out
+
+def expected_calibration_error(confidences, correct, bins: int = 10) -> float:
+    """Mean |accuracy - confidence| over equal-width confidence bins, weighted by bin size"""
+    total, n = 0.0, len(confidences)
+    for b in range(bins):
+        low, high = b / bins, (b + 1) / bins
+        members = [i for i, c in enumerate(confidences) if low <= c < high or (b == bins - 1 and c == 1.0)]
+        if members:
+            accuracy = sum(correct[i] for i in members) / len(members)
+            mean_conf = sum(confidences[i] for i in members) / len(members)
+            total += len(members) / n * abs(accuracy - mean_conf)
+    return total
+
+# ---- thresholds ----
+def table(rows, thresholds=TABLE_THRESHOLDS, llm_accuracy: float = LLM_ACCURACY) -> list:
+    """Fallback rate and accuracy for each global threshold"""
+    n = len(rows)
+    out = []
+    for threshold in thresholds:
+        kept = [t == p for t, p, c in rows if c >= threshold]
+        fallbacks = n - len(kept)
+        out.append({
+            "threshold": threshold,
+            "fallback_rate": fallbacks / n,
+            "local_accuracy": sum(kept) / len(kept) if kept else None,
+            "system_accuracy": (sum(kept) + llm_accuracy * fallbacks) / n,
+        })
+    return out
+
+def recommend(rows, calibrators, target: float = TARGET_ACCURACY,
+              min_support: int = MIN_SUPPORT, default: float = DEFAULT_THRESHOLD) -> dict:
+    """
+    Per predicted label, the lowest threshold whose kept messages have a mean
+    calibrated confidence of at least target. The calibrated confidence rises
+    with the raw one, so lowering the threshold only lowers that mean: walk
+    down from the most confident prediction and stop before it drops below target.
+    :return: label -> {"threshold", "support", "kept", "expected_accuracy", "reason"}
+    """
+    import math
+    out = {}
+    for label, calibrator in calibrators.items():
+        confidences = sorted((c for _, p, c in rows if p == label), reverse=True)
+        if len(confidences) < min_support:
+            out[label] = {"threshold": default, "support": len(confidences), "kept": None,
+                          "expected_accuracy": None, "reason": "too few predictions"}
+            continue
+        calibrated = calibrate(calibrator, confidences)
+        threshold, kept, total = 1.0, 0, 0.0
+        i = 0
+        while i < len(confidences):
+            # messages with equal confidence are kept or sent to the LLM together
+            j = i
+            while j < len(confidences) and confidences[j] == confidences[i]:
+                j += 1
+            group_total = total + float(calibrated[i:j].sum())
+            if group_total / j < target:
+                break
+            threshold, kept, total = confidences[i], j, group_total
+            i = j
+        out[label] = {
+            # round down so the lowest kept confidence still passes
+            "threshold": math.floor(threshold * 10000) / 10000 if kept else 1.0,
+            "support": len(confidences),
+            "kept": kept / len(confidences),
+            "expected_accuracy": total / kept if kept else None,
+            "reason": "meets target" if kept else "target not reachable",
+        }
+    return out
+
+def apply(rows, thresholds: dict, default: float = DEFAULT_THRESHOLD, llm_accuracy: float = LLM_ACCURACY) -> dict:
+    """Fallback rate and accuracy of per-label thresholds on the rows"""
+    n = len(rows)
+    kept = [t == p for t, p, c in rows if c >= thresholds.get(p, default)]
+    fallbacks = n - len(kept)
+    return {
+        "fallback_rate": fallbacks / n,
+        "local_accuracy": sum(kept) / len(kept) if kept else None,
+        "system_accuracy": (sum(kept) + llm_accuracy * fallbacks) / n,
+    }
+
+def cross_fitted_apply(rows, target: float = TARGET_ACCURACY, min_support: int = MIN_SUPPORT,
+                       default: float = DEFAULT_THRESHOLD, llm_accuracy: float = LLM_ACCURACY,
+                       folds: int = FOLDS, seed: int = SEED) -> dict:
+    """
+    Like apply, but each fold is judged by thresholds recommended on the other
+    folds, so the result estimates how the thresholds do on messages they were
+    not tuned on
+    """
+    fold_of = assign_folds(len(rows), folds, seed)
+    n = len(rows)
+    kept = []
+    for k in range(folds):
+        train = [r for i, r in enumerate(rows) if fold_of[i] != k]
+        per_label = recommend(train, fit_calibrators(train), target, min_support, default)
+        thresholds = {label: r["threshold"] for label, r in per_label.items()}
+        kept += [t == p for i, (t, p, c) in enumerate(rows)
+                 if fold_of[i] == k and c >= thresholds.get(p, default)]
+    fallbacks = n - len(kept)
+    return {
+        "fallback_rate": fallbacks / n,
+        "local_accuracy": sum(kept) / len(kept) if kept else None,
+        "system_accuracy": (sum(kept) + llm_accuracy * fallbacks) / n,
+    }
+
+def evaluate(examples, target: float = TARGET_ACCURACY, llm_accuracy: float = LLM_ACCURACY,
+             min_support: int = MIN_SUPPORT, default: float = DEFAULT_THRESHOLD) -> dict:
+    """Scores, calibrates and recommends per-label thresholds for the examples"""
+    from models.intent import model_version
+    rows = score(examples)
+    correct = [t == p for t, p, _ in rows]
+    raw = [c for _, _, c in rows]
+    calibrators = fit_calibrators(rows)
+    per_label = recommend(rows, calibrators, target, min_support, default)
+    thresholds = {label: r["threshold"] for label, r in per_label.items()}
+    return {
+        "model_version": model_version(),
+        "messages": len(rows),
+        "accuracy": sum(correct) / len(rows),
+        "ece": {
+            "raw": expected_calibration_error(raw, correct),
+            "calibrated": expected_calibration_error(cross_fitted(rows), correct),
+        },
+        "table": table(rows, llm_accuracy=llm_accuracy),
+        "target_accuracy": target,
+        "llm_accuracy": llm_accuracy,
+        "per_label": per_label,
+        "thresholds": thresholds,
+        "default": default,
+        "with_default": apply(rows, {}, default, llm_accuracy),
+        # out of sample: thresholds recommended on the other folds
+        "with_thresholds": cross_fitted_apply(rows, target, min_support, default, llm_accuracy),
+        "with_thresholds_in_sample": apply(rows, thresholds, default, llm_accuracy),
+    }
+
+def to_saved(report: dict) -> dict:
+    """The part of a report the classifier loads at runtime"""
+    return {
+        "version": THRESHOLDS_VERSION,
+        "model_version": report["model_version"],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "target_accuracy": report["target_accuracy"],
+        "default": report["default"],
+        "thresholds": report["thresholds"],
+        "evaluated_on": report["messages"],
+        "fallback_rate": report["with_thresholds"]["fallback_rate"],
+        "local_accuracy": report["with_thresholds"]["local_accuracy"],
+    }
+
+def _pct(x) -> str:
+    return "   -  " if x is None else f"{100 * x:5.1f}%"
+
+def print_report(report: dict):
+    print(f"{report['messages']} messages, model {report['model_version'][:12]}, "
+          f"accuracy {_pct(report['accuracy']).strip()}")
+    print(f"ECE raw {report['ece']['raw']:.3f}, calibrated (cross-fitted) {report['ece']['calibrated']:.3f}")
+    print()
+    print(f"threshold  fallback  local acc  system acc (LLM {_pct(report['llm_accuracy']).strip()})")
+    for row in report["table"]:
+        print(f"   {row['threshold']:.2f}     {_pct(row['fallback_rate'])}    "
+              f"{_pct(row['local_accuracy'])}     {_pct(row['system_accuracy'])}")
+    print()
+    print(f"per label, target {_pct(report['target_accuracy']).strip()} on messages kept local:")
+    for label, r in report["per_label"].items():
+        print(f"  {label:<18} threshold {r['threshold']:.4f}  support {r['support']:3d}  "
+              f"kept {_pct(r['kept'])}  expected acc {_pct(r['expected_accuracy'])}  ({r['reason']})")
+    for name, title in (("with_default", "with_default"),
+                        ("with_thresholds", "with_thresholds (cross-fitted)"),
+                        ("with_thresholds_in_sample", "with_thresholds (in-sample)")):
+        r = report[name]
+        print(f"{title:<31} fallback {_pct(r['fallback_rate'])}  local acc {_pct(r['local_accuracy'])}  "
+              f"system acc {_pct(r['system_accuracy'])}")
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Calibrate the intent fallback thresholds on held-out data")
+    parser.add_argument("--data", action="append", help="JSONL of {text, label} rows (repeatable); default: models/intent_eval_data.py")
+    parser.add_argument("--target-accuracy", type=float, default=TARGET_ACCURACY)
+    parser.add_argument("--llm-accuracy", type=float, default=LLM_ACCURACY)
+    parser.add_argument("--min-support", type=int, default=MIN_SUPPORT)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    parser.add_argument("--save", action="store_true", help=f"write the thresholds to {THRESHOLDS_PATH}")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        examples = [x for path in args.data for x in load_labeled(path)]
+    else:
+        from models.intent_eval_data import eval_data
+        examples = list(eval_data)
+    if not examples:
+        print("no labeled examples", file=sys.stderr)
+        return 1
+
+    report = evaluate(examples, args.target_accuracy, args.llm_accuracy, args.min_support)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    if args.save:
+        save_thresholds(to_saved(report))
+        print(f"Wrote {THRESHOLDS_PATH}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
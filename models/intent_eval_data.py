@@ -0,0 +1,123 @@
+"""
+Held-out labeled messages for evaluating the intent classifier.
+
+None of these are in intent_data.training_data. They are phrased the way real
+chats and comments arrive: typos, slang, mixed greetings, short fragments.
+Used by models/intent_eval.py to calibrate confidence thresholds.
+"""
+
+eval_data = [
+    # GREETING
+    ("hii", "greeting"),
+    ("heyyy", "greeting"),
+    ("hello there", "greeting"),
+    ("hi team", "greeting"),
+    ("hey guys", "greeting"),
+    ("good morning to you", "greeting"),
+    ("morning", "greeting"),
+    ("evening all", "greeting"),
+    ("hey, how are you doing?", "greeting"),
+    ("hi, how's your day going", "greeting"),
+    ("what's up guys", "greeting"),
+    ("sup", "greeting"),
+    ("yo yo", "greeting"),
+    ("hola amigos", "greeting"),
+    ("namaste ji", "greeting"),
+    ("greetings", "greeting"),
+    ("howdy", "greeting"),
+    ("hello hello", "greeting"),
+    ("hey there, anyone around?", "greeting"),
+    ("hi again", "greeting"),
+    ("good afternoon team", "greeting"),
+    ("hey hey", "greeting"),
+    ("hello, nice to meet you", "greeting"),
+    ("hi! hope you're well", "greeting"),
+    ("bonjour", "greeting"),
+    ("hey friend", "greeting"),
+    ("hello autostream", "greeting"),
+    ("hi, how are things", "greeting"),
+    ("good evening folks", "greeting"),
+    ("ahoy", "greeting"),
+
+    # PRODUCT / PRICING INQUIRY
+    ("how much is the pro plan", "product_inquiry"),
+    ("what's the price of basic", "product_inquiry"),
+    ("pricing?", "product_inquiry"),
+    ("do you offer refunds", "product_inquiry"),
+    ("what is your refund policy", "product_inquiry"),
+    ("is there 24/7 support", "product_inquiry"),
+    ("does basic include 4k", "product_inquiry"),
+    ("what resolution is the basic plan", "product_inquiry"),
+    ("how many videos can i upload per month", "product_inquiry"),
+    ("are captions included in basic", "product_inquiry"),
+    ("what's the difference between the plans", "product_inquiry"),
+    ("can you compare basic vs pro", "product_inquiry"),
+    ("is there a trial period", "product_inquiry"),
+    ("what do i get with pro", "product_inquiry"),
+    ("does the pro plan have ai captions", "product_inquiry"),
+    ("how does your tool work", "product_inquiry"),
+    ("what platforms do you support", "product_inquiry"),
+    ("can i cancel anytime", "product_inquiry"),
+    ("tell me more about your features", "product_inquiry"),
+    ("what are the limits on basic", "product_inquiry"),
+    ("is the pro plan worth it", "product_inquiry"),
+    ("hi, what does pro cost per month?", "product_inquiry"),
+    ("hello, do you support 4k exports?", "product_inquiry"),
+    ("this could work for my podcast maybe", "product_inquiry"),
+    ("i'm just looking around for now", "product_inquiry"),
+    ("thinking about it for my channel", "product_inquiry"),
+    ("sounds interesting, how does it compare to others", "product_inquiry"),
+    ("do you have discounts for students", "product_inquiry"),
+    ("what payment methods do you take", "product_inquiry"),
+    ("is support included on basic", "product_inquiry"),
+    ("explain the plans please", "product_inquiry"),
+    ("what's included", "product_inquiry"),
+    ("how much for unlimited videos", "product_inquiry"),
+    ("does it work for tiktok", "product_inquiry"),
+    ("any refunds after a week?", "product_inquiry"),
+
+    # HIGH INTENT LEAD
+    ("i'd like to sign up", "high_intent_lead"),
+    ("let's do the pro plan", "high_intent_lead"),
+    ("i'm in, sign me up for pro", "high_intent_lead"),
+    ("how do i subscribe", "high_intent_lead"),
+    ("where do i pay", "high_intent_lead"),
+    ("i want to get the basic plan", "high_intent_lead"),
+    ("can i start my subscription today", "high_intent_lead"),
+    ("ready to buy pro for my youtube", "high_intent_lead"),
+    ("i'll take the pro plan", "high_intent_lead"),
+    ("please create an account for me", "high_intent_lead"),
+    ("i want to register now", "high_intent_lead"),
+    ("let me sign up for my instagram", "high_intent_lead"),
+    ("i want to try it for my youtube channel", "high_intent_lead"),
+    ("upgrade me to pro", "high_intent_lead"),
+    ("i'm ready, what do you need from me", "high_intent_lead"),
+    ("let's get started", "high_intent_lead"),
+    ("i want to purchase now", "high_intent_lead"),
+    ("sign up please", "high_intent_lead"),
+    ("i've decided, i want pro", "high_intent_lead"),
+    ("i want to join", "high_intent_lead"),
+    ("book me in for the pro plan", "high_intent_lead"),
+    ("how can i buy it", "high_intent_lead"),
+    ("i want to start using it today for linkedin", "high_intent_lead"),
+    ("hi, i want to subscribe to pro", "high_intent_lead"),
+    ("good morning, i'd like to register", "high_intent_lead"),
+    ("take my money", "high_intent_lead"),
+    ("count me in", "high_intent_lead"),
+    ("i want to upgrade my plan", "high_intent_lead"),
+    ("can you set me up with basic", "high_intent_lead"),
+    ("i want an account", "high_intent_lead"),
+
+    # greetings followed by words the model has never seen: the greeting word
+    # dominates the score, so these are where a low threshold goes wrong
+    ("hey where is the billing page", "high_intent_lead"),
+    ("hi can i get an invoice to pay", "high_intent_lead"),
+    ("hello, how do i renew my subscription", "high_intent_lead"),
+    ("hey mate, ready to onboard my team", "high_intent_lead"),
+    ("hi there, i'd like to proceed with payment", "high_intent_lead"),
+    ("good morning, can i prepay for a year", "high_intent_lead"),
+    ("hey, can it crop my clips", "product_inquiry"),
+    ("hello, does it denoise audio", "product_inquiry"),
+    ("hi, can it translate subtitles", "product_inquiry"),
+    ("hey there, is there an api", "product_inquiry"),
+]
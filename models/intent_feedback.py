@@ -0,0 +1,91 @@
+"""
+Labeled examples learned from LLM intent fallbacks.
+
+Messages the local model was unsure about, with the label the LLM gave them,
+are appended to a JSONL file next to intent_data.py ({"text", "label"} per
+line; INFLX_INTENT_FEEDBACK points elsewhere). retrain() in models/intent.py
+fits the model on training_data plus these examples.
+
+- a text keeps its latest label; re-recording the same label is a no-op
+- only the newest MAX_EXAMPLES texts are trained on
+- several worker processes may append to the same file; each one re-reads it
+  before a retrain, so every worker learns from all of them
+"""
+
+import os
+import json
+import threading
+
+FEEDBACK_PATH = os.getenv("INFLX_INTENT_FEEDBACK") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "intent_feedback.jsonl"
+)
+MAX_EXAMPLES = int(os.getenv("INFLX_INTENT_FEEDBACK_MAX", "5000"))
+
+class FeedbackStore:
+    """Append-only file of (text, label) examples with an in-memory index"""
+    def __init__(self, path: str = FEEDBACK_PATH, max_examples: int = MAX_EXAMPLES):
+        self.path = path
+        self.max_examples = max_examples
+        self.added = 0
+        self._examples = None
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        examples = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                        text, label = row["text"], row["label"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # a torn line from a crash mid-append
+                    examples.pop(text, None)
+                    examples[text] = label
+        except OSError:
+            pass
+        return examples
+
+    def reload(self):
+        """Re-reads the file (picks up examples other processes appended)"""
+        examples = self._read()
+        with self._lock:
+            self._examples = examples
+
+    def add(self, text: str, label: str) -> bool:
+        """Records an example; False if the text already has this label"""
+        with self._lock:
+            if self._examples is None:
+                self._examples = self._read()
+            if self._examples.get(text) == label:
+                return False
+            self._examples.pop(text, None)
+            self._examples[text] = label
+            line = json.dumps({"text": text, "label": label}, ensure_ascii=False) + "\n"
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.added += 1
+            return True
+
+    def examples(self) -> list:
+        """The newest max_examples (text, label) pairs, oldest first"""
+        with self._lock:
+            if self._examples is None:
+                self._examples = self._read()
+            items = list(self._examples.items())
+        return items[-self.max_examples:]
+
+    def __len__(self):
+        return len(self.examples())
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_feedback_store() -> FeedbackStore:
+    """Process-wide store at FEEDBACK_PATH"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FeedbackStore()
+    return _store
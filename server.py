@@ -0,0 +1,351 @@
+"""
+HTTP / websocket server for Inflx Agent (ASGI, Starlette).
+
+- every user gets their own checkpoint thread ("user-<user_id>"); turns of one
+  user are serialized, different users run concurrently on the async graph
+- the classifier, KB index, lead outbox and LLM clients are loaded once per
+  worker process, at startup
+- admission control: at most INFLX_SERVER_MAX_INFLIGHT turns run at once and at
+  most INFLX_SERVER_MAX_QUEUE wait for a slot; beyond that, or after waiting
+  INFLX_SERVER_QUEUE_TIMEOUT_S, the server answers 503 with Retry-After
+
+Endpoints:
+    POST /chat   {"user_id"?, "message", "stream"?}  -> JSON reply, or NDJSON chunks with "stream": true
+    WS   /ws?user_id=...  send {"message"}, receive {"type": "chunk"|"final"|"error", ...}
+    GET  /healthz, GET /stats
+    GET  /metrics              Prometheus text format (agent/telemetry.py)
+    GET  /traces?limit=20      recent per-turn JSON traces
+
+Run:
+    python -m server [--host 0.0.0.0] [--port 8000] [--workers 4]
+Set INFLX_STUB_LLM_LATENCY_S=0.05 to serve against a stub LLM (load tests).
+INFLX_LLM_PREWARM=N opens N connections per LLM provider at startup (default 1, 0: off).
+Telemetry is on by default here; INFLX_TELEMETRY=0 turns it off. So is learning
+from LLM intent fallbacks (INFLX_INTENT_LEARNING=0 turns it off).
+Workers share the SQLite checkpointer and lead outbox; a user's turns are only
+serialized within one worker, so clients should not send concurrent turns.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import weakref
+import argparse
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from agent import agent as agent_module
+from agent import intent_classifier
+from agent import llm_clients
+from agent import telemetry
+from agent.agent import astream_turn
+from agent.state_manager import LLM_MAX_CONCURRENCY
+from agent.tools import get_lead_outbox
+from data.rag_retriever import get_knowledge_index, retrieve_from_kb
+from models.intent import get_intent_classifier
+
+MAX_INFLIGHT = int(os.getenv("INFLX_SERVER_MAX_INFLIGHT", str(LLM_MAX_CONCURRENCY)))
+MAX_QUEUE = int(os.getenv("INFLX_SERVER_MAX_QUEUE", str(4 * MAX_INFLIGHT)))
+QUEUE_TIMEOUT_S = float(os.getenv("INFLX_SERVER_QUEUE_TIMEOUT_S", "10"))
+RETRY_AFTER_S = 1
+MAX_MESSAGE_CHARS = 4000
+STUB_LLM_LATENCY_S = os.getenv("INFLX_STUB_LLM_LATENCY_S")
+# keep-alive connections opened to each LLM provider at startup (0: none)
+LLM_PREWARM = int(os.getenv("INFLX_LLM_PREWARM", "1"))
+
+_USER_ID_RE = re.compile(r"^[A-Za-z0-9_.:@\-]{1,128}$")
+
+telemetry.set_enabled(os.getenv("INFLX_TELEMETRY", "1") == "1")
+# learn from LLM intent fallbacks, except from the stub's canned labels
+intent_classifier.set_learning(os.getenv("INFLX_INTENT_LEARNING", "1") == "1" and STUB_LLM_LATENCY_S is None)
+
+if STUB_LLM_LATENCY_S is not None:
+    from agent.stub_llm import StubLLM
+    agent_module.llm = intent_classifier.llm = StubLLM(float(STUB_LLM_LATENCY_S))
+
+class Overloaded(Exception):
+    """No turn slot became free in time"""
+
+class Admission:
+    """Bounded in-flight turns plus a bounded, time-limited wait queue"""
+    def __init__(self, max_inflight: int, max_queue: int, timeout_s: float):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+        self._slots = asyncio.Semaphore(max_inflight)
+        self.inflight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.peak_inflight = 0
+
+    async def acquire(self):
+        """Takes a turn slot or raises Overloaded"""
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout_s)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded() from None
+        finally:
+            self.waiting -= 1
+        self.inflight += 1
+        self.admitted += 1
+        self.peak_inflight = max(self.peak_inflight, self.inflight)
+
+    def release(self):
+        self.inflight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "peak_inflight": self.peak_inflight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+# one lock per active thread, dropped once no turn holds it
+_thread_locks = weakref.WeakValueDictionary()
+
+def _thread_lock(thread_id: str) -> asyncio.Lock:
+    lock = _thread_locks.get(thread_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _thread_locks[thread_id] = lock
+    return lock
+
+def _user_id(value):
+    """Validated user id, or a fresh one when the client has none yet"""
+    if value is None or value == "":
+        return uuid.uuid4().hex
+    value = str(value)
+    if not _USER_ID_RE.match(value):
+        raise ValueError("user_id must be 1-128 characters of [A-Za-z0-9_.:@-]")
+    return value
+
+def _thread_config(user_id: str) -> dict:
+    return {"configurable": {"thread_id": f"user-{user_id}"}}
+
+async def run_turn(user_id: str, message: str):
+    """
+    Runs one turn for a user, yielding ("chunk", text) and then ("final", dict).
+    The caller must hold an admission slot (see start_turn).
+    """
+    start = time.perf_counter()
+    first_token = None
+    async with _thread_lock(user_id):
+        async for kind, payload in astream_turn({"user_message": message}, _thread_config(user_id)):
+            if kind == "chunk":
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                yield kind, payload
+            else:
+                conv = payload["conversation"]
+                # lead_just_captured stays set for the rest of the conversation
+                # (it keeps the LLM from selling again); only the capture turn
+                # itself ends on the post_lead intent
+                yield "final", {
+                    "user_id": user_id,
+                    "reply": payload["reply"],
+                    "intent": conv.last_intent,
+                    "lead_captured": conv.last_intent == "post_lead",
+                    "first_token_s": first_token,
+                    "total_s": time.perf_counter() - start,
+                }
+
+_turn_tasks = set()
+
+def start_turn(admission: Admission, user_id: str, message: str) -> asyncio.Queue:
+    """
+    Runs the turn in its own task, which owns the admission slot: the turn
+    finishes (and its checkpoint is written) even if the client goes away.
+    The queue receives ("chunk" | "final" | "error", payload) and then None.
+    """
+    queue = asyncio.Queue()
+
+    async def runner():
+        try:
+            async for item in run_turn(user_id, message):
+                queue.put_nowait(item)
+        except Exception as e:
+            print(f"[server] turn failed for {user_id}: {type(e).__name__}: {e}")
+            queue.put_nowait(("error", "the assistant is unavailable, please retry"))
+        finally:
+            admission.release()
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(runner())
+    _turn_tasks.add(task)
+    task.add_done_callback(_turn_tasks.discard)
+    return queue
+
+async def _drain(queue: asyncio.Queue):
+    while (item := await queue.get()) is not None:
+        yield item
+
+def _overloaded_response() -> JSONResponse:
+    return JSONResponse(
+        {"error": "overloaded", "retry_after_s": RETRY_AFTER_S},
+        status_code=503,
+        headers={"Retry-After": str(RETRY_AFTER_S)},
+    )
+
+def _parse_message(value) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError("message must be a non-empty string")
+    if len(value) > MAX_MESSAGE_CHARS:
+        raise ValueError(f"message is longer than {MAX_MESSAGE_CHARS} characters")
+    return value.strip()
+
+# ---- endpoints ----
+async def chat(request: Request):
+    """One chat turn over HTTP"""
+    try:
+        body = await request.json()
+        user_id = _user_id(body.get("user_id") or request.headers.get("x-user-id"))
+        message = _parse_message(body.get("message"))
+    except (ValueError, AttributeError) as e:
+        print(f"[server] bad /chat request: {type(e).__name__}: {e}")
+        return JSONResponse({"error": "invalid request"}, status_code=400)
+
+    admission = request.app.state.admission
+    try:
+        await admission.acquire()
+    except Overloaded:
+        return _overloaded_response()
+    queue = start_turn(admission, user_id, message)
+
+    if not body.get("stream"):
+        async for kind, payload in _drain(queue):
+            if kind == "final":
+                return JSONResponse(payload)
+            if kind == "error":
+                return JSONResponse({"error": payload}, status_code=502)
+
+    async def ndjson():
+        async for kind, payload in _drain(queue):
+            if kind == "chunk":
+                yield json.dumps({"type": "chunk", "text": payload}) + "\n"
+            elif kind == "final":
+                yield json.dumps({"type": "final", **payload}) + "\n"
+            else:
+                yield json.dumps({"type": "error", "error": payload}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+async def chat_ws(websocket: WebSocket):
+    """Chat turns over a websocket; one connection is one user"""
+    try:
+        user_id = _user_id(websocket.query_params.get("user_id"))
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    await websocket.accept()
+    admission = websocket.app.state.admission
+    try:
+        while True:
+            data = await websocket.receive_json()
+            try:
+                message = _parse_message(data.get("message") if isinstance(data, dict) else None)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "error": str(e)})
+                continue
+            try:
+                await admission.acquire()
+            except Overloaded:
+                await websocket.send_json({"type": "error", "error": "overloaded", "retry_after_s": RETRY_AFTER_S})
+                continue
+            async for kind, payload in _drain(start_turn(admission, user_id, message)):
+                if kind == "chunk":
+                    await websocket.send_json({"type": "chunk", "text": payload})
+                elif kind == "final":
+                    await websocket.send_json({"type": "final", **payload})
+                else:
+                    await websocket.send_json({"type": "error", "error": payload})
+    except WebSocketDisconnect:
+        pass
+
+async def healthz(request: Request):
+    return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+async def stats(request: Request):
+    """Admission, LLM provider, cache and lead outbox counters for this worker"""
+    return JSONResponse({
+        "pid": os.getpid(),
+        "admission": request.app.state.admission.stats(),
+        "llm": agent_module.llm.stats(),
+        "intent_cache": intent_classifier.cache_stats(),
+        "intent_fallback": intent_classifier.fallback_stats(),
+        "lead_outbox": get_lead_outbox().stats(),
+    }, headers={"Cache-Control": "no-store"})
+
+async def metrics(request: Request):
+    """Prometheus scrape endpoint (per worker process)"""
+    return PlainTextResponse(
+        telemetry.render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+        headers={"Cache-Control": "no-store"},
+    )
+
+async def traces(request: Request):
+    """The latest per-turn traces of this worker"""
+    try:
+        limit = max(1, min(telemetry.RECENT_TRACES, int(request.query_params.get("limit", "20"))))
+    except ValueError:
+        return JSONResponse({"error": "limit must be an integer"}, status_code=400)
+    return JSONResponse({"pid": os.getpid(), "traces": telemetry.recent_traces(limit)},
+                        headers={"Cache-Control": "no-store"})
+
+@asynccontextmanager
+async def lifespan(app):
+    """Loads everything a turn needs once per worker, before traffic arrives"""
+    app.state.admission = Admission(MAX_INFLIGHT, MAX_QUEUE, QUEUE_TIMEOUT_S)
+    get_intent_classifier()
+    if intent_classifier.LEARNING:
+        # fold in what earlier runs learned
+        intent_classifier.retrain_from_feedback()
+    get_knowledge_index()
+    retrieve_from_kb("pricing")
+    get_lead_outbox()
+    if LLM_PREWARM > 0 and STUB_LLM_LATENCY_S is None:
+        await llm_clients.aprewarm(connections=LLM_PREWARM)
+    yield
+    await llm_clients.aclose()
+    llm_clients.close()
+
+app = Starlette(
+    routes=[
+        Route("/chat", chat, methods=["POST"]),
+        WebSocketRoute("/ws", chat_ws),
+        Route("/healthz", healthz),
+        Route("/stats", stats),
+        Route("/metrics", metrics),
+        Route("/traces", traces),
+    ],
+    lifespan=lifespan,
+)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve Inflx Agent over HTTP/websocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    uvicorn.run("server:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
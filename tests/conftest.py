@@ -0,0 +1,15 @@
+"""
+Keeps test runs away from the repo's state files: checkpoints, the lead outbox
+and learned intent labels go to a temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="inflx-tests-")
+os.environ.setdefault("INFLX_CHECKPOINT_DB", os.path.join(_tmp, "checkpoints.sqlite"))
+os.environ.setdefault("INFLX_LEAD_OUTBOX", os.path.join(_tmp, "lead_outbox.sqlite"))
+os.environ.setdefault("INFLX_INTENT_FEEDBACK", os.path.join(_tmp, "intent_feedback.jsonl"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
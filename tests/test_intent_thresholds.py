@@ -0,0 +1,32 @@
+"""Saved thresholds only apply to the model version they were calibrated on"""
+
+import pytest
+
+from agent import intent_classifier
+from models.intent import model_version
+
+def saved_for(version: str) -> dict:
+    return {"version": 1, "model_version": version, "default": 0.4,
+            "thresholds": {"greeting": 0.9, "product_inquiry": 0.2}}
+
+@pytest.fixture(autouse=True)
+def reload_thresholds():
+    yield
+    intent_classifier.set_thresholds(None)
+
+def test_thresholds_used_for_their_model():
+    intent_classifier.set_thresholds(saved_for(model_version()))
+    assert intent_classifier.threshold_for("greeting") == 0.9
+    assert intent_classifier.threshold_for("product_inquiry") == 0.2
+    assert intent_classifier.threshold_stats()["calibrated"] is True
+
+def test_thresholds_for_another_model_fall_back(monkeypatch, capsys):
+    monkeypatch.setattr(intent_classifier, "_stale_warned_for", None)
+    intent_classifier.set_thresholds(saved_for("0" * 64))
+    assert intent_classifier.threshold_for("greeting") == intent_classifier.THRESHOLD
+    assert intent_classifier.threshold_for("product_inquiry") == intent_classifier.THRESHOLD
+    stats = intent_classifier.threshold_stats()
+    assert stats["calibrated"] is False
+    assert stats["calibrated_for_model"] == "0" * 12
+    # warned once per model version, not per message
+    assert capsys.readouterr().out.count("thresholds were calibrated for model") == 1
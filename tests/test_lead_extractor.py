@@ -0,0 +1,77 @@
+"""The local tier only takes fields given explicitly, from turns since the signup started; anything looser is left to the LLM"""
+
+import pytest
+
+from agent import agent as agent_module
+from agent import intent_classifier
+from agent.lead_extractor import extract_lead_fields, extract_name, extract_platform
+from agent.stub_llm import StubLLM
+
+@pytest.mark.parametrize("text", [
+    "please call me back",
+    "can you call me tomorrow about it",
+    "Call me Maybe",
+    "This is Great",
+    "I'm Super excited",
+    "what is the plan name is it pro",
+    "plan name: pro",
+    "my name is not important",
+])
+def test_ordinary_chat_is_not_a_name(text):
+    assert extract_name(text) is None
+
+@pytest.mark.parametrize("text, name", [
+    ("my name is jaspreet singh and my email is js@example.com", "Jaspreet Singh"),
+    ("My name's Ana", "Ana"),
+    ("Name: Sam Lee", "Sam Lee"),
+    ("ok. name: sam, insta", "Sam"),
+])
+def test_explicit_names(text, name):
+    assert extract_name(text) == name
+
+def test_lead_fields_from_latest_message_first():
+    found = extract_lead_fields(["my name is Ana", "name: Sam Lee. insta. sam@mail.io"])
+    assert found == {"name": "Sam Lee", "email": "sam@mail.io", "platform": "Instagram"}
+
+@pytest.mark.parametrize("text", [
+    "your website says pro has 4k",
+    "I read the blog about captions",
+    "does it work for fb ads too",
+])
+def test_common_words_are_not_a_platform(text):
+    assert extract_platform(text) is None
+
+@pytest.mark.parametrize("text, platform", [
+    ("yt", "YouTube"),
+    ("my website", "Website"),
+    ("for our blog.", "Website"),
+    ("I post on youtube mostly", "YouTube"),
+])
+def test_platform_answers(text, platform):
+    assert extract_platform(text) == platform
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    llm = StubLLM(latency_s=0)
+    monkeypatch.setattr(agent_module, "llm", llm)
+    monkeypatch.setattr(intent_classifier, "llm", llm)
+    return llm
+
+@pytest.mark.parametrize("mode", ["graph", "fused"])
+def test_lead_is_taken_from_turns_since_signup(stub_llm, mode):
+    app = agent_module.graph_app if mode == "graph" else agent_module.fused_app
+    config = {"configurable": {"thread_id": f"lead-scope-{mode}"}}
+
+    def say(message):
+        return app.invoke({"user_message": message}, config=config)
+
+    say("do you support instagram?")
+    conv = say("I want to sign up for the pro plan")["conversation"]
+    assert conv.platform is None, "a platform mentioned before signing up must not prefill the lead"
+    conv = say("My name is Ann Lee, ann@example.com, youtube")["conversation"]
+    assert conv.lead_just_captured and not conv.collecting_lead
+
+    # a second signup in the same thread asks again instead of reusing the first lead
+    conv = say("I want to sign up for the basic plan too")["conversation"]
+    assert conv.collecting_lead
+    assert (conv.name, conv.email, conv.platform) == (None, None, None)
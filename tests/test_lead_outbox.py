@@ -0,0 +1,95 @@
+"""Lead outbox: updates that arrive mid-delivery are not lost, the CRM applies each version once, and failed writes do not wedge the connection"""
+
+import pytest
+
+from agent import agent as agent_module
+from agent import intent_classifier
+from agent.crm_stub import StubCRM
+from agent.lead_outbox import PENDING, SENT, LeadOutbox, http_sender, idempotency_key
+from agent.stub_llm import StubLLM
+from agent.tools import get_lead_outbox
+
+@pytest.fixture
+def outbox(tmp_path):
+    sent = []
+    box = LeadOutbox(str(tmp_path / "outbox.sqlite"), sender=sent.extend)
+    box.sent = sent
+    yield box
+    box.close(flush=False)
+
+def row(outbox, email):
+    return outbox.conn.execute(
+        "SELECT name, platform, status FROM leads WHERE email = ?", (email,)
+    ).fetchone()
+
+def test_update_during_flight_stays_pending(outbox):
+    outbox.enqueue("Ana", "ana@example.com", "YouTube")
+
+    def sender(leads):
+        # the user corrects their details while the first version is being delivered
+        outbox.sender = outbox.sent.extend
+        outbox.enqueue("Ana Lima", "ana@example.com", "Instagram")
+        outbox.sent.extend(leads)
+        seen_in_flight.append(row(outbox, "ana@example.com"))
+
+    seen_in_flight = []
+    outbox.sender = sender
+    # the first version is not marked sent; the same flush then delivers the update
+    assert outbox.flush_once() == 1
+    assert seen_in_flight == [("Ana Lima", "Instagram", PENDING)]
+    assert row(outbox, "ana@example.com") == ("Ana Lima", "Instagram", SENT)
+    assert [(lead["name"], lead["version"]) for lead in outbox.sent] == [("Ana", 0), ("Ana Lima", 1)]
+    assert outbox.stats()["leads_sent"] == 1
+
+def test_failed_write_rolls_back(outbox):
+    outbox.enqueue("Ana", "ana@example.com", "YouTube")
+    batch = outbox._due_batch(float("inf"))
+    broken = [dict(batch[0]), {"idempotency_key": "x"}]  # no version: fails mid-transaction
+    with pytest.raises(KeyError):
+        outbox._mark_sent(broken)
+    assert not outbox.conn.in_transaction
+    assert row(outbox, "ana@example.com")[2] == PENDING
+
+    # the connection still works
+    outbox._mark_sent(batch)
+    assert row(outbox, "ana@example.com")[2] == SENT
+
+def test_crm_writes_each_version_once(outbox):
+    crm = StubCRM()
+    send = http_sender(crm.start())
+    try:
+        outbox.enqueue("Ana", "ana@example.com", "YouTube")
+        outbox.enqueue("Bo", "bo@example.com", "Twitch")
+
+        def sender(leads):
+            outbox.sender = send
+            outbox.enqueue("Ana Lima", "ana@example.com", "Instagram")
+            send(leads)
+            # the response was lost: the same batch is delivered again
+            send(leads)
+
+        outbox.sender = sender
+        assert outbox.flush_once() == 2
+        ana, bo = idempotency_key("ana@example.com"), idempotency_key("bo@example.com")
+        assert sorted(crm.writes) == sorted([(ana, 0), (bo, 0), (ana, 1)])
+        assert crm.duplicates == 2
+        assert crm.leads[ana]["name"] == "Ana Lima"
+    finally:
+        crm.stop()
+
+def test_recaptured_lead_gets_its_own_reply(monkeypatch):
+    llm = StubLLM(latency_s=0)
+    monkeypatch.setattr(agent_module, "llm", llm)
+    monkeypatch.setattr(intent_classifier, "llm", llm)
+    message = "I want to sign up, my name is Cy Park, cy@example.com, youtube"
+    first = agent_module.graph_app.invoke(
+        {"user_message": message}, config={"configurable": {"thread_id": "recapture-1"}}
+    )["reply"]
+    assert first.startswith("🎉 Lead captured successfully!")
+    get_lead_outbox().flush_once()
+
+    again = agent_module.graph_app.invoke(
+        {"user_message": message}, config={"configurable": {"thread_id": "recapture-2"}}
+    )["reply"]
+    assert "already have your details" in again
+    assert "status" not in again and "{" not in again
@@ -0,0 +1,99 @@
+"""A half-open provider whose call ends without an outcome must not keep its probe slot"""
+
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agent import hedging, provider_health
+from agent.state_manager import MultiLLM
+from agent.stub_llm import StubResponse
+
+class FakeProvider:
+    """Answers like either SDK after `latency_s`; streams word by word"""
+    def __init__(self, latency_s: float, text: str = "hello there friend"):
+        self.latency_s = latency_s
+        self.text = text
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self._agenerate, generate_content_stream=self._astream_awaitable))
+        self.models = SimpleNamespace(generate_content_stream=self._stream)
+
+    async def _agenerate(self, model, contents):
+        await asyncio.sleep(self.latency_s)
+        return StubResponse(self.text)
+
+    async def ainvoke(self, prompt):
+        return await self._agenerate(None, prompt)
+
+    def _stream(self, model, contents):
+        for word in self.text.split():
+            time.sleep(self.latency_s)
+            yield StubResponse(word + " ")
+
+    def stream(self, prompt):
+        return self._stream(None, prompt)
+
+    async def _astream(self, model, contents):
+        for word in self.text.split():
+            await asyncio.sleep(self.latency_s)
+            yield StubResponse(word + " ")
+
+    async def _astream_awaitable(self, model, contents):
+        return self._astream(model, contents)
+
+    def astream(self, prompt):
+        return self._astream(None, prompt)
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(provider_health, "_registry", {})
+
+def half_open(name: str) -> provider_health.ProviderHealth:
+    """A provider whose breaker is open with an expired cooldown: the next call is its probe"""
+    health = provider_health.get_health(name)
+    health.state = provider_health.OPEN
+    health.opened_at = time.monotonic() - health.cooldown_s - 1
+    return health
+
+def test_cancelled_hedge_loser_releases_probe(monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGING_ENABLED", True)
+    monkeypatch.setitem(hedging.HEDGE_POLICIES, "intent_fallback",
+                        hedging.HedgePolicy(enabled=True, min_delay_s=0.0, default_delay_s=0.01))
+    # route() puts the half-open groq second, so it is the hedge, and it loses
+    groq = half_open("groq")
+    llm = MultiLLM(gemini_client=FakeProvider(0.05), groq_client=FakeProvider(1.0))
+
+    response = asyncio.run(llm.ainvoke("hi", call_site="intent_fallback"))
+
+    assert response.text == "hello there friend"
+    assert hedging.hedge_stats()["intent_fallback"]["hedges_fired"] >= 1
+    assert groq.state == provider_health.HALF_OPEN
+    assert not groq.probe_in_flight
+    assert groq.allow_request()
+
+def test_abandoned_stream_releases_probe():
+    gemini = half_open("gemini")
+    llm = MultiLLM(gemini_client=FakeProvider(0.0), groq_client=FakeProvider(0.0))
+
+    chunks = llm.stream("hi", call_site="response")
+    assert next(chunks) == "hello "
+    assert gemini.probe_in_flight
+    chunks.close()
+
+    assert not gemini.probe_in_flight
+    assert gemini.allow_request()
+
+def test_abandoned_async_stream_releases_probe():
+    gemini = half_open("gemini")
+    llm = MultiLLM(gemini_client=FakeProvider(0.0), groq_client=FakeProvider(0.0))
+
+    async def first_chunk():
+        chunks = llm.astream("hi", call_site="response")
+        chunk = await chunks.__anext__()
+        await chunks.aclose()
+        return chunk
+
+    assert asyncio.run(first_chunk()) == "hello "
+    assert not gemini.probe_in_flight
+    assert gemini.allow_request()
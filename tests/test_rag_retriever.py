@@ -0,0 +1,46 @@
+"""Hot reload of the knowledge base keeps serving the last good index when the file breaks"""
+
+import os
+import json
+import shutil
+
+import pytest
+
+from data import rag_retriever
+
+def bump_mtime(path: str):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_broken_kb_keeps_last_good_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_retriever, "RELOAD_CHECK_INTERVAL", 0.0)
+    path = str(tmp_path / "knowledge_base.json")
+    shutil.copy(rag_retriever.KB_PATH, path)
+    holder = rag_retriever._IndexHolder(path)
+    index = holder.get()
+    answer = index.retrieve("pro plan price")
+
+    # half-written file, then valid JSON of the wrong shape
+    for broken in ('{"AutoStream Pricing & Features": {"Basic Pl', '{"unexpected": []}'):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(broken)
+        bump_mtime(path)
+        assert holder.get() is index
+        assert holder.get().retrieve("pro plan price") == answer
+
+    # a fixed file is picked up again
+    with open(rag_retriever.KB_PATH, "r", encoding="utf-8") as f:
+        kb = json.load(f)
+    kb[rag_retriever.POLICY_SECTION].append("Test policy line")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(kb, f)
+    bump_mtime(path)
+    assert holder.get() is not index
+    assert "Test policy line" in holder.get().retrieve("refund policy")
+
+def test_broken_kb_on_first_load_raises(tmp_path):
+    path = tmp_path / "knowledge_base.json"
+    path.write_text("{not json", encoding="utf-8")
+    holder = rag_retriever._IndexHolder(str(path))
+    with pytest.raises(ValueError):
+        holder.get()
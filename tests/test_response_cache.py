@@ -0,0 +1,51 @@
+"""A cached FAQ reply must not carry one user's details into another user's answer"""
+
+import json
+
+import pytest
+
+from agent import agent as agent_module
+from agent import intent_classifier, response_cache
+from agent.stub_llm import StubLLM
+
+# not a direct KB lookup, so the reply comes from the LLM rather than a template
+QUESTION = "Which plan would you recommend for a podcast?"
+
+class EchoLLM(StubLLM):
+    """Replies with the prompt itself, so anything the prompt held shows up in the reply"""
+    def _answer(self, prompt, call_site):
+        text = super()._answer(prompt, call_site)
+        if call_site == "response":
+            return prompt
+        if call_site == "fused_turn":
+            return json.dumps({"intent": "product_inquiry", "name": None, "email": None,
+                               "platform": None, "reply": prompt})
+        return text
+
+@pytest.fixture
+def echo_llm(monkeypatch):
+    llm = EchoLLM(latency_s=0)
+    monkeypatch.setattr(agent_module, "llm", llm)
+    monkeypatch.setattr(intent_classifier, "llm", llm)
+    response_cache.response_cache.clear()
+    yield llm
+    response_cache.response_cache.clear()
+
+def ask(app, thread_id: str, message: str) -> str:
+    result = app.invoke({"user_message": message}, config={"configurable": {"thread_id": thread_id}})
+    return result["reply"]
+
+@pytest.mark.parametrize("mode", ["graph", "fused"])
+def test_two_users_same_question(echo_llm, mode):
+    app = agent_module.graph_app if mode == "graph" else agent_module.fused_app
+    alice, bob = f"cache-{mode}-alice", f"cache-{mode}-bob"
+
+    ask(app, alice, "Hi, I'm Alice Example, alice@example.com, my channel is called Zebracast")
+    reply_a = ask(app, alice, QUESTION)
+
+    calls = echo_llm.calls
+    reply_b = ask(app, bob, QUESTION)
+    assert echo_llm.calls == calls, "the second user should be served from the cache"
+    assert reply_b == reply_a
+    for detail in ("alice", "example.com", "zebracast"):
+        assert detail not in reply_b.lower()
@@ -0,0 +1,43 @@
+"""/chat reports a lead capture only on the turn that captured it, and keeps error details in the log"""
+
+import importlib
+
+import pytest
+from starlette.testclient import TestClient
+
+from agent import agent as agent_module
+from agent import intent_classifier, telemetry
+from agent.stub_llm import StubLLM
+
+@pytest.fixture
+def client(monkeypatch):
+    # importing the server switches telemetry and intent learning on
+    telemetry_enabled = telemetry.ENABLED
+    monkeypatch.setattr(intent_classifier, "LEARNING", intent_classifier.LEARNING)
+    server = importlib.import_module("server")
+    llm = StubLLM(latency_s=0)
+    monkeypatch.setattr(agent_module, "llm", llm)
+    monkeypatch.setattr(intent_classifier, "llm", llm)
+    # no provider connections and no learning from the stub's labels
+    monkeypatch.setattr(server, "LLM_PREWARM", 0)
+    intent_classifier.set_learning(False)
+    with TestClient(server.app) as c:
+        yield c
+    telemetry.set_enabled(telemetry_enabled)
+
+def chat(client, user_id: str, message: str) -> dict:
+    response = client.post("/chat", json={"user_id": user_id, "message": message})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_lead_captured_only_on_capture_turn(client):
+    user = "server-lead"
+    assert chat(client, user, "I want to sign up for the pro plan")["lead_captured"] is False
+    result = chat(client, user, "My name is Ann Lee, ann@example.com, youtube")
+    assert result["lead_captured"] is True
+    assert chat(client, user, "how do I cancel later?")["lead_captured"] is False
+
+def test_bad_request_does_not_echo_exception(client):
+    response = client.post("/chat", content=b"{not json", headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    assert response.json() == {"error": "invalid request"}
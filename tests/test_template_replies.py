@@ -0,0 +1,41 @@
+"""A templated answer must not leave its KB state behind for the next turn"""
+
+import pytest
+
+from agent import agent as agent_module
+from agent import intent_classifier, response_cache
+from agent.stub_llm import StubLLM
+
+class RecordingLLM(StubLLM):
+    """Stub LLM that keeps every prompt it was sent, by call site"""
+    def __init__(self):
+        super().__init__(latency_s=0)
+        self.prompts = []
+
+    def _answer(self, prompt, call_site):
+        self.prompts.append((call_site, prompt))
+        return super()._answer(prompt, call_site)
+
+@pytest.fixture
+def recording_llm(monkeypatch):
+    llm = RecordingLLM()
+    monkeypatch.setattr(agent_module, "llm", llm)
+    monkeypatch.setattr(intent_classifier, "llm", llm)
+    response_cache.response_cache.clear()
+    yield llm
+    response_cache.response_cache.clear()
+
+@pytest.mark.parametrize("mode", ["graph", "fused"])
+def test_turn_after_template_has_no_stale_kb(recording_llm, mode):
+    app = agent_module.graph_app if mode == "graph" else agent_module.fused_app
+    config = {"configurable": {"thread_id": f"template-{mode}"}}
+
+    result = app.invoke({"user_message": "what is the pro plan price"}, config=config)
+    assert "$79" in result["reply"]
+    assert not recording_llm.prompts, "the plan price should come from a template"
+
+    app.invoke({"user_message": "hey, how are you doing today?"}, config=config)
+    replies = [p for site, p in recording_llm.prompts if site in ("response", "fused_turn")]
+    assert replies, "the second turn should reach the LLM"
+    assert "knowledge base info" not in replies[-1]
+    assert "No reliable info found in the knowledge base" in replies[-1]
@@ -0,0 +1,299 @@
+"""
+Bulk triage of exported comments / DMs (JSONL, one message per line).
+
+The input is streamed in chunks of --chunk-size lines; at most two chunks per
+worker are in flight, so memory stays bounded whatever the file size.
+- workers (a process pool) clean and classify each chunk with the local model
+  in one batched pass, extract lead fields with the regex tier, and add the
+  templated reply or the KB context for product inquiries
+- the main process escalates low-confidence messages to the LLM: cached LLM
+  labels first, then the rest deduplicated and sent --llm-batch at a time in
+  one numbered prompt (classify_batch_with_gemini), at most --llm-rps
+  requests per second; with INFLX_INTENT_LEARNING=1 the labels are also
+  stored as training examples for the local model
+- results are appended to the output JSONL in input order, chunk by chunk;
+  after each chunk the input and output offsets are saved to <output>.ckpt,
+  so an interrupted run continues with --resume
+
+Each output line: {"offset", "id", "intent", "confidence", "source", "lead",
+"reply", "kb_context"} or {"offset", "id", "error"} for unreadable lines.
+"offset" is the byte offset of the input line, "source" is "local", "llm" or
+"llm_cache", "lead" holds the fields found (None if none).
+
+Run:
+    python -m triage comments.jsonl triaged.jsonl [--workers 4] [--resume]
+Set INFLX_STUB_LLM_LATENCY_S=0.05 to escalate to a stub LLM instead.
+Prints a JSON summary at the end, including records per second per core.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from agent import intent_classifier, templates
+from agent.intent_classifier import INTENT_LABELS, clean_text
+from agent.lead_extractor import extract_lead_fields
+from data.rag_retriever import get_knowledge_index, retrieve_from_kb
+from models.intent import classify_intents_local, get_intent_classifier
+
+CHUNK_SIZE = 1000
+LLM_BATCH = 50
+LLM_RPS = 2.0
+STUB_LLM_LATENCY_S = os.getenv("INFLX_STUB_LLM_LATENCY_S")
+
+if STUB_LLM_LATENCY_S is not None:
+    from agent.stub_llm import StubLLM
+    intent_classifier.llm = StubLLM(float(STUB_LLM_LATENCY_S))
+
+# ---- input ----
+def read_chunks(path: str, offset: int = 0, chunk_size: int = CHUNK_SIZE):
+    """Yields (start offset, end offset, raw lines) from offset on"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        start, lines = offset, []
+        for line in f:
+            lines.append(line)
+            offset += len(line)
+            if len(lines) >= chunk_size:
+                yield start, offset, lines
+                start, lines = offset, []
+        if lines:
+            yield start, offset, lines
+
+# ---- local stage (worker processes) ----
+def _init_worker():
+    """Loads the classifier and the KB index once per worker"""
+    get_intent_classifier()
+    get_knowledge_index()
+
+def suggest_reply(item: dict, text: str):
+    """Templated reply for the item's intent, or the KB context to answer from"""
+    item["reply"] = templates.reply_for(item["intent"], text)
+    item["kb_context"] = None
+    if item["reply"] is None and item["intent"] == "product_inquiry":
+        item["kb_context"] = retrieve_from_kb(text)
+
+def triage_chunk(start: int, lines: list, text_field: str = "text", id_field: str = "id"):
+    """
+    Local triage of one chunk.
+    :return: (items in input order, CPU seconds spent); items still needing the
+        LLM carry "needs_llm" and their text in "_text"
+    """
+    cpu_start = time.process_time()
+    items, pending = [], []
+    offset = start
+    for raw in lines:
+        item = {"offset": offset}
+        offset += len(raw)
+        if not raw.strip():
+            continue
+        items.append(item)
+        try:
+            record = json.loads(raw)
+            item["id"] = record.get(id_field)
+            text = record[text_field]
+        except (ValueError, AttributeError, KeyError, TypeError):
+            item.setdefault("id", None)
+            item["error"] = f"no '{text_field}' in line"
+            continue
+        if not isinstance(text, str) or not text.strip():
+            item["error"] = f"no '{text_field}' in line"
+            continue
+        pending.append((item, text))
+
+    results = classify_intents_local([clean_text(text) for _, text in pending])
+    for (item, text), (label, confidence) in zip(pending, results):
+        item["intent"] = label
+        item["confidence"] = round(confidence, 4)
+        item["source"] = "local"
+        found = extract_lead_fields([text])
+        item["lead"] = {k: v for k, v in found.items() if v} or None
+        if confidence < intent_classifier.threshold_for(label):
+            item["needs_llm"] = True
+            item["_text"] = text
+        else:
+            suggest_reply(item, text)
+    return items, time.process_time() - cpu_start
+
+# ---- LLM escalation (main process) ----
+class RateLimiter:
+    """Spaces calls at least 1 / rate seconds apart (no limit for rate <= 0)"""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = 0.0
+
+    def wait(self):
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+class Escalator:
+    """Batched, rate-limited LLM intent fallback for low-confidence items"""
+    def __init__(self, batch_size: int = LLM_BATCH, rps: float = LLM_RPS):
+        self.batch_size = max(1, batch_size)
+        self.limiter = RateLimiter(rps)
+        self.stats = {"escalated": 0, "llm_cache_hits": 0, "llm_requests": 0, "llm_errors": 0}
+
+    def _classify(self, texts: list) -> dict:
+        """cleaned text -> LLM label, for labels the LLM actually gave"""
+        labels = {}
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            self.limiter.wait()
+            self.stats["llm_requests"] += 1
+            try:
+                answers = intent_classifier.classify_batch_with_gemini(batch)
+            except Exception as e:
+                self.stats["llm_errors"] += 1
+                print(f"[triage] LLM batch failed, keeping local labels: {e}", file=sys.stderr)
+                continue
+            for text, label in zip(batch, answers):
+                if label in INTENT_LABELS:
+                    labels[text] = label
+                    intent_classifier.remember_llm_intent(text, label)
+        return labels
+
+    def resolve(self, items: list):
+        """Replaces the local guess of every item flagged needs_llm"""
+        todo = [item for item in items if item.pop("needs_llm", False)]
+        if not todo:
+            return
+        self.stats["escalated"] += len(todo)
+        cleaned = {id(item): clean_text(item["_text"]) for item in todo}
+        labels, missing = {}, []
+        for text in dict.fromkeys(cleaned.values()):
+            label = intent_classifier.llm_cache.get(text)
+            if label is None:
+                missing.append(text)
+            else:
+                labels[text] = label
+        self.stats["llm_cache_hits"] += len(labels)
+        fresh = self._classify(missing) if missing else {}
+        labels.update(fresh)
+        for item in todo:
+            text = cleaned[id(item)]
+            if text in labels:
+                item["intent"] = labels[text]
+                item["source"] = "llm" if text in fresh else "llm_cache"
+            suggest_reply(item, item.pop("_text"))
+
+# ---- checkpoint ----
+def checkpoint_path(output_path: str) -> str:
+    return f"{output_path}.ckpt"
+
+def load_checkpoint(output_path: str):
+    """Saved progress of an earlier run, or None"""
+    try:
+        with open(checkpoint_path(output_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_checkpoint(output_path: str, state: dict):
+    """Writes the checkpoint atomically, like the model artifact"""
+    path = checkpoint_path(output_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+# ---- pipeline ----
+def triage(input_path: str, output_path: str, workers: int = None, chunk_size: int = CHUNK_SIZE,
+           llm_batch: int = LLM_BATCH, llm_rps: float = LLM_RPS, text_field: str = "text",
+           id_field: str = "id", resume: bool = False) -> dict:
+    """
+    Triages input_path into output_path.
+    workers=0 runs the local stage in this process (no pool).
+    :return: run summary
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    resume = resume and os.path.exists(output_path)
+    state = load_checkpoint(output_path) if resume else None
+    if state and state.get("input") != os.path.abspath(input_path):
+        raise SystemExit(f"{checkpoint_path(output_path)} belongs to {state.get('input')}, not {input_path}")
+    state = state or {"input": os.path.abspath(input_path), "input_offset": 0, "output_offset": 0, "records": 0}
+
+    escalator = Escalator(llm_batch, llm_rps)
+    summary = {"records": 0, "errors": 0, "worker_cpu_s": 0.0}
+    _init_worker()  # forked workers inherit the loaded model and index
+
+    out = open(output_path, "r+b" if state["output_offset"] else "wb")
+    # drop anything written after the last checkpoint
+    out.truncate(state["output_offset"])
+    out.seek(state["output_offset"])
+
+    def write(items, cpu_s, end):
+        escalator.resolve(items)
+        lines = []
+        for item in items:
+            summary["errors"] += "error" in item
+            lines.append(json.dumps(item, ensure_ascii=False))
+        if lines:
+            out.write(("\n".join(lines) + "\n").encode("utf-8"))
+        out.flush()
+        summary["records"] += len(items)
+        summary["worker_cpu_s"] += cpu_s
+        state.update(input_offset=end, output_offset=out.tell(), records=state["records"] + len(items))
+        save_checkpoint(output_path, state)
+
+    chunks = read_chunks(input_path, state["input_offset"], chunk_size)
+    started = time.perf_counter()
+    try:
+        if workers <= 0:
+            for start, end, lines in chunks:
+                write(*triage_chunk(start, lines, text_field, id_field), end)
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+                in_flight = deque()
+                for start, end, lines in chunks:
+                    in_flight.append((pool.submit(triage_chunk, start, lines, text_field, id_field), end))
+                    if len(in_flight) >= 2 * workers:
+                        future, done_end = in_flight.popleft()
+                        write(*future.result(), done_end)
+                while in_flight:
+                    future, done_end = in_flight.popleft()
+                    write(*future.result(), done_end)
+    finally:
+        out.close()
+
+    wall_s = time.perf_counter() - started
+    records = summary["records"]
+    cores = max(1, workers)
+    return {
+        **summary,
+        **escalator.stats,
+        "total_records": state["records"],
+        "workers": workers,
+        "wall_s": wall_s,
+        "records_per_s": records / wall_s if wall_s else 0.0,
+        "records_per_s_per_core": records / wall_s / cores if wall_s else 0.0,
+        # local stage only: classification, lead extraction, retrieval
+        "records_per_cpu_s": records / summary["worker_cpu_s"] if summary["worker_cpu_s"] else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Triage exported comments / DMs (JSONL) with Inflx")
+    parser.add_argument("input", help="JSONL file, one message per line")
+    parser.add_argument("output", help="JSONL file for the triaged messages")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count, 0: none)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--llm-batch", type=int, default=LLM_BATCH, help="messages per LLM request")
+    parser.add_argument("--llm-rps", type=float, default=LLM_RPS, help="max LLM requests per second (0: no limit)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--resume", action="store_true", help="continue from <output>.ckpt")
+    args = parser.parse_args(argv)
+    summary = triage(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size,
+                     llm_batch=args.llm_batch, llm_rps=args.llm_rps, text_field=args.text_field,
+                     id_field=args.id_field, resume=args.resume)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()